@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import SpendingInsights
 
-# Register your models here.
+@admin.register(SpendingInsights)
+class SpendingInsightsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'as_of', 'rows', 'computed_at']
+    list_select_related = ['user']
+    search_fields = ['user__username__exact']
+    readonly_fields = ['user', 'as_of', 'computed_at', 'rows', 'forecast', 'seasonality', 'anomalies']
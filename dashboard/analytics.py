@@ -0,0 +1,330 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+from transactions.category_cache import categories_of_type
+from transactions.models import Transaction
+from transactions.periods import shift_month
+from .models import SpendingInsights
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without numpy the dashboard shows no insights
+    np = None
+
+# Expenses analysed per user: the complete months in this window plus the
+# current one, newest first, at most MAX_HISTORY_ROWS of them. A row takes
+# 32 bytes while loading and 24 once split into arrays, so a user (and a
+# pool worker) stays within ~64 MB however large the table grows.
+HISTORY_MONTHS = 36
+MAX_HISTORY_ROWS = 1_000_000
+FETCH_CHUNK_SIZE = 10_000
+# Trailing days whose spend per weekday projects the rest of the month
+FORECAST_WINDOW_DAYS = 91
+Z_THRESHOLD = 3.0
+IQR_FACTOR = 1.5
+# Categories with fewer expenses are not checked for anomalies
+MIN_CATEGORY_ROWS = 8
+# Flagged expenses are reported from this many most recent days
+ANOMALY_LOOKBACK_DAYS = 30
+MAX_ANOMALIES = 10
+EPOCH = date(1970, 1, 1)
+# 1970-01-01 was a Thursday (Monday is 0)
+EPOCH_WEEKDAY = 3
+
+
+def available():
+    return np is not None
+
+
+def day_number(day):
+    """Days since 1970-01-01, the integer value of numpy's datetime64[D]"""
+    return (day - EPOCH).days
+
+
+def month_number(day):
+    """Months since January 1970, the integer value of numpy's datetime64[M]"""
+    return (day.year - 1970) * 12 + day.month - 1
+
+
+def cents_to_decimal(cents):
+    return Decimal(int(round(cents))).scaleb(-2)
+
+
+class History:
+    """A user's expenses in the base currency as parallel arrays, oldest first.
+
+    days are datetime64[D] day numbers, cents are amounts scaled to integers
+    and codes index category_ids. truncated is set when MAX_HISTORY_ROWS cut
+    the window short, leaving its oldest month incomplete.
+    """
+
+    def __init__(self, pks, days, cents, codes, category_ids, truncated=False):
+        self.pks = pks
+        self.days = days
+        self.cents = cents
+        self.codes = codes
+        self.category_ids = category_ids
+        self.truncated = truncated
+
+    def __len__(self):
+        return len(self.pks)
+
+    @classmethod
+    def from_rows(cls, pks, days, cents, category_ids, truncated=False):
+        """Build from unordered columns (sequences or arrays); days as day numbers"""
+        pks = np.asarray(pks, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int32)
+        order = np.lexsort((pks, days))
+        ids, codes = np.unique(np.asarray(category_ids, dtype=np.int64)[order], return_inverse=True)
+        return cls(
+            pks[order], days[order], np.asarray(cents, dtype=np.int64)[order],
+            codes.astype(np.int32), ids, truncated,
+        )
+
+
+def history_queryset(user, today):
+    since = date(*shift_month(today.year, today.month, -HISTORY_MONTHS), 1)
+    return Transaction.objects.filter(
+        user=user, type='expense', date__gte=since, date__lte=today,
+    ).annotate(
+        # Scaled in SQL, so rows arrive ready for fixed-width arrays
+        cents=Cast(Round(F('base_amount') * 100), BigIntegerField()),
+    ).order_by('-date', '-id')
+
+
+def load_history(user, today=None, max_rows=MAX_HISTORY_ROWS):
+    """The user's History, read with one query over the (user, type, date) index.
+
+    Rows stream through a chunked iterator (a server-side cursor on
+    PostgreSQL) straight into a structured array, so no list of model
+    instances or tuples is ever held.
+    """
+    today = today or timezone.localdate()
+    rows = history_queryset(user, today).values_list('pk', 'date', 'cents', 'category_id')[:max_rows]
+    dtype = np.dtype([('pk', 'i8'), ('day', 'datetime64[D]'), ('cents', 'i8'), ('category', 'i8')])
+    records = np.fromiter(rows.iterator(chunk_size=FETCH_CHUNK_SIZE), dtype=dtype)[::-1]
+    category_ids, codes = np.unique(records['category'], return_inverse=True)
+    return History(
+        np.ascontiguousarray(records['pk']),
+        records['day'].astype(np.int32),
+        np.ascontiguousarray(records['cents']),
+        codes.astype(np.int32),
+        category_ids,
+        truncated=len(records) == max_rows,
+    )
+
+
+def forecast_month(history, today, window=FORECAST_WINDOW_DAYS):
+    """Projected expenses for today's month.
+
+    The month's spend so far, plus for each remaining day the average spend
+    of that weekday over the trailing window (or the history, if shorter).
+    """
+    today_n = day_number(today)
+    month_start = day_number(today.replace(day=1))
+    month_end = day_number(date(*shift_month(today.year, today.month, 1), 1)) - 1
+    previous_start = day_number(date(*shift_month(today.year, today.month, -1), 1))
+    days, cents = history.days, history.cents
+
+    spent = cents[(days >= month_start) & (days <= today_n)].sum()
+    previous = cents[(days >= previous_start) & (days < month_start)].sum()
+    projected = 0.0
+    if len(history):
+        window_start = max(today_n - window + 1, int(days.min()))
+        in_window = (days >= window_start) & (days <= today_n)
+        span = today_n - window_start + 1
+        daily = np.bincount(days[in_window] - window_start, weights=cents[in_window], minlength=span)
+        weekdays = (np.arange(window_start, today_n + 1) + EPOCH_WEEKDAY) % 7
+        per_weekday = np.bincount(weekdays, weights=daily, minlength=7)
+        seen = np.bincount(weekdays, minlength=7)
+        average = np.divide(per_weekday, seen, out=np.zeros(7), where=seen > 0)
+        remaining = (np.arange(today_n + 1, month_end + 1) + EPOCH_WEEKDAY) % 7
+        projected = average[remaining].sum()
+
+    return {
+        'month': today.replace(day=1),
+        'spent': cents_to_decimal(spent),
+        'projected': cents_to_decimal(projected),
+        'forecast': cents_to_decimal(spent + projected),
+        'previous_month': cents_to_decimal(previous),
+        'days_remaining': month_end - today_n,
+    }
+
+
+def category_seasonality(history, today):
+    """Per category, the average spend of each calendar month relative to the
+    category's average month, over the complete months before today's.
+
+    {category_id: [12 ratios, January first]}; a ratio is None for calendar
+    months the history does not cover or categories with no spend.
+    """
+    months = history.days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    current = month_number(today)
+    complete = months < current
+    if not complete.any():
+        return {}
+    # A truncated history's oldest month is missing rows
+    first = int(months[complete].min()) + (1 if history.truncated else 0)
+    complete &= months >= first
+    span = current - first
+    if span <= 0:
+        return {}
+
+    k = len(history.category_ids)
+    cells = history.codes[complete].astype(np.int64) * span + (months[complete] - first)
+    totals = np.bincount(cells, weights=history.cents[complete], minlength=k * span).reshape(k, span)
+    # Column j is calendar month (first + j) % 12, since month 0 is January
+    calendar = np.zeros((span, 12))
+    calendar[np.arange(span), (first + np.arange(span)) % 12] = 1
+    occurrences = calendar.sum(axis=0)
+    by_month = np.divide(totals @ calendar, occurrences, out=np.full((k, 12), np.nan), where=occurrences > 0)
+    average = totals.mean(axis=1, keepdims=True)
+    ratios = np.divide(by_month, average, out=np.full((k, 12), np.nan), where=average > 0)
+
+    return {
+        int(category_id): [None if np.isnan(ratio) else round(float(ratio), 2) for ratio in row]
+        for category_id, row in zip(history.category_ids, ratios)
+    }
+
+
+def flag_anomalies(history, z_threshold=Z_THRESHOLD, iqr_factor=IQR_FACTOR, min_rows=MIN_CATEGORY_ROWS):
+    """(z-scores, z-score flags, IQR flags) for every expense, each judged
+    against the expenses of its own category.
+
+    Only unusually large amounts are flagged: a z-score above z_threshold, or
+    an amount above the category's third quartile by more than iqr_factor
+    interquartile ranges. Categories with fewer than min_rows expenses are
+    never flagged.
+    """
+    codes = history.codes
+    amounts = history.cents.astype(np.float64)
+    k = len(history.category_ids)
+    counts = np.bincount(codes, minlength=k)
+    means = np.bincount(codes, weights=amounts, minlength=k) / np.maximum(counts, 1)
+    # Two passes (mean, then squared deviations) to keep the variance exact
+    deviations = amounts - means[codes]
+    stds = np.sqrt(np.bincount(codes, weights=deviations ** 2, minlength=k) / np.maximum(counts, 1))
+    eligible = counts >= min_rows
+
+    scored = eligible[codes] & (stds[codes] > 0)
+    z = np.zeros_like(amounts)
+    z[scored] = deviations[scored] / stds[codes][scored]
+
+    # Sorted by category then amount, each category is a contiguous run and
+    # its quartiles are found by position, linearly interpolated like np.quantile.
+    # Packing both into one int64 key makes that a plain sort, several times
+    # faster than lexsort; it only needs the amounts to be non-negative.
+    span = int(history.cents.max()) + 1 if len(history) else 1
+    if len(history) and history.cents.min() >= 0 and k * span < 2 ** 62:
+        offsets = np.repeat(np.arange(k, dtype=np.int64) * span, counts)
+        ordered = (np.sort(codes.astype(np.int64) * span + history.cents) - offsets).astype(np.float64)
+    else:
+        ordered = amounts[np.lexsort((amounts, codes))]
+    starts = np.cumsum(counts) - counts
+    last = starts + np.maximum(counts - 1, 0)
+
+    def quartile(q):
+        position = starts + q * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    if len(history):
+        q1, q3 = quartile(0.25), quartile(0.75)
+        fences = q3 + iqr_factor * (q3 - q1)
+        iqr_flags = eligible[codes] & (amounts > fences[codes])
+    else:
+        iqr_flags = np.zeros(0, dtype=bool)
+    return z, z > z_threshold, iqr_flags
+
+
+def recent_anomalies(history, today, lookback=ANOMALY_LOOKBACK_DAYS, limit=MAX_ANOMALIES):
+    """The most unusual flagged expenses of the last lookback days, highest z-score first"""
+    z, z_flags, iqr_flags = flag_anomalies(history)
+    flagged = np.flatnonzero((z_flags | iqr_flags) & (history.days > day_number(today) - lookback))
+    flagged = flagged[np.argsort(-z[flagged], kind='stable')][:limit]
+    return [
+        {
+            'id': int(history.pks[i]),
+            'date': EPOCH + timedelta(days=int(history.days[i])),
+            'amount': cents_to_decimal(history.cents[i]),
+            'category_id': int(history.category_ids[history.codes[i]]),
+            'z_score': round(float(z[i]), 1),
+            'reasons': [reason for reason, flags in (('z-score', z_flags), ('IQR', iqr_flags)) if flags[i]],
+        }
+        for i in flagged
+    ]
+
+
+def analyze(user, today=None):
+    """Forecast, seasonality and anomalies for one user, ready to store"""
+    today = today or timezone.localdate()
+    history = load_history(user, today)
+    names = {category['id']: category['name'] for category in categories_of_type(user.pk, 'expense')}
+
+    anomalies = recent_anomalies(history, today)
+    descriptions = dict(Transaction.objects.filter(
+        pk__in=[anomaly['id'] for anomaly in anomalies],
+    ).values_list('pk', 'description')) if anomalies else {}
+    for anomaly in anomalies:
+        anomaly['category'] = names.get(anomaly['category_id'], '')
+        anomaly['description'] = descriptions.get(anomaly['id']) or ''
+
+    this_month = today.month - 1
+    seasonality = [
+        {
+            'category_id': category_id,
+            'category': names.get(category_id, ''),
+            'ratios': ratios,
+            'this_month': ratios[this_month],
+        }
+        for category_id, ratios in category_seasonality(history, today).items()
+    ]
+    # Categories running furthest from their usual month first
+    seasonality.sort(key=lambda item: -abs((item['this_month'] or 1) - 1))
+
+    return {
+        'as_of': today,
+        'rows': len(history),
+        'forecast': forecast_month(history, today),
+        'seasonality': seasonality,
+        'anomalies': anomalies,
+    }
+
+
+def refresh_insights(user, today=None):
+    """Recompute and store a user's SpendingInsights; returns the rows analysed"""
+    result = analyze(user, today)
+    SpendingInsights.objects.update_or_create(user=user, defaults={
+        'as_of': result['as_of'],
+        'rows': result['rows'],
+        'forecast': result['forecast'],
+        'seasonality': result['seasonality'],
+        'anomalies': result['anomalies'],
+    })
+    return result['rows']
+
+
+def init_worker():
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+
+
+def refresh_batch(user_ids, today=None):
+    """Pool task: refresh the insights of user_ids; returns (users, rows analysed)"""
+    rows = 0
+    users = User.objects.filter(pk__in=user_ids).order_by('pk')
+    for user in users:
+        rows += refresh_insights(user, today)
+    return len(user_ids), rows
+
+
+def stored_insights(user):
+    """The user's stored insights as a dict, or None before the first refresh"""
+    return SpendingInsights.objects.filter(user=user).values(
+        'as_of', 'computed_at', 'rows', 'forecast', 'seasonality', 'anomalies',
+    ).first()
@@ -0,0 +1,180 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+from transactions.models import Transaction
+from transactions.periods import period_from_params
+from transactions.routers import replica_reads
+from .cache import get_or_compute, request_etag
+from .timeseries import GRANULARITIES, TooManyBuckets, get_time_series, last_buckets
+from .utils import build_trends, get_dashboard_aggregates, get_monthly_series, get_yearly_series
+
+TREND_GRANULARITIES = {
+    # granularity: (default periods, max periods)
+    'month': (6, 120),
+    'year': (5, 50),
+}
+MAX_RECENT = 50
+# Buckets shown when /timeseries/ is called without a date range
+TIMESERIES_DEFAULT_BUCKETS = {
+    'day': 30,
+    'week': 26,
+    'month': 12,
+    'year': 5,
+}
+MAX_WINDOW = 52
+
+
+def dashboard_etag(request):
+    """Changes whenever the user's transactions, categories or the current day change"""
+    return request_etag(request)
+
+
+def dashboard_api(view):
+    """Login, GET-only and ETag-based conditional responses for a dashboard
+    endpoint, read from the replica when there is one"""
+    return replica_reads(login_required(require_GET(condition(etag_func=dashboard_etag)(view))))
+
+
+def get_cached_aggregates(user):
+    now = timezone.now()
+    return get_or_compute(
+        user.pk, now.year, now.month,
+        lambda: get_dashboard_aggregates(user, now.year, now.month)
+    )
+
+
+def json_response(data):
+    response = JsonResponse(data, safe=False)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def parse_int(value, default, maximum):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+@dashboard_api
+def summary(request):
+    """Current month's income, expenses and savings"""
+    data = get_cached_aggregates(request.user)
+    return json_response({
+        'total_income': float(data['total_income']),
+        'total_expenses': float(data['total_expenses']),
+        'savings': float(data['savings']),
+        'savings_percentage': float(data['savings_percentage']),
+        'this_month_total': float(data['total_expenses']),
+    })
+
+
+@dashboard_api
+def categories(request):
+    """Current month's totals per category, for both types"""
+    data = get_cached_aggregates(request.user)
+    return json_response({
+        'category_expenses': data['category_expenses'],
+        'category_income': data['category_income'],
+    })
+
+
+@dashboard_api
+def budgets(request):
+    """Each budget's spend in its current period"""
+    data = get_cached_aggregates(request.user)
+    return json_response({
+        'budgets': [
+            {
+                **budget,
+                'amount': float(budget['amount']),
+                'spent': float(budget['spent']),
+                'remaining': float(budget['remaining']),
+            }
+            for budget in data['budgets']
+        ],
+    })
+
+
+@dashboard_api
+def trends(request):
+    """Income/expense series; ?granularity=month|year&periods=N (or ?months=N)"""
+    granularity = request.GET.get('granularity', 'month')
+    if granularity not in TREND_GRANULARITIES:
+        return JsonResponse({'error': f'Unknown granularity "{granularity}"'}, status=400)
+    default, maximum = TREND_GRANULARITIES[granularity]
+    periods = parse_int(request.GET.get('periods', request.GET.get('months')), default, maximum)
+
+    today = timezone.localdate()
+    if granularity == 'month':
+        series = get_monthly_series(request.user, today.year, today.month, periods)
+    else:
+        series = get_yearly_series(request.user, today.year, periods)
+    return json_response({'granularity': granularity, 'trends': build_trends(series)})
+
+
+def decimal_or_none(value):
+    return None if value is None else float(value)
+
+
+@dashboard_api
+def timeseries(request):
+    """Bucketed income/expenses with running balance and moving averages.
+
+    ?granularity=day|week|month|year (default month), ?window=N buckets for
+    the moving averages (default 3), and the transaction list period
+    parameters for the range (e.g. ?start=2015-01-01&end=2024-12-31);
+    without a range, the last few buckets up to today.
+    """
+    granularity = request.GET.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': f'Unknown granularity "{granularity}"'}, status=400)
+    window = parse_int(request.GET.get('window'), 3, MAX_WINDOW)
+
+    today = timezone.localdate()
+    default_start, default_end = last_buckets(today, granularity, TIMESERIES_DEFAULT_BUCKETS[granularity])
+    start, end = period_from_params(request.GET, today) or (None, None)
+    start, end = start or default_start, end or default_end
+    if start >= end:
+        return JsonResponse({'error': 'The range is empty'}, status=400)
+
+    try:
+        series = get_time_series(request.user, start, end, granularity, window)
+    except TooManyBuckets as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return json_response({
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'window': window,
+        'series': [
+            {
+                'period': item['period'].isoformat(),
+                **{key: decimal_or_none(value) for key, value in item.items() if key != 'period'},
+            }
+            for item in series
+        ],
+    })
+
+
+@dashboard_api
+def recent(request):
+    """The latest transactions; ?limit=N (default 5)"""
+    limit = parse_int(request.GET.get('limit'), 5, MAX_RECENT)
+    rows = Transaction.objects.filter(user=request.user).order_by(
+        '-date', '-created_at'
+    ).values_list('id', 'date', 'type', 'category__name', 'amount', 'currency', 'description')[:limit]
+    return json_response([
+        {
+            'id': pk,
+            'date': day.isoformat(),
+            'type': transaction_type,
+            'category': category,
+            'amount': float(amount),
+            'currency': currency,
+            'description': description or '',
+        }
+        for pk, day, transaction_type, category, amount, currency, description in rows
+    ])
@@ -0,0 +1,53 @@
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import render
+from django.utils import timezone
+from transactions.async_db import gather_queries, resolve_user
+from transactions.budgets import budget_progress, unread_alerts
+from transactions.models import Transaction
+from .analytics import stored_insights
+from .cache import data_version
+from .utils import build_monthly_totals, build_trends, get_category_breakdown, get_monthly_series
+
+TREND_MONTHS = 6
+
+
+async def dashboard_async(request):
+    """Async DashboardView: the series, category, budget and insight queries run concurrently"""
+    user = await resolve_user(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    now = timezone.now()
+    series, breakdown, budgets, budget_alerts, insights = await gather_queries(
+        lambda: get_monthly_series(user, now.year, now.month, TREND_MONTHS),
+        lambda: get_category_breakdown(user, now.year, now.month),
+        lambda: budget_progress(user, date(now.year, now.month, 1)),
+        lambda: unread_alerts(user),
+        lambda: stored_insights(user),
+    )
+
+    # Recent transactions through the async ORM
+    recent_transactions = [
+        txn async for txn in Transaction.objects.filter(
+            user=user
+        ).select_related('category').order_by('-date', '-created_at')[:5]
+    ]
+
+    context = build_monthly_totals(series[-1]['income'], series[-1]['expenses'])
+    context.update({
+        'category_expenses': breakdown['expense'],
+        'category_income': breakdown['income'],
+        'monthly_trends': build_trends(series),
+        'trend_months': TREND_MONTHS,
+        'budgets': budgets,
+        'budget_alerts': budget_alerts,
+        'insights': insights,
+        'recent_transactions': recent_transactions,
+        'this_month_total': context['total_expenses'],
+        'data_version': await sync_to_async(data_version)(user.pk),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    })
+    return await sync_to_async(render)(request, 'dashboard/index.html', context)
@@ -0,0 +1,332 @@
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from uuid import uuid4
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from transactions.models import Transaction
+from transactions.pagination import encode_cursor
+from transactions.periods import shift_month
+from . import analytics
+from .cache import invalidate_dashboard
+
+ADMIN_SCENARIO = 'admin_transaction_changelist'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Scenario:
+    """One request to time; setup() runs before every iteration, outside the timing"""
+
+    def __init__(self, name, url, client, setup=None):
+        self.name = name
+        self.url = url
+        self.client = client
+        self.setup = setup
+
+    def request(self):
+        if self.setup:
+            self.setup()
+        response = self.client.get(self.url)
+        if response.status_code != 200:
+            raise AssertionError(f'{self.name}: {self.url} returned {response.status_code}')
+        return response
+
+
+@contextmanager
+def temporary_admin():
+    """A superuser for the admin scenario; it has no usable password and is
+    deleted afterwards, so no login is left behind in the benchmarked database"""
+    admin = User(username=f'benchmark-{uuid4().hex[:12]}', is_staff=True, is_superuser=True)
+    admin.set_unusable_password()
+    admin.save()
+    try:
+        yield admin
+    finally:
+        admin.delete()
+
+
+def build_scenarios(user, admin=None):
+    """The benchmarked views for one (typically synthetic) user; the admin
+    changelist only when an admin user is given"""
+    client = Client()
+    client.force_login(user)
+
+    list_url = reverse('transaction_list')
+    rows = Transaction.objects.filter(user=user)
+    count = rows.count()
+    per_page = 20
+    last_page = max(1, -(-count // per_page))
+    deep_row = rows.order_by('-date', '-created_at', '-id')[max(0, count - per_page - 1):].first()
+    deep_cursor = encode_cursor(deep_row, 'next') if deep_row else ''
+
+    scenarios = [
+        Scenario('dashboard_cold', reverse('dashboard'), client, lambda: invalidate_dashboard(user.pk)),
+        Scenario('dashboard_cached', reverse('dashboard'), client),
+        Scenario('transaction_list_first', list_url, client),
+        Scenario('transaction_list_deep', f'{list_url}?page={last_page}', client),
+        Scenario('transaction_list_deep_cursor', f'{list_url}?cursor={deep_cursor}', client),
+        Scenario('get_categories', f'{reverse("get_categories")}?type=expense', client),
+    ]
+    if admin:
+        admin_client = Client()
+        admin_client.force_login(admin)
+        scenarios.append(Scenario(ADMIN_SCENARIO, reverse('admin:transactions_transaction_changelist'), admin_client))
+    return scenarios
+
+
+def measure(scenario, iterations):
+    """Latency percentiles, query count and peak traced memory for one scenario"""
+    # Warm-up request, also used to count queries. With DEBUG on, the query log is
+    # a bounded deque that seeding may have filled, which breaks the capture's slicing
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        scenario.request()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        scenario.request()
+        timings.append(time.perf_counter() - started)
+
+    # Separate traced run: tracemalloc slows every allocation down
+    tracemalloc.start()
+    try:
+        scenario.request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'queries': len(queries.captured_queries),
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 95) * 1000, 2),
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(user, iterations=20, only=None):
+    results = {}
+    with temporary_admin() if not only or ADMIN_SCENARIO in only else nullcontext() as admin:
+        for scenario in build_scenarios(user, admin):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = measure(scenario, iterations)
+    return results
+
+
+# Pages compared by benchmark_render, by their build_scenarios() name
+RENDER_SCENARIOS = ('dashboard_cached', 'transaction_list_first', 'transaction_list_deep')
+RENDER_MIDDLEWARE = ('django.middleware.gzip.GZipMiddleware', 'django.middleware.http.ConditionalGetMiddleware')
+
+
+def render_settings(cached):
+    """Overrides rendering with the cached template loader, fragment cache,
+    gzip and ETags (cached=True), or with none of them, as before they existed"""
+    loaders = settings.TEMPLATE_LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    engine = {**settings.TEMPLATES[0], 'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': loaders}}
+    fragments = (
+        {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-render-fragments'}
+        if cached else {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    )
+    middleware = [
+        name for name in settings.MIDDLEWARE
+        if cached or name not in RENDER_MIDDLEWARE
+    ]
+    return override_settings(
+        TEMPLATES=[engine],
+        CACHES={**settings.CACHES, 'fragments': fragments},
+        MIDDLEWARE=middleware,
+    )
+
+
+def measure_render(user, url, iterations, revalidate=True):
+    """Template and total time percentiles and response size for one page
+    under the current settings, plus (revalidate=True) the time to answer a
+    matching If-None-Match"""
+    client = Client(HTTP_ACCEPT_ENCODING='gzip')
+    client.force_login(user)
+    # Warm-up: fills the loader, fragment and dashboard data caches
+    response = client.get(url)
+    if response.status_code != 200:
+        raise AssertionError(f'{url} returned {response.status_code}')
+
+    template_times, timings = [], []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        template_times.append(response.wsgi_request.timings.template_time)
+
+    result = {
+        'template_p50_ms': round(percentile(template_times, 50) * 1000, 2),
+        'template_p95_ms': round(percentile(template_times, 95) * 1000, 2),
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 95) * 1000, 2),
+        'bytes': len(response.content),
+        'gzip': response.get('Content-Encoding') == 'gzip',
+    }
+
+    if revalidate and response.has_header('ETag'):
+        revalidations = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            revalidations.append(time.perf_counter() - started)
+        if not_modified.status_code == 304:
+            result['not_modified_p50_ms'] = round(percentile(revalidations, 50) * 1000, 2)
+    return result
+
+
+def compare_render(user, iterations=20):
+    """{page: {'baseline': metrics, 'cached': metrics}} for each RENDER_SCENARIOS page"""
+    urls = {scenario.name: scenario.url for scenario in build_scenarios(user)}
+    results = {}
+    for name in RENDER_SCENARIOS:
+        results[name] = {}
+        for mode, cached in (('baseline', False), ('cached', True)):
+            with render_settings(cached):
+                results[name][mode] = measure_render(user, urls[name], iterations, revalidate=cached)
+    return results
+
+
+def check_budget(results, budget):
+    """List of 'scenario metric value > limit' strings for every exceeded budget"""
+    failures = []
+    for name, limits in budget.items():
+        if name not in results:
+            continue
+        for metric, limit in limits.items():
+            value = results[name].get(metric)
+            if value is not None and value > limit:
+                failures.append(f'{name} {metric} {value} > {limit}')
+    return failures
+
+
+# Per-row Python versions of the analytics in analytics.py, as the baseline
+# for benchmark_analytics and a reference for its tests. rows are
+# (pk, day number, cents, category id) tuples.
+
+def naive_forecast(rows, today, window):
+    today_n = analytics.day_number(today)
+    month_start = analytics.day_number(today.replace(day=1))
+    month_end = analytics.day_number(date(*shift_month(today.year, today.month, 1), 1)) - 1
+    spent = 0
+    daily = {}
+    for _, day, cents, _ in rows:
+        if month_start <= day <= today_n:
+            spent += cents
+        if today_n - window < day <= today_n:
+            daily[day] = daily.get(day, 0) + cents
+    if not rows:
+        return spent, 0.0
+    window_start = max(today_n - window + 1, min(day for _, day, _, _ in rows))
+    totals, seen = [0.0] * 7, [0] * 7
+    for day in range(window_start, today_n + 1):
+        weekday = (day + analytics.EPOCH_WEEKDAY) % 7
+        totals[weekday] += daily.get(day, 0)
+        seen[weekday] += 1
+    projected = 0.0
+    for day in range(today_n + 1, month_end + 1):
+        weekday = (day + analytics.EPOCH_WEEKDAY) % 7
+        if seen[weekday]:
+            projected += totals[weekday] / seen[weekday]
+    return spent, projected
+
+
+def naive_seasonality(rows, today):
+    current = analytics.month_number(today)
+    totals = {}
+    first = None
+    for _, day, cents, category_id in rows:
+        month = analytics.month_number(analytics.EPOCH + timedelta(days=day))
+        if month < current:
+            totals[category_id, month] = totals.get((category_id, month), 0) + cents
+            first = month if first is None else min(first, month)
+    if first is None:
+        return {}
+    seasonality = {}
+    for category_id in sorted({category_id for _, _, _, category_id in rows}):
+        monthly = [totals.get((category_id, month), 0) for month in range(first, current)]
+        average = sum(monthly) / len(monthly)
+        ratios = []
+        for calendar_month in range(12):
+            values = [value for month, value in zip(range(first, current), monthly) if month % 12 == calendar_month]
+            if values and average > 0:
+                ratios.append(round(sum(values) / len(values) / average, 2))
+            else:
+                ratios.append(None)
+        seasonality[category_id] = ratios
+    return seasonality
+
+
+def naive_anomalies(rows, z_threshold, iqr_factor, min_rows):
+    """{pk: (z-score flagged, IQR flagged)} for every flagged row"""
+    by_category = {}
+    for pk, _, cents, category_id in rows:
+        by_category.setdefault(category_id, []).append((pk, cents))
+    flagged = {}
+    for members in by_category.values():
+        if len(members) < min_rows:
+            continue
+        amounts = [cents for _, cents in members]
+        mean = statistics.fmean(amounts)
+        std = statistics.pstdev(amounts)
+        q1, _, q3 = statistics.quantiles(amounts, n=4, method='inclusive')
+        fence = q3 + iqr_factor * (q3 - q1)
+        for pk, cents in members:
+            by_z = std > 0 and (cents - mean) / std > z_threshold
+            by_iqr = cents > fence
+            if by_z or by_iqr:
+                flagged[pk] = (by_z, by_iqr)
+    return flagged
+
+
+def synthetic_history(rows, categories=12, days=3 * 365, seed=0):
+    """Random expense columns ending today: (pks, day numbers, cents, category ids)"""
+    rng = analytics.np.random.default_rng(seed)
+    end = analytics.day_number(date.today())
+    category_ids = rng.integers(1, categories + 1, rows)
+    # Log-normal amounts, scaled per category, with an occasional outlier
+    cents = (rng.lognormal(7, 0.6, rows) * category_ids).astype('int64')
+    cents[rng.random(rows) < 0.001] *= 20
+    return analytics.np.arange(1, rows + 1), rng.integers(end - days, end + 1, rows), cents, category_ids
+
+
+def time_call(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def compare_analytics(history, today):
+    """{name: (vectorized seconds, naive seconds)} for each analysis of history"""
+    rows = list(zip(history.pks.tolist(), history.days.tolist(), history.cents.tolist(), history.category_ids[history.codes].tolist()))
+    return {
+        'forecast': (
+            time_call(analytics.forecast_month, history, today)[1],
+            time_call(naive_forecast, rows, today, analytics.FORECAST_WINDOW_DAYS)[1],
+        ),
+        'seasonality': (
+            time_call(analytics.category_seasonality, history, today)[1],
+            time_call(naive_seasonality, rows, today)[1],
+        ),
+        'anomalies': (
+            time_call(analytics.flag_anomalies, history)[1],
+            time_call(naive_anomalies, rows, analytics.Z_THRESHOLD, analytics.IQR_FACTOR, analytics.MIN_CATEGORY_ROWS)[1],
+        ),
+    }
@@ -0,0 +1,159 @@
+import hashlib
+import time
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from transactions.models import Transaction
+from transactions.routers import use_primary
+
+CACHE_PREFIX = 'dashboard'
+STAT_NAMES = ('hits', 'misses', 'recomputes', 'lock_waits', 'invalidations')
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def version_key(user_id):
+    return f'{CACHE_PREFIX}:version:{user_id}'
+
+
+def stat_key(name):
+    return f'{CACHE_PREFIX}:stats:{name}'
+
+
+def new_version():
+    # Time based so a version lost to eviction never reuses an older number
+    return int(time.time() * 1000)
+
+
+def get_version(user_id):
+    """Current cache version for a user; bumped on every write"""
+    version = cache.get(version_key(user_id))
+    if version is None:
+        cache.add(version_key(user_id), new_version(), timeout=None)
+        version = cache.get(version_key(user_id))
+    return version
+
+
+def context_key(user_id, year, month):
+    return f'{CACHE_PREFIX}:context:{user_id}:{year}-{month:02d}:v{get_version(user_id)}'
+
+
+def data_version(user_id):
+    """Key part that changes whenever anything rendered from the user's data may.
+
+    The latest updated_at comes from the (user, updated_at) index and is
+    cached under the current cache version, so it is looked up once per
+    write; the version also moves on deletes and category edits, which
+    updated_at misses.
+    """
+    version = get_version(user_id)
+    key = f'{CACHE_PREFIX}:latest:{user_id}:v{version}'
+    latest = cache.get(key)
+    if latest is None:
+        # From the primary: a lagging replica could pair old rows with the new version
+        with use_primary():
+            latest = Transaction.objects.filter(user_id=user_id).aggregate(
+                latest=Max('updated_at')
+            )['latest']
+        latest = latest.isoformat() if latest else ''
+        cache.set(key, latest, timeout=get_setting('DASHBOARD_CACHE_TIMEOUT', 60 * 60 * 24))
+    return f'{latest}:{version}'
+
+
+def request_etag(request, *parts):
+    """ETag for a user's page or API response: their data version, the current
+    day and the full path, plus any parts the response also depends on"""
+    key = '|'.join([
+        str(request.user.pk),
+        data_version(request.user.pk),
+        timezone.localdate().isoformat(),
+        request.get_full_path(),
+        *parts,
+    ])
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def page_etag(request):
+    """ETag for an HTML page of the user's data.
+
+    It covers the CSRF secret the page's form tokens are derived from, and
+    there is none (so the page is rendered) while flash messages are pending.
+    """
+    if not request.user.is_authenticated or len(get_messages(request)):
+        return None
+    return request_etag(request, request.META.get('CSRF_COOKIE') or '')
+
+
+def increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def record(name):
+    increment(stat_key(name))
+
+
+def get_stats():
+    """Counter values for every dashboard cache statistic"""
+    values = cache.get_many([stat_key(name) for name in STAT_NAMES])
+    return {name: values.get(stat_key(name), 0) for name in STAT_NAMES}
+
+
+def invalidate_dashboard(user_id):
+    """Drop every cached dashboard month for a user"""
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.set(version_key(user_id), new_version(), timeout=None)
+    record('invalidations')
+
+
+def get_or_compute(user_id, year, month, compute):
+    """Return the cached dashboard data, computing it at most once per burst.
+
+    The first miss takes a short-lived lock and computes; concurrent misses
+    poll the cache until the value appears instead of recomputing.
+    """
+    key = context_key(user_id, year, month)
+    data = cache.get(key)
+    if data is not None:
+        record('hits')
+        return data
+
+    record('misses')
+    timeout = get_setting('DASHBOARD_CACHE_TIMEOUT', 60 * 60 * 24)
+    lock_timeout = get_setting('DASHBOARD_CACHE_LOCK_TIMEOUT', 10)
+    lock_key = f'{key}:lock'
+
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            record('recomputes')
+            # Computed from the primary: a lagging replica could cache
+            # pre-write totals under the post-write version
+            with use_primary():
+                data = compute()
+            cache.set(key, data, timeout=timeout)
+        finally:
+            cache.delete(lock_key)
+        return data
+
+    record('lock_waits')
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(get_setting('DASHBOARD_CACHE_POLL_INTERVAL', 0.05))
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if cache.get(lock_key) is None:
+            break
+
+    # The lock holder failed or timed out; compute without caching over it
+    record('recomputes')
+    return compute()
@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+
+# Upper bounds of the histogram buckets; the last bucket is +Inf
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+METRICS = {
+    'total_ms': DURATION_BUCKETS_MS,
+    'db_ms': DURATION_BUCKETS_MS,
+    'template_ms': DURATION_BUCKETS_MS,
+    'queries': QUERY_BUCKETS,
+}
+UNRESOLVED = '<unresolved>'
+
+# The RequestTimings of the request being served in this context. Context
+# variables follow the request into sync_to_async threads, so queries count
+# on whichever thread the ORM runs.
+_active_timings = ContextVar('request_timings', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """execute_wrapper kept on every connection (see install_query_counter);
+    forwards to the active RequestTimings, if any"""
+    timings = _active_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class RequestTimings:
+    """Query count and time split for one request.
+
+    Fed by the count_queries execute_wrapper on every database connection,
+    so queries are counted whether or not DEBUG (and with it
+    connection.queries) is on.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_started = None
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # gather_queries() runs queries of one request on several threads
+            with self.lock:
+                self.db_time += time.perf_counter() - started
+                self.queries += 1
+
+    @contextmanager
+    def capture_queries(self):
+        """Count the queries run in this context (and the threads it is copied to)"""
+        # Connections opened before dashboard.signals was connected
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+        token = _active_timings.set(self)
+        try:
+            yield self
+        finally:
+            _active_timings.reset(token)
+
+    def start_template(self):
+        self.template_started = time.perf_counter()
+
+    def end_template(self):
+        if self.template_started is not None:
+            self.template_time += time.perf_counter() - self.template_started
+            self.template_started = None
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with ('+Inf', count)"""
+        total = 0
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """In-process histograms per URL name. Each worker process keeps its own."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view_name, timings):
+        values = timings.as_dict()
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    metric: Histogram(bounds) for metric, bounds in METRICS.items()
+                }
+            for metric, histogram in histograms.items():
+                histogram.observe(values[metric])
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def summary(self):
+        """{view: {metric: {'count', 'sum', 'mean', 'buckets'}}} snapshot"""
+        with self.lock:
+            return {
+                view_name: {
+                    metric: {
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 2),
+                        'mean': round(histogram.sum / histogram.count, 2) if histogram.count else 0,
+                        'buckets': list(histogram.cumulative()),
+                    }
+                    for metric, histogram in histograms.items()
+                }
+                for view_name, histograms in sorted(self.views.items())
+            }
+
+
+request_metrics = RequestMetrics()
+
+
+def view_name(request):
+    """URL name of the matched route (namespaced, e.g. admin:index)"""
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name if match else None) or UNRESOLVED
+
+
+def server_timing(timings):
+    """Server-Timing header value for one request"""
+    return ', '.join([
+        f'db;dur={timings.db_time * 1000:.1f};desc="{timings.queries} queries"',
+        f'tpl;dur={timings.template_time * 1000:.1f}',
+        f'total;dur={timings.total_time * 1000:.1f}',
+    ])
+
+
+def prometheus_text(summary):
+    """Request histograms in Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        name = f'http_request_{metric}'
+        lines.append(f'# TYPE {name} histogram')
+        for view, metrics in summary.items():
+            data = metrics[metric]
+            for bound, count in data['buckets']:
+                lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{view="{view}"}} {data["sum"]}')
+            lines.append(f'{name}_count{{view="{view}"}} {data["count"]}')
+    return '\n'.join(lines) + '\n'
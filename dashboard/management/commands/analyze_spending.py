@@ -0,0 +1,64 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connections
+from dashboard import analytics
+from dashboard.cache import invalidate_dashboard
+
+class Command(BaseCommand):
+    help = 'Recompute the spend forecast, seasonality and unusual expenses shown on the dashboard (needs numpy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', type=str, help='Usernames to process (default: all users)')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes; each holds at most one user\'s history at a time')
+        parser.add_argument('--batch-size', type=int, default=50, help='Users per worker task')
+        parser.add_argument('--as-of', type=str, help='Analyse as of this date, YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        if not analytics.available():
+            raise CommandError('numpy is not installed; pip install numpy to compute spending insights.')
+        today = None
+        if options['as_of']:
+            try:
+                today = date.fromisoformat(options['as_of'])
+            except ValueError:
+                raise CommandError(f'Invalid date "{options["as_of"]}"; use YYYY-MM-DD.')
+
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        user_ids = list(users.values_list('pk', flat=True))
+        size = max(options['batch_size'], 1)
+        batches = [user_ids[start:start + size] for start in range(0, len(user_ids), size)]
+
+        started = time.monotonic()
+        done = rows = 0
+        parallel = options['workers'] > 1 and len(batches) > 1
+        if parallel and 'fork' not in multiprocessing.get_all_start_methods():
+            self.stdout.write(self.style.WARNING('--workers needs the fork start method; running in this process'))
+            parallel = False
+        if parallel:
+            # Children open their own connections; forked ones must not reuse ours
+            connections.close_all()
+            # Forked, not spawned (the macOS/Windows default): a spawned child
+            # would import the models before Django is set up
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], mp_context=multiprocessing.get_context('fork'),
+                initializer=analytics.init_worker,
+            ) as pool:
+                for users_done, rows_done in pool.map(analytics.refresh_batch, batches, [today] * len(batches)):
+                    done, rows = done + users_done, rows + rows_done
+                    self.stdout.write(f'{done}/{len(user_ids)} users')
+        else:
+            for batch in batches:
+                users_done, rows_done = analytics.refresh_batch(batch, today)
+                done, rows = done + users_done, rows + rows_done
+
+        for user_id in user_ids:
+            invalidate_dashboard(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Analysed {rows} expenses of {done} users in {time.monotonic() - started:.2f}s'
+        ))
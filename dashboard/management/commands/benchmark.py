@@ -0,0 +1,62 @@
+import json
+import platform
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+from django.utils import timezone
+from dashboard import benchmarks
+from transactions import synthetic
+
+class Command(BaseCommand):
+    help = 'Time the main views against a synthetic dataset and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=str, help=f'Seed this many rows first ({", ".join(synthetic.SCALES)} or a number)')
+        parser.add_argument('--username', type=str, default=f'{synthetic.USERNAME_PREFIX}0', help='User to benchmark')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario')
+        parser.add_argument('--only', nargs='*', help='Scenario names to run (default: all)')
+        parser.add_argument('--output', type=str, help='Write the JSON report to this file')
+        parser.add_argument('--budget', type=str, help='JSON file of {scenario: {metric: limit}} (see dashboard/benchmark_budget.json); fail if any is exceeded')
+
+    def handle(self, *args, **options):
+        if options['scale']:
+            synthetic.seed(options['scale'], stdout=self.stdout)
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist; pass --scale to seed one.')
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            results = benchmarks.run(user, options['iterations'], options['only'])
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'scale': options['scale'],
+            'user_rows': user.transactions.count(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': django.db.connection.vendor,
+            'results': results,
+        }
+
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<30} {metrics["queries"]:>3} queries  p50 {metrics["p50_ms"]:8.2f} ms  '
+                f'p95 {metrics["p95_ms"]:8.2f} ms  peak {metrics["peak_memory_kb"]:9.1f} KiB'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\nReport written to {options["output"]}'))
+
+        if options['budget']:
+            with open(options['budget']) as handle:
+                failures = benchmarks.check_budget(results, json.load(handle))
+            if failures:
+                for failure in failures:
+                    self.stdout.write(self.style.ERROR(failure))
+                raise CommandError(f'{len(failures)} benchmark budgets exceeded')
+            self.stdout.write(self.style.SUCCESS('All benchmark budgets met'))
@@ -0,0 +1,41 @@
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.utils import timezone
+from dashboard import analytics, benchmarks
+
+class Command(BaseCommand):
+    help = 'Time the vectorized spending analytics against per-row Python versions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic expenses to analyse')
+        parser.add_argument('--username', type=str, help='Analyse this user\'s history instead, timing the load too')
+
+    def handle(self, *args, **options):
+        if not analytics.available():
+            raise CommandError('numpy is not installed; pip install numpy to benchmark the analytics.')
+        today = timezone.localdate()
+
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["username"]}" does not exist.')
+            tracemalloc.start()
+            try:
+                history, elapsed = benchmarks.time_call(analytics.load_history, user, today)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.stdout.write(
+                f'{"load_history":<14} {len(history):>10} rows {elapsed * 1000:10.1f} ms  '
+                f'peak {peak / 1024 / 1024:7.1f} MiB'
+            )
+        else:
+            history = analytics.History.from_rows(*benchmarks.synthetic_history(options['rows']))
+
+        for name, (vectorized, naive) in benchmarks.compare_analytics(history, today).items():
+            self.stdout.write(
+                f'{name:<14} numpy {vectorized * 1000:10.1f} ms  python {naive * 1000:10.1f} ms  '
+                f'{naive / vectorized if vectorized else 0:7.1f}x'
+            )
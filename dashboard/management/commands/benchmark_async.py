@@ -0,0 +1,83 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+PAIRS = [
+    # (label, sync url name, async url name)
+    ('dashboard', 'dashboard', 'dashboard_async'),
+    ('transaction_list', 'transaction_list', 'transaction_list_async'),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def check_status(url, response):
+    # Timings of error pages would be meaningless
+    if response.status_code != 200:
+        raise CommandError(f'{url} returned HTTP {response.status_code}')
+
+
+class Command(BaseCommand):
+    help = 'Compare sync (WSGI) and async (ASGI) dashboard/list latency under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='User whose data is loaded')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per view and mode')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist; seed one with benchmark --scale.')
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for label, sync_name, async_name in PAIRS:
+                sync_times = self.run_sync(user, reverse(sync_name), options['requests'], options['concurrency'])
+                async_times = asyncio.run(
+                    self.run_async(user, reverse(async_name), options['requests'], options['concurrency'])
+                )
+                for mode, samples in (('sync/WSGI', sync_times), ('async/ASGI', async_times)):
+                    self.stdout.write(
+                        f'{label:<18} {mode:<11} p50 {percentile(samples, 50) * 1000:7.1f} ms  '
+                        f'p95 {percentile(samples, 95) * 1000:7.1f} ms  '
+                        f'mean {statistics.mean(samples) * 1000:7.1f} ms'
+                    )
+
+    def run_sync(self, user, url, total, concurrency):
+        client = Client()
+        client.force_login(user)
+
+        def timed(_):
+            started = time.perf_counter()
+            check_status(url, client.get(url))
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(timed, range(total)))
+
+    async def run_async(self, user, url, total, concurrency):
+        client = AsyncClient()
+        # force_login is synchronous; share the session cookie with the async client
+        sync_client = Client()
+        await asyncio.to_thread(sync_client.force_login, user)
+        client.cookies = sync_client.cookies
+        limit = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with limit:
+                started = time.perf_counter()
+                check_status(url, await client.get(url))
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(timed() for _ in range(total)))
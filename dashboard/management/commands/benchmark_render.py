@@ -0,0 +1,39 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+from dashboard import benchmarks
+from transactions import synthetic
+
+class Command(BaseCommand):
+    help = 'Time page rendering without, then with, the template/fragment caches, gzip and ETags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', type=str, default=f'{synthetic.USERNAME_PREFIX}0', help='User to benchmark')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per page and mode')
+        parser.add_argument('--output', type=str, help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist; seed one with benchmark --scale.')
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            results = benchmarks.compare_render(user, options['iterations'])
+
+        for name, modes in results.items():
+            for mode, metrics in modes.items():
+                line = (
+                    f'{name:<24} {mode:<8} template p50 {metrics["template_p50_ms"]:8.2f} ms  '
+                    f'total p50 {metrics["p50_ms"]:8.2f} ms  {metrics["bytes"]:>8} bytes'
+                    f'{" gzip" if metrics["gzip"] else ""}'
+                )
+                if 'not_modified_p50_ms' in metrics:
+                    line += f'  304 p50 {metrics["not_modified_p50_ms"]:.2f} ms'
+                self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\nResults written to {options["output"]}'))
@@ -0,0 +1,76 @@
+import json
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .instrumentation import RequestTimings, request_metrics, server_timing, view_name
+
+logger = logging.getLogger('dashboard.requests')
+
+
+class RequestTimingMiddleware:
+    """Record query count, DB time, template time and total time per URL name.
+
+    Each request gets a Server-Timing header, one JSON log line on the
+    dashboard.requests logger, and an observation in the in-process
+    histograms served by the request_metrics view. Template time is measured
+    around TemplateResponse rendering.
+
+    Under ASGI the middleware runs async, so async views are not pushed
+    through sync adaptation. Queries are counted through a context variable,
+    so those run in sync_to_async threads (sync views, ORM calls of async
+    views, gather_queries()) are counted too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.timing_header = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        request.timings = timings
+        with timings.capture_queries():
+            response = self.get_response(request)
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        request.timings = timings
+        with timings.capture_queries():
+            response = await self.get_response(request)
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        timings.finish()
+        name = view_name(request)
+        request_metrics.observe(name, timings)
+        if self.timing_header:
+            response['Server-Timing'] = server_timing(timings)
+        logger.info(json.dumps({
+            'view': name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user': getattr(getattr(request, 'user', None), 'pk', None),
+            **timings.as_dict(),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        if hasattr(request, 'timings'):
+            request.timings.start_template()
+            response.add_post_render_callback(lambda rendered: request.timings.end_template())
+        return response
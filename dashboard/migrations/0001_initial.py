@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:40
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendingInsights',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('forecast', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('seasonality', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('anomalies', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='spending_insights', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'spending insights',
+            },
+        ),
+    ]
@@ -1,3 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class SpendingInsights(models.Model):
+    """A user's spend forecast, category seasonality and unusual expenses.
+
+    Computed from the transaction history by analyze_spending (see
+    analytics.py) and read by the dashboard with one indexed lookup.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='spending_insights')
+    as_of = models.DateField()
+    computed_at = models.DateTimeField(auto_now=True)
+    rows = models.PositiveIntegerField(default=0)
+    forecast = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    seasonality = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    anomalies = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    
+    class Meta:
+        verbose_name_plural = 'spending insights'
+    
+    def __str__(self):
+        return f"{self.user.username} insights as of {self.as_of}"
@@ -0,0 +1,49 @@
+from django.db import transaction as db_transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from transactions.models import Budget, Category, Transaction
+from transactions.signals import transactions_bulk_changed
+from .cache import invalidate_dashboard
+from .instrumentation import install_query_counter
+
+
+def schedule_invalidation(user_id):
+    # Wait for commit so a concurrent reader cannot re-cache the old state
+    db_transaction.on_commit(lambda: invalidate_dashboard(user_id))
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_on_transaction_change(sender, instance, raw=False, **kwargs):
+    """Expire the owner's cached dashboard when a transaction changes"""
+    if not raw:
+        schedule_invalidation(instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_on_category_change(sender, instance, raw=False, **kwargs):
+    """Category names appear in the breakdown, so renames expire the cache too"""
+    if not raw:
+        schedule_invalidation(instance.user_id)
+
+
+@receiver(transactions_bulk_changed)
+def invalidate_on_bulk_change(sender, user_id, **kwargs):
+    """Expire the cached dashboard after an import or other bulk write"""
+    schedule_invalidation(user_id)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_on_budget_change(sender, instance, raw=False, **kwargs):
+    """Budget progress is part of the cached dashboard"""
+    if not raw:
+        schedule_invalidation(instance.user_id)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    """Let RequestTimingMiddleware count this connection's queries"""
+    install_query_counter(connection)
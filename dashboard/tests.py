@@ -1,3 +1,516 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from transactions.models import Budget, Category, Transaction
+from transactions.periods import shift_month
+from transactions.testing import QueryBudgetMixin
+from . import analytics, benchmarks
+from .cache import context_key, get_or_compute, get_stats, get_version
+from .instrumentation import request_metrics
+from .management.commands import benchmark_async
+from .middleware import RequestTimingMiddleware
+from .timeseries import get_time_series
+from .views import DashboardView
 
-# Create your tests here.
+
+@override_settings(DEBUG=False)
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.user = User.objects.create_user('timing', password='pw')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_counts_queries_without_debug(self):
+        with self.assertLogs('dashboard.requests', 'INFO') as logs:
+            response = self.client.get(reverse('transaction_list'))
+        self.assertIn('Server-Timing', response)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('"view": "transaction_list"', logs.output[0])
+
+        summary = request_metrics.summary()['transaction_list']
+        self.assertEqual(summary['queries']['count'], 1)
+        self.assertGreater(summary['template_ms']['sum'], 0)
+
+    async def test_async_requests_are_counted(self):
+        response = await self.async_client.get(reverse('transaction_list'))
+        # session, user and the list's own queries, run on the request's sync thread
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[3-9]\d* queries"')
+
+    def test_runs_async_under_asgi(self):
+        # The chain ASGI serves, built from settings.MIDDLEWARE: any sync-only
+        # layer would turn this middleware sync too
+        handler = ASGIHandler()
+        middleware = [
+            method.__self__ for method in handler._template_response_middleware
+            if isinstance(method.__self__, RequestTimingMiddleware)
+        ]
+        self.assertEqual(len(middleware), 1)
+        self.assertTrue(middleware[0].is_async)
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+        self.assertFalse(RequestTimingMiddleware(lambda request: HttpResponse()).is_async)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        url = reverse('dashboard_request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'http_request_queries_bucket{view="dashboard_request_metrics"')
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', password='secret')
+        self.food = Category.objects.get(user=self.user, name='Food')
+        self.compute = mock.Mock(side_effect=lambda: {'calls': self.compute.call_count})
+
+    def get(self):
+        return get_or_compute(self.user.pk, 2024, 3, self.compute)
+
+    def test_writes_bump_the_version_on_commit(self):
+        self.assertEqual(self.get(), {'calls': 1})
+        self.assertEqual(self.get(), {'calls': 1})
+        version = get_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, category=self.food, type='expense',
+                amount=Decimal('5.00'), date=date(2024, 3, 1),
+            )
+            # Not before the commit, so a concurrent reader cannot re-cache the old state
+            self.assertEqual(get_version(self.user.pk), version)
+        self.assertNotEqual(get_version(self.user.pk), version)
+        self.assertEqual(self.get(), {'calls': 2})
+        self.assertEqual(get_stats()['invalidations'], 1)
+
+    @override_settings(DASHBOARD_CACHE_POLL_INTERVAL=0.01)
+    def test_poller_uses_the_lock_holders_value(self):
+        key = context_key(self.user.pk, 2024, 3)
+        cache.add(f'{key}:lock', 1)
+        # The lock holder finishes while the poller sleeps
+        with mock.patch('dashboard.cache.time.sleep', side_effect=lambda _: cache.set(key, {'calls': 0})):
+            self.assertEqual(self.get(), {'calls': 0})
+        self.compute.assert_not_called()
+        self.assertEqual(get_stats()['lock_waits'], 1)
+
+    @override_settings(DASHBOARD_CACHE_LOCK_TIMEOUT=0.2, DASHBOARD_CACHE_POLL_INTERVAL=0.01)
+    def test_poller_computes_when_the_lock_holder_times_out(self):
+        key = context_key(self.user.pk, 2024, 3)
+        cache.add(f'{key}:lock', 1, timeout=None)
+        self.assertEqual(self.get(), {'calls': 1})
+        # Computed without caching over the stuck holder's key
+        self.assertIsNone(cache.get(key))
+        stats = get_stats()
+        self.assertEqual((stats['lock_waits'], stats['recomputes']), (1, 1))
+
+
+class DashboardApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('api', password='secret')
+        self.client.force_login(self.user)
+        self.today = timezone.localdate()
+        self.food = Category.objects.get(user=self.user, name='Food')
+        salary = Category.objects.get(user=self.user, name='Salary')
+        Transaction.objects.create(
+            user=self.user, category=salary, type='income', amount=Decimal('1000.00'), date=self.today,
+        )
+        for i in range(6):
+            Transaction.objects.create(
+                user=self.user, category=self.food, type='expense', amount=Decimal('50.00'),
+                date=self.today - timedelta(days=i), description=f'Meal {i}',
+            )
+
+    def get(self, name, **params):
+        return self.client.get(reverse(name), params)
+
+    def test_payloads(self):
+        month_expenses = float(Transaction.objects.filter(
+            user=self.user, type='expense', date__year=self.today.year, date__month=self.today.month,
+        ).count() * 50)
+        self.assertEqual(self.get('dashboard_api_summary').json(), {
+            'total_income': 1000.0,
+            'total_expenses': month_expenses,
+            'savings': 1000.0 - month_expenses,
+            'savings_percentage': round((1000.0 - month_expenses) / 10, 2),
+            'this_month_total': month_expenses,
+        })
+        self.assertEqual(self.get('dashboard_api_categories').json(), {
+            'category_expenses': {'Food': month_expenses},
+            'category_income': {'Salary': 1000.0},
+        })
+        recent = self.get('dashboard_api_recent').json()
+        # Newest first: the salary shares today's date with Meal 0 but was created first
+        self.assertEqual([row['description'] for row in recent], ['Meal 0', '', 'Meal 1', 'Meal 2', 'Meal 3'])
+        self.assertEqual(set(recent[0]), {'id', 'date', 'type', 'category', 'amount', 'currency', 'description'})
+        self.assertEqual(self.get('dashboard_api_budgets').json(), {'budgets': []})
+
+    def test_parameters_are_clamped(self):
+        for limit, count in (('2', 2), ('0', 1), ('1000', 7), ('many', 5)):
+            with self.subTest(limit=limit):
+                self.assertEqual(len(self.get('dashboard_api_recent', limit=limit).json()), count)
+        for params, count in (({'months': '3'}, 3), ({'months': '-4'}, 1), ({'months': '500'}, 120),
+                              ({'granularity': 'year', 'periods': '99'}, 50)):
+            with self.subTest(**params):
+                self.assertEqual(len(self.get('dashboard_api_trends', **params).json()['trends']), count)
+        self.assertEqual(self.get('dashboard_api_trends', granularity='week').status_code, 400)
+        self.assertEqual(self.get('dashboard_api_timeseries', granularity='fortnight').status_code, 400)
+        response = self.get('dashboard_api_timeseries', granularity='day', start='2024-03-10', end='2024-03-01')
+        self.assertEqual(response.status_code, 400)
+
+    def test_conditional_responses(self):
+        response = self.get('dashboard_api_summary')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        self.assertEqual(self.client.get(reverse('dashboard_api_summary'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Each endpoint and query string has its own ETag
+        self.assertNotEqual(self.get('dashboard_api_recent')['ETag'], etag)
+        self.assertNotEqual(self.get('dashboard_api_summary', limit=1)['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, category=self.food, type='expense', amount=Decimal('5.00'), date=self.today,
+            )
+        self.assertEqual(self.client.get(reverse('dashboard_api_summary'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_login_and_method(self):
+        self.assertEqual(self.client.post(reverse('dashboard_api_summary')).status_code, 405)
+        self.client.logout()
+        self.assertEqual(self.get('dashboard_api_summary').status_code, 302)
+
+
+class DashboardQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('budget', password='secret')
+        self.client.force_login(self.user)
+        today = timezone.now()
+        salary = Category.objects.get(user=self.user, name='Salary')
+        food = Category.objects.get(user=self.user, name='Food')
+        # Income and an expense in each of the last 24 months
+        for offset in range(24):
+            year, month = shift_month(today.year, today.month, -offset)
+            for category in (salary, food):
+                Transaction.objects.create(
+                    user=self.user, category=category, type=category.type,
+                    amount=Decimal('100.00'), date=date(year, month, 1),
+                )
+
+    def get_uncached(self, url):
+        # Measure the compute path, not a cache hit
+        cache.clear()
+        return self.client.get(url)
+
+    def test_dashboard_independent_of_trend_months(self):
+        url = reverse('dashboard')
+        counts = []
+        for months in (1, 24):
+            with mock.patch.object(DashboardView, 'trend_months', months):
+                self.get_uncached(url)
+                _, queries = self.count_queries(lambda: self.get_uncached(url))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        # session, user, data version, series, breakdown, budgets, budget
+        # alerts, insights, recent transactions
+        self.assertLessEqual(counts[1], 9)
+
+    def test_trends_api_independent_of_months(self):
+        url = reverse('dashboard_api_trends')
+        _, one = self.count_queries(lambda: self.get_uncached(f'{url}?months=1'))
+        _, many = self.count_queries(lambda: self.get_uncached(f'{url}?months=24'))
+        self.assertEqual(len(one), len(many))
+
+
+class BudgetDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('budgeter', password='secret')
+        self.client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food')
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('100.00'))
+        Transaction.objects.create(
+            user=self.user, category=food, type='expense',
+            amount=Decimal('90.00'), date=timezone.localdate(),
+        )
+
+    def test_progress_and_alerts(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual([b['percent'] for b in response.context['budgets']], [90.0])
+        self.assertEqual([a['threshold'] for a in response.context['budget_alerts']], [80])
+
+        self.client.post(reverse('dismiss_budget_alerts'))
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['budget_alerts'], [])
+        response = self.client.get(reverse('dashboard_api_budgets'))
+        self.assertEqual(response.json()['budgets'][0]['spent'], 90.0)
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    # gather_queries runs on other threads and connections, which only see
+    # committed rows, hence TransactionTestCase
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('asyncer', password='secret')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food')
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('100.00'))
+        Transaction.objects.create(
+            user=self.user, category=food, type='expense',
+            amount=Decimal('90.00'), date=timezone.localdate(), description='Feast',
+        )
+
+    def test_budgets_and_alerts(self):
+        response = self.client.get(reverse('dashboard_async'))
+        self.assertEqual([b['percent'] for b in response.context['budgets']], [90.0])
+        self.assertEqual([a['threshold'] for a in response.context['budget_alerts']], [80])
+
+    def test_matches_the_sync_dashboard(self):
+        if analytics.available():
+            analytics.refresh_insights(self.user, timezone.localdate())
+        sync = self.client.get(reverse('dashboard')).context
+        async_ = self.client.get(reverse('dashboard_async')).context
+        for key in (
+            'total_income', 'total_expenses', 'savings', 'savings_percentage', 'this_month_total',
+            'category_expenses', 'category_income', 'monthly_trends', 'trend_months',
+            'budgets', 'budget_alerts', 'insights', 'data_version',
+        ):
+            with self.subTest(key=key):
+                self.assertEqual(async_[key], sync[key])
+        self.assertEqual(
+            [txn.pk for txn in async_['recent_transactions']], [txn.pk for txn in sync['recent_transactions']]
+        )
+
+    async def test_async_view_queries_are_counted(self):
+        response = await self.async_client.get(reverse('dashboard_async'))
+        # Session, user and recent transactions, plus the gather_queries() threads
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[3-9]\d* queries"')
+
+    def test_anonymous_users_are_redirected(self):
+        self.client.logout()
+        response = self.client.get(reverse('dashboard_async'))
+        self.assertRedirects(response, f'{reverse("login")}?next={reverse("dashboard_async")}', fetch_redirect_response=False)
+
+    @skipUnless(analytics.available(), 'needs numpy')
+    def test_insights(self):
+        analytics.refresh_insights(self.user, timezone.localdate())
+        response = self.client.get(reverse('dashboard_async'))
+        self.assertEqual(response.context['insights']['rows'], 1)
+        self.assertContains(response, 'Spending Insights')
+
+
+class TimeSeriesTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('series', password='secret')
+        salary = Category.objects.get(user=self.user, name='Salary')
+        food = Category.objects.get(user=self.user, name='Food')
+        for day, category, amount in (
+            (date(2023, 12, 15), salary, '500.00'),   # before the range: opening balance
+            (date(2024, 1, 31), food, '40.00'),
+            (date(2024, 2, 1), food, '60.00'),
+            (date(2024, 3, 10), salary, '1000.00'),
+        ):
+            Transaction.objects.create(
+                user=self.user, category=category, type=category.type,
+                amount=Decimal(amount), date=day,
+            )
+
+    def test_monthly_buckets_are_calendar_months_zero_filled(self):
+        series = get_time_series(self.user, date(2024, 1, 1), date(2024, 5, 1), 'month', window=2)
+        self.assertEqual(
+            [(item['period'], item['net'], item['balance']) for item in series],
+            [
+                (date(2024, 1, 1), Decimal('-40.00'), Decimal('460.00')),
+                (date(2024, 2, 1), Decimal('-60.00'), Decimal('400.00')),
+                (date(2024, 3, 1), Decimal('1000.00'), Decimal('1400.00')),
+                (date(2024, 4, 1), Decimal('0'), Decimal('1400.00')),
+            ],
+        )
+        self.assertEqual([item['expenses_avg'] for item in series], [None, 50, 30, 0])
+
+    def test_weekly_buckets_start_on_monday(self):
+        series = get_time_series(self.user, date(2024, 1, 31), date(2024, 2, 8), 'week')
+        self.assertEqual([item['period'] for item in series], [date(2024, 1, 29), date(2024, 2, 5)])
+        self.assertEqual(series[0]['expenses'], Decimal('100.00'))
+
+    def test_query_count_independent_of_span(self):
+        _, short = self.count_queries(
+            lambda: get_time_series(self.user, date(2024, 1, 1), date(2024, 2, 1), 'week')
+        )
+        _, long = self.count_queries(
+            lambda: get_time_series(self.user, date(2015, 1, 1), date(2025, 1, 1), 'week')
+        )
+        self.assertEqual(len(short), len(long))
+        self.assertEqual(len(long), 2)
+
+
+@skipUnless(analytics.available(), 'needs numpy')
+class AnalyticsTests(QueryBudgetMixin, TestCase):
+    def test_vectorized_matches_per_row_versions(self):
+        today = date.today()
+        columns = benchmarks.synthetic_history(5000, seed=1)
+        history = analytics.History.from_rows(*columns)
+        rows = list(zip(*(column.tolist() for column in columns)))
+
+        forecast = analytics.forecast_month(history, today)
+        spent, projected = benchmarks.naive_forecast(rows, today, analytics.FORECAST_WINDOW_DAYS)
+        self.assertEqual(forecast['spent'], analytics.cents_to_decimal(spent))
+        self.assertAlmostEqual(float(forecast['projected']), projected / 100, places=2)
+
+        expected = benchmarks.naive_seasonality(rows, today)
+        for category_id, ratios in analytics.category_seasonality(history, today).items():
+            for ratio, naive in zip(ratios, expected[category_id]):
+                self.assertAlmostEqual(ratio, naive, delta=0.011)
+
+        z, z_flags, iqr_flags = analytics.flag_anomalies(history)
+        flagged = {
+            int(pk): (bool(by_z), bool(by_iqr))
+            for pk, by_z, by_iqr in zip(history.pks, z_flags, iqr_flags) if by_z or by_iqr
+        }
+        self.assertTrue(flagged)
+        self.assertEqual(flagged, benchmarks.naive_anomalies(
+            rows, analytics.Z_THRESHOLD, analytics.IQR_FACTOR, analytics.MIN_CATEGORY_ROWS,
+        ))
+
+    def test_insights_reach_the_dashboard(self):
+        cache.clear()
+        user = User.objects.create_user('analyst', password='secret')
+        food = Category.objects.get(user=user, name='Food')
+        today = timezone.localdate()
+        for offset in range(1, 13):
+            Transaction.objects.create(
+                user=user, category=food, type='expense',
+                amount=Decimal('100.00') + offset, date=today - timedelta(days=offset * 20),
+            )
+        outlier = Transaction.objects.create(
+            user=user, category=food, type='expense', amount=Decimal('5000.00'),
+            date=today, description='Wedding catering',
+        )
+
+        with self.assertMaxQueries(1):
+            history = analytics.load_history(user, today)
+        self.assertEqual(len(history), 13)
+        self.assertEqual(history.cents[-1], 500000)
+
+        analytics.refresh_insights(user, today)
+        self.client.force_login(user)
+        insights = self.client.get(reverse('dashboard')).context['insights']
+        self.assertEqual(insights['rows'], 13)
+        self.assertEqual(insights['forecast']['spent'], '5000.00')
+        self.assertEqual([(a['id'], a['description']) for a in insights['anomalies']], [(outlier.pk, 'Wedding catering')])
+        self.assertEqual(insights['anomalies'][0]['reasons'], ['z-score', 'IQR'])
+
+
+class BenchmarkTests(TestCase):
+    def test_admin_scenario_leaves_no_user_behind(self):
+        user = User.objects.create_user('benchmarked', password='secret')
+        users = set(User.objects.values_list('pk', flat=True))
+        results = benchmarks.run(user, iterations=1, only=[benchmarks.ADMIN_SCENARIO, 'get_categories'])
+        self.assertEqual(set(results), {benchmarks.ADMIN_SCENARIO, 'get_categories'})
+        self.assertEqual(set(User.objects.values_list('pk', flat=True)), users)
+        self.assertNotIn(benchmarks.ADMIN_SCENARIO, benchmarks.run(user, iterations=1, only=['get_categories']))
+
+    def test_async_benchmark_fails_loudly(self):
+        with self.assertRaisesMessage(CommandError, 'User "nobody" does not exist'):
+            call_command('benchmark_async', 'nobody', stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, '/missing/ returned HTTP 404'):
+            benchmark_async.check_status('/missing/', HttpResponse(status=404))
+
+
+class RenderCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.user = User.objects.create_user('renderer', password='secret')
+        self.client.force_login(self.user)
+        self.transaction = Transaction.objects.create(
+            user=self.user, category=Category.objects.get(user=self.user, name='Food'),
+            type='expense', amount=Decimal('12.00'), date=timezone.localdate(), description='Lunch',
+        )
+
+    def test_unchanged_pages_revalidate(self):
+        for name in ('dashboard', 'transaction_list'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag_and_fragments(self):
+        for name in ('dashboard', 'transaction_list'):
+            self.client.get(reverse(name))
+        etag = self.client.get(reverse('transaction_list'))['ETag']
+
+        # Invalidation runs on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transaction.description = 'Dinner'
+            self.transaction.save()
+        for name in ('dashboard', 'transaction_list'):
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            self.assertContains(response, 'Dinner')
+            self.assertNotContains(response, 'Lunch')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transaction.delete()
+        response = self.client.get(reverse('transaction_list'))
+        self.assertNotContains(response, 'Dinner')
+
+    @skipUnless(settings.RENDER_CACHE, 'RENDER_CACHE is off')
+    def test_recent_transactions_query_skipped_on_fragment_hit(self):
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Lunch')
+        self.assertFalse(any('FROM "transactions_transaction"' in q['sql'] for q in captured))
+
+    def test_list_fragments_keyed_on_filters(self):
+        url = reverse('transaction_list')
+
+        def fragment_keys(*queries):
+            return {self.client.get(url, params).context['fragment_key'] for params in queries}
+
+        # Parameters the list ignores do not mint new cache entries
+        self.assertEqual(len(fragment_keys({}, {'utm_source': 'mail'}, {'page': 1, 'ref': 'x' * 500})), 1)
+        self.assertEqual(len(fragment_keys(
+            {'month': 3, 'year': 2024}, {'start': '2024-03-01', 'end': '2024-03-31', 'ref': 'mail'},
+        )), 1)
+        self.assertEqual(len(fragment_keys({}, {'type': 'expense'}, {'q': 'lunch'})), 3)
+
+    def test_messages_disable_revalidation(self):
+        response = self.client.get(reverse('transaction_list'))
+        etag = response['ETag']
+        # The edit's flash message is rendered once, so that page must not be a 304
+        self.client.post(reverse('edit_transaction', args=[self.transaction.pk]), {
+            'type': 'expense', 'category': self.transaction.category_id, 'amount': '12.00',
+            'description': 'Lunch', 'date': self.transaction.date.isoformat(),
+        })
+        response = self.client.get(reverse('transaction_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Transaction updated successfully')
+
+    def test_gzip(self):
+        response = self.client.get(reverse('transaction_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_render_benchmark_modes(self):
+        results = benchmarks.compare_render(self.user, iterations=1)
+        self.assertEqual(set(results), set(benchmarks.RENDER_SCENARIOS))
+        baseline, cached = results['transaction_list_first']['baseline'], results['transaction_list_first']['cached']
+        self.assertFalse(baseline['gzip'])
+        self.assertNotIn('not_modified_p50_ms', baseline)
+        self.assertTrue(cached['gzip'])
+        self.assertIn('not_modified_p50_ms', cached)
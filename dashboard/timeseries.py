@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from transactions.models import Transaction
+from transactions.periods import date_range_q, shift_month
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+# Ten years of days, and then some
+MAX_BUCKETS = 4000
+ZERO = Decimal('0')
+
+
+class TooManyBuckets(ValueError):
+    pass
+
+
+def bucket_start(day, granularity):
+    """The first day of the bucket containing day, matching the database Trunc*"""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def shift_bucket(start, granularity, offset):
+    """The bucket offset buckets away from the one starting at start"""
+    if granularity == 'day':
+        return start + timedelta(days=offset)
+    if granularity == 'week':
+        return start + timedelta(weeks=offset)
+    if granularity == 'month':
+        return date(*shift_month(start.year, start.month, offset), 1)
+    return date(start.year + offset, 1, 1)
+
+
+def last_buckets(today, granularity, count):
+    """[start, end) range of the count buckets ending with the one containing today"""
+    end = shift_bucket(bucket_start(today, granularity), granularity, 1)
+    return shift_bucket(end, granularity, -count), end
+
+
+def iter_buckets(start, end, granularity):
+    """Bucket start dates covering the half-open range [start, end)"""
+    current = bucket_start(start, granularity)
+    while current < end:
+        yield current
+        current = shift_bucket(current, granularity, 1)
+
+
+def count_buckets(start, end, granularity):
+    if granularity == 'day':
+        return (end - start).days
+    if granularity == 'week':
+        return -(-(end - bucket_start(start, 'week')).days // 7)
+    last = end - timedelta(days=1)
+    if granularity == 'month':
+        return (last.year - start.year) * 12 + last.month - start.month + 1
+    return last.year - start.year + 1
+
+
+def moving_averages(values, window):
+    """Trailing mean over window values; None until the window is full"""
+    averages = []
+    total = ZERO
+    for i, value in enumerate(values):
+        total += value
+        if i >= window:
+            total -= values[i - window]
+        averages.append(total / window if i >= window - 1 else None)
+    return averages
+
+
+def opening_balance(user, start):
+    """Net of every transaction before start"""
+    totals = Transaction.objects.filter(user=user, date__lt=start).aggregate(
+        income=Sum('base_amount', filter=Q(type='income')),
+        expenses=Sum('base_amount', filter=Q(type='expense')),
+    )
+    return (totals['income'] or ZERO) - (totals['expenses'] or ZERO)
+
+
+def get_time_series(user, start, end, granularity='month', window=3, include_opening=True):
+    """Income, expenses, net, running balance and moving averages per bucket.
+
+    Covers the half-open range [start, end), with start moved back to the
+    beginning of its bucket so the first bucket is complete. One grouped
+    Trunc* query over the (user, date) index serves any number of buckets;
+    buckets without transactions are filled with zeros here. The balance starts from the net
+    of all earlier transactions unless include_opening is False (one more
+    aggregate query).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unknown granularity "{granularity}"')
+    start = bucket_start(start, granularity)
+    if count_buckets(start, end, granularity) > MAX_BUCKETS:
+        raise TooManyBuckets(f'More than {MAX_BUCKETS} {granularity} buckets requested')
+
+    rows = Transaction.objects.filter(
+        date_range_q(start, end),
+        user=user,
+    ).annotate(
+        bucket=GRANULARITIES[granularity]('date'),
+    ).values('bucket').annotate(
+        income=Sum('base_amount', filter=Q(type='income')),
+        expenses=Sum('base_amount', filter=Q(type='expense')),
+    ).order_by()
+    totals = {row['bucket']: row for row in rows}
+
+    balance = opening_balance(user, start) if include_opening else ZERO
+    series = []
+    for bucket in iter_buckets(start, end, granularity):
+        row = totals.get(bucket, {})
+        income = row.get('income') or ZERO
+        expenses = row.get('expenses') or ZERO
+        balance += income - expenses
+        series.append({
+            'period': bucket,
+            'income': income,
+            'expenses': expenses,
+            'net': income - expenses,
+            'balance': balance,
+        })
+
+    for key in ('income', 'expenses', 'net'):
+        averages = moving_averages([item[key] for item in series], max(window, 1))
+        for item, average in zip(series, averages):
+            item[f'{key}_avg'] = average
+    return series
@@ -1,7 +1,17 @@
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
+    path('async/', async_views.dashboard_async, name='dashboard_async'),
+    path('budgets/alerts/dismiss/', views.dismiss_budget_alerts, name='dismiss_budget_alerts'),
+    path('metrics/cache/', views.cache_metrics, name='dashboard_cache_metrics'),
+    path('metrics/requests/', views.request_metrics_view, name='dashboard_request_metrics'),
+    path('api/v1/dashboard/summary/', api.summary, name='dashboard_api_summary'),
+    path('api/v1/dashboard/categories/', api.categories, name='dashboard_api_categories'),
+    path('api/v1/dashboard/budgets/', api.budgets, name='dashboard_api_budgets'),
+    path('api/v1/dashboard/trends/', api.trends, name='dashboard_api_trends'),
+    path('api/v1/dashboard/timeseries/', api.timeseries, name='dashboard_api_timeseries'),
+    path('api/v1/dashboard/recent/', api.recent, name='dashboard_api_recent'),
 ]
 
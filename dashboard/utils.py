@@ -0,0 +1,126 @@
+from calendar import month_name
+from datetime import date
+from django.db.models import Sum, Q
+from transactions.budgets import budget_progress, unread_alerts
+from transactions.models import MonthlySummary
+from transactions.periods import shift_month
+from .analytics import stored_insights
+
+
+def month_window_q(start_year, start_month, end_year, end_month):
+    """Q matching rollup rows from start to end month, both inclusive"""
+    after_start = Q(year__gt=start_year) | Q(year=start_year, month__gte=start_month)
+    before_end = Q(year__lt=end_year) | Q(year=end_year, month__lte=end_month)
+    return after_start & before_end
+
+
+def get_monthly_series(user, year, month, months_count=6):
+    """Income/expense totals for the N calendar months ending at year/month.
+
+    Reads the MonthlySummary rollup with one grouped query, so the cost does
+    not depend on months_count or on the size of the user's history.
+    """
+    start_year, start_month = shift_month(year, month, -(months_count - 1))
+
+    rows = MonthlySummary.objects.filter(
+        month_window_q(start_year, start_month, year, month),
+        user=user,
+    ).values('year', 'month').annotate(
+        income=Sum('total', filter=Q(type='income')),
+        expenses=Sum('total', filter=Q(type='expense')),
+    ).order_by()
+
+    totals = {(row['year'], row['month']): row for row in rows}
+
+    series = []
+    for i in range(months_count):
+        bucket_year, bucket_month = shift_month(start_year, start_month, i)
+        row = totals.get((bucket_year, bucket_month), {})
+        series.append({
+            'year': bucket_year,
+            'month': bucket_month,
+            'income': row.get('income') or 0,
+            'expenses': row.get('expenses') or 0,
+        })
+    return series
+
+
+def get_yearly_series(user, year, years_count=5):
+    """Income/expense totals for the N calendar years ending at year, from the rollup"""
+    start_year = year - years_count + 1
+    rows = MonthlySummary.objects.filter(
+        user=user,
+        year__gte=start_year,
+        year__lte=year,
+    ).values('year').annotate(
+        income=Sum('total', filter=Q(type='income')),
+        expenses=Sum('total', filter=Q(type='expense')),
+    ).order_by()
+
+    totals = {row['year']: row for row in rows}
+    return [
+        {
+            'year': bucket_year,
+            'month': None,
+            'income': totals.get(bucket_year, {}).get('income') or 0,
+            'expenses': totals.get(bucket_year, {}).get('expenses') or 0,
+        }
+        for bucket_year in range(start_year, year + 1)
+    ]
+
+
+def get_category_breakdown(user, year, month):
+    """Per-category totals for both transaction types in a single query"""
+    rows = MonthlySummary.objects.filter(
+        user=user,
+        year=year,
+        month=month,
+    ).values('type', 'category__name').annotate(
+        total=Sum('total')
+    ).order_by('-total')
+
+    breakdown = {'income': {}, 'expense': {}}
+    for row in rows:
+        breakdown[row['type']][row['category__name']] = float(row['total'])
+    return breakdown
+
+
+def build_monthly_totals(income, expenses):
+    """Income, expenses, savings and savings rate for one month"""
+    savings = income - expenses
+    return {
+        'total_income': income,
+        'total_expenses': expenses,
+        'savings': savings,
+        'savings_percentage': round((savings / income * 100) if income > 0 else 0, 2),
+    }
+
+
+def build_trends(series):
+    """Chart-ready trend rows from get_monthly_series output"""
+    return [
+        {
+            'month': f"{month_name[item['month']][:3]} {item['year']}" if item['month'] else str(item['year']),
+            'income': float(item['income']),
+            'expenses': float(item['expenses']),
+            'savings': float(item['income'] - item['expenses']),
+        }
+        for item in series
+    ]
+
+
+def get_dashboard_aggregates(user, year, month, months_count=6):
+    """Totals, category breakdowns, trends, budgets and stored spending
+    insights for the dashboard in five queries"""
+    series = get_monthly_series(user, year, month, max(months_count, 1))
+    current = series[-1]
+    breakdown = get_category_breakdown(user, year, month)
+
+    data = build_monthly_totals(current['income'], current['expenses'])
+    data['category_expenses'] = breakdown['expense']
+    data['category_income'] = breakdown['income']
+    data['monthly_trends'] = build_trends(series[-months_count:] if months_count > 0 else [])
+    data['budgets'] = budget_progress(user, date(year, month, 1))
+    data['budget_alerts'] = unread_alerts(user)
+    data['insights'] = stored_insights(user)
+    return data
@@ -1,17 +1,24 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
-from django.db.models import Sum, Q
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_POST
 from django.utils import timezone
-from transactions.models import Transaction
-import json
-from datetime import datetime, timedelta
-from calendar import month_name
+from transactions.models import BudgetAlert, Transaction
+from transactions.routers import replica_reads
+from .cache import data_version, get_or_compute, get_stats, invalidate_dashboard, page_etag
+from .instrumentation import prometheus_text, request_metrics
+from .utils import get_dashboard_aggregates
 
+@replica_reads
 @method_decorator(login_required, name='dispatch')
+@method_decorator(condition(etag_func=page_etag), name='dispatch')
 class DashboardView(TemplateView):
     template_name = 'dashboard/index.html'
+    trend_months = 6
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -22,106 +29,52 @@ class DashboardView(TemplateView):
         current_year = now.year
         current_month = now.month
         
-        # Get monthly totals
-        monthly_data = self.get_monthly_totals(user, current_year, current_month)
-        context.update(monthly_data)
+        # Totals and category breakdown (cached per user/month); the charts
+        # fetch their data from the JSON API after the page renders
+        context.update(get_or_compute(
+            user.pk, current_year, current_month,
+            lambda: get_dashboard_aggregates(user, current_year, current_month, self.trend_months)
+        ))
+        context['trend_months'] = self.trend_months
         
-        # Get category breakdown
-        context['category_expenses'] = self.get_category_totals(
-            user, current_year, current_month, 'expense'
-        )
-        context['category_income'] = self.get_category_totals(
-            user, current_year, current_month, 'income'
-        )
-        
-        # Get monthly trends (last 6 months)
-        context['monthly_trends'] = self.get_monthly_trends(user, 6)
-        
-        # Get recent transactions (last 5)
+        # Get recent transactions (last 5); lazy, so not queried at all when
+        # the rendered block is served from the fragment cache
         context['recent_transactions'] = Transaction.objects.filter(
             user=user
         ).select_related('category').order_by('-date', '-created_at')[:5]
+        context['data_version'] = data_version(user.pk)
+        context['fragment_cache_timeout'] = settings.FRAGMENT_CACHE_TIMEOUT
         
-        # Get this month's total (already calculated in monthly_data)
-        context['this_month_total'] = monthly_data['total_expenses']
-        
-        # Convert to JSON for charts
-        context['chart_data'] = json.dumps({
-            'monthly_trends': context['monthly_trends'],
-            'category_expenses': context['category_expenses'],
-            'category_income': context['category_income'],
-        })
+        # Get this month's total (already calculated in the aggregates)
+        context['this_month_total'] = context['total_expenses']
         
         return context
-    
-    def get_monthly_totals(self, user, year, month):
-        """Calculate monthly income, expenses, and savings"""
-        income = Transaction.objects.filter(
-            user=user,
-            type='income',
-            date__year=year,
-            date__month=month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        expenses = Transaction.objects.filter(
-            user=user,
-            type='expense',
-            date__year=year,
-            date__month=month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        savings = income - expenses
-        
-        return {
-            'total_income': income,
-            'total_expenses': expenses,
-            'savings': savings,
-            'savings_percentage': round((savings / income * 100) if income > 0 else 0, 2),
-        }
-    
-    def get_category_totals(self, user, year, month, transaction_type):
-        """Get totals grouped by category"""
-        totals = Transaction.objects.filter(
-            user=user,
-            type=transaction_type,
-            date__year=year,
-            date__month=month
-        ).values('category__name').annotate(
-            total=Sum('amount')
-        ).order_by('-total')
-        
-        return {item['category__name']: float(item['total']) for item in totals}
-    
-    def get_monthly_trends(self, user, months_count=6):
-        """Get trends for last N months"""
-        trends = []
-        now = timezone.now()
-        
-        for i in range(months_count - 1, -1, -1):
-            # Calculate target month
-            target_date = now - timedelta(days=30 * i)
-            year = target_date.year
-            month = target_date.month
-            
-            income = Transaction.objects.filter(
-                user=user,
-                type='income',
-                date__year=year,
-                date__month=month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            expenses = Transaction.objects.filter(
-                user=user,
-                type='expense',
-                date__year=year,
-                date__month=month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            trends.append({
-                'month': f"{month_name[month][:3]} {year}",
-                'income': float(income),
-                'expenses': float(expenses),
-                'savings': float(income - expenses),
-            })
-        
-        return trends
+
+
+@login_required
+@require_POST
+def dismiss_budget_alerts(request):
+    """Mark the user's budget alerts as read"""
+    BudgetAlert.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    invalidate_dashboard(request.user.pk)
+    return redirect('dashboard')
+
+
+@staff_member_required
+def cache_metrics(request):
+    """Dashboard cache counters in Prometheus text format"""
+    lines = []
+    for name, value in get_stats().items():
+        metric = f'dashboard_cache_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
+
+
+@staff_member_required
+def request_metrics_view(request):
+    """Per-view query count and timing histograms for this worker process"""
+    summary = request_metrics.summary()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(summary)
+    return HttpResponse(prometheus_text(summary), content_type='text/plain; version=0.0.4')
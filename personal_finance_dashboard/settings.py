@@ -48,22 +48,41 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its query count and timings include the other middleware
+    'dashboard.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before everything that reads or writes the response body
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # After GZip, so ETags are computed on the uncompressed body; views with
+    # their own ETag (dashboard, transaction list) skip rendering on a match
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'transactions.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'personal_finance_dashboard.urls'
 
+# Rendering performance mode: compiled templates are kept in memory by the
+# cached loader, and the dashboard's recent transactions and the transaction
+# list rows are cached per user as rendered HTML (see FRAGMENT_CACHE_TIMEOUT).
+# RENDER_CACHE=False turns both off, e.g. while comparing render times with
+# the benchmark_render command.
+RENDER_CACHE = os.getenv('RENDER_CACHE', 'True') == 'True'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -71,6 +90,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # The cached loader reloads changed templates under runserver
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)] if RENDER_CACHE else TEMPLATE_LOADERS,
         },
     },
 ]
@@ -92,6 +113,66 @@ DATABASES = {
     }
 }
 
+# Reads of views marked with transactions.routers.replica_reads go to the
+# 'replica' alias when one is configured (see settings_production.py)
+DATABASE_ROUTERS = ['transactions.routers.ReadReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. Redis or Memcached) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'personal-finance-dashboard'),
+    },
+    # Rendered template fragments; keys carry the user's data version, so
+    # stale fragments are never read and simply age out. Give them their own
+    # FRAGMENT_CACHE_BACKEND/FRAGMENT_CACHE_LOCATION (e.g. a separate Redis
+    # database) so they cannot evict the dashboard data under memory pressure
+    'fragments': {
+        'BACKEND': (
+            os.getenv('FRAGMENT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+            if RENDER_CACHE else 'django.core.cache.backends.dummy.DummyCache'
+        ),
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', 'personal-finance-fragments'),
+        'KEY_PREFIX': 'fragments',
+    },
+}
+
+# Dashboard context cache: entries are invalidated on writes, the timeout is a safety net
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60 * 60 * 24))
+# Seconds a rendered fragment is kept; a write makes it unreachable sooner
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))
+DASHBOARD_CACHE_LOCK_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_LOCK_TIMEOUT', 10))
+
+# Transaction list paging: 'offset' (numbered pages) or 'cursor' (keyset, no COUNT)
+TRANSACTION_LIST_PAGINATION = os.getenv('TRANSACTION_LIST_PAGINATION', 'offset')
+
+
+# Request instrumentation: Server-Timing headers, a JSON log line per request
+# on the dashboard.requests logger (logged at INFO, so shown only with
+# REQUEST_LOG_LEVEL=INFO) and histograms at /metrics/requests/
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True') == 'True'
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', 'True') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'dashboard.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
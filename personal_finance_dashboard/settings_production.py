@@ -0,0 +1,55 @@
+"""
+Production settings: persistent, health-checked database connections,
+optional connection pooling and an optional read replica.
+
+Use with DJANGO_SETTINGS_MODULE=personal_finance_dashboard.settings_production.
+"""
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, os
+
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
+
+
+# Database connections
+# https://docs.djangoproject.com/en/4.2/ref/databases/#persistent-connections
+
+# Keep connections open across requests, and check them before reuse so a
+# connection dropped by the server or a failover is replaced transparently
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    'CONN_HEALTH_CHECKS': True,
+})
+
+# DB_POOL=psycopg: psycopg 3's built-in pool (Django 5.1+), which replaces
+# persistent connections. DB_POOL=pgbouncer: an external transaction-mode
+# pooler, which cannot hold server-side cursors open between transactions.
+DB_POOL = os.getenv('DB_POOL', '')
+if DB_POOL == 'psycopg':
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured('DB_POOL=psycopg needs Django 5.1 or later; use DB_POOL=pgbouncer instead')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
+elif DB_POOL == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DB_POOL:
+    raise ImproperlyConfigured(f'Unknown DB_POOL "{DB_POOL}"; expected psycopg or pgbouncer')
+
+# Read replica: same database, credentials and pooling, another host
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Seconds a client reads from the primary after a write, to cover replication lag
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
@@ -0,0 +1,27 @@
+"""
+Test settings: SQLite, with a second alias standing in for the read replica.
+
+Use with DJANGO_SETTINGS_MODULE=personal_finance_dashboard.settings_test.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # A second connection to the same test database, like a replica of the
+    # primary. TestCase data is uncommitted and so invisible to it; tests
+    # that read through it use TransactionTestCase.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# Routing to the replica is off unless a test turns it on with
+# override_settings(DATABASE_REPLICA_ALIAS='replica')
+DATABASE_REPLICA_ALIAS = None
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Category, Transaction
+from django.utils import timezone
+from .models import (
+    BalanceSnapshot, Budget, BudgetAlert, Category, FXRate, MonthlySummary, RecurringTransaction, Transaction,
+)
+from .pagination import EstimatedCountPaginator
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -9,7 +13,70 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ['type', 'category', 'amount', 'date', 'user', 'created_at']
-    list_filter = ['type', 'date', 'created_at']
-    search_fields = ['description', 'category__name', 'user__username']
+    list_display = ['type', 'category', 'amount', 'currency', 'date', 'user', 'created_at']
+    list_select_related = ['category', 'user']
+    # The date filter uses range predicates; date_hierarchy would run
+    # distinct-date queries over the whole table
+    list_filter = ['type', 'currency', 'date', 'created_at']
+    # Exact username (unique index), category name (small table) and a
+    # description prefix (UPPER(description) text_pattern_ops index on PostgreSQL)
+    search_fields = ['user__username__exact', 'category__name__iexact', 'description__istartswith']
+    autocomplete_fields = ['user', 'category']
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N total"
+    show_full_result_count = False
+
+@admin.register(MonthlySummary)
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'year', 'month', 'type', 'category', 'total', 'count']
+    list_select_related = ['user', 'category']
+    list_filter = ['type', 'year']
+    search_fields = ['user__username', 'category__name']
+    readonly_fields = ['user', 'year', 'month', 'type', 'category', 'total', 'count']
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'as_of', 'balance']
+    list_select_related = ['user']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'as_of', 'balance']
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'type', 'category', 'amount', 'currency', 'frequency', 'interval', 'next_occurrence', 'active']
+    list_select_related = ['user', 'category']
+    list_filter = ['active', 'frequency', 'type']
+    search_fields = ['user__username__exact', 'description__istartswith']
+    autocomplete_fields = ['user', 'category']
+    readonly_fields = ['next_occurrence']
+    schedule_fields = {'frequency', 'interval', 'day_of_month', 'start_date', 'end_date'}
+
+    def save_model(self, request, obj, form, change):
+        # A new rule applies from the first occurrence not yet materialized
+        # (or today, for a schedule that had ended)
+        if change and self.schedule_fields & set(form.changed_data):
+            obj.next_occurrence = obj.first_occurrence(obj.next_occurrence or timezone.localdate())
+        super().save_model(request, obj, form, change)
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ['user', 'category', 'period', 'amount', 'updated_at']
+    list_select_related = ['user', 'category']
+    list_filter = ['period']
+    search_fields = ['user__username__exact', 'category__name__iexact']
+    autocomplete_fields = ['user', 'category']
+
+@admin.register(BudgetAlert)
+class BudgetAlertAdmin(admin.ModelAdmin):
+    list_display = ['user', 'budget', 'period_start', 'threshold', 'spent', 'limit', 'is_read', 'created_at']
+    list_select_related = ['user', 'budget__category']
+    list_filter = ['threshold', 'is_read']
+    search_fields = ['user__username__exact']
+    readonly_fields = ['user', 'budget', 'period_start', 'threshold', 'spent', 'limit', 'created_at']
+
+@admin.register(FXRate)
+class FXRateAdmin(admin.ModelAdmin):
+    # Edits here reach rollups only through load_fx_rates --rebuild
+    list_display = ['currency', 'date', 'rate']
+    list_filter = ['currency']
     date_hierarchy = 'date'
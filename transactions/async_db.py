@@ -0,0 +1,30 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+# Django's async ORM methods (aaggregate, acount, ...) all run on one shared
+# thread, so awaiting several of them with gather() still executes them one
+# after another. Independent queries that should overlap run here instead,
+# each on its own worker thread and therefore its own database connection.
+
+
+def _isolated(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # Worker threads don't see request_finished; honour CONN_MAX_AGE here
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*funcs):
+    """Run independent synchronous ORM callables concurrently; returns their results in order"""
+    return await asyncio.gather(*(
+        sync_to_async(_isolated(func), thread_sensitive=False)() for func in funcs
+    ))
+
+
+async def resolve_user(request):
+    """Load request.user outside the event loop (request.auser() only exists from Django 5.0)"""
+    return await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
@@ -0,0 +1,68 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.shortcuts import render
+from dashboard.cache import data_version
+from .async_db import gather_queries, resolve_user
+from .balances import page_balances
+from .filters import filter_key, filter_transactions, shows_running_balance
+from .models import Transaction
+
+PAGE_SIZE = 20
+
+
+async def transaction_list_async(request):
+    """Async TransactionListView: the page rows and the COUNT(*) run concurrently"""
+    user = await resolve_user(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    queryset = filter_transactions(
+        Transaction.objects.filter(user=user), request.GET
+    ).select_related('category').order_by('-date', '-created_at', '-id')
+
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        raise Http404('Invalid page')
+    if number < 1:
+        raise Http404('Invalid page')
+
+    offset = (number - 1) * PAGE_SIZE
+    rows, count = await gather_queries(
+        lambda: list(queryset[offset:offset + PAGE_SIZE]),
+        queryset.count,
+    )
+
+    paginator = Paginator(queryset, PAGE_SIZE)
+    paginator.count = count
+    try:
+        page = paginator.page(number)
+    except InvalidPage:
+        raise Http404('Invalid page')
+    # Reuse the rows already fetched instead of letting the page slice again
+    page.object_list = rows
+
+    # Needs the top row's key, so it follows the page query
+    show_balance = shows_running_balance(request.GET)
+    net_worth = await sync_to_async(page_balances)(user, rows, show_balance)
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    context = {
+        'transactions': rows,
+        'object_list': rows,
+        'page_obj': page,
+        'paginator': paginator,
+        'is_paginated': page.has_other_pages(),
+        'filter_query': params.urlencode(),
+        'cursor_pagination': False,
+        'show_balance': show_balance,
+        'net_worth': net_worth,
+        'fragment_key': filter_key(request.GET, page.number),
+        'data_version': await sync_to_async(data_version)(user.pk),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+    return await sync_to_async(render)(request, 'transactions/list.html', context)
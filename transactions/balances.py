@@ -0,0 +1,197 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Q, Subquery, Sum, When
+from django.utils import timezone
+from .models import BalanceSnapshot, MonthlySummary, Transaction
+from .periods import shift_month
+
+ZERO = Decimal('0')
+
+
+def signed_amount(transaction_type, amount):
+    return amount if transaction_type == 'income' else -amount
+
+
+def net_amount():
+    """Income minus expenses in the base currency as a SQL expression over Transaction rows"""
+    return Case(
+        When(type='income', then=F('base_amount')),
+        default=-F('base_amount'),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+
+
+def month_end(year, month):
+    return date(*shift_month(year, month, 1), 1) - timedelta(days=1)
+
+
+def apply_delta(user_id, day, amount):
+    """Add amount to every snapshot of the user taken on or after day"""
+    BalanceSnapshot.objects.filter(user_id=user_id, as_of__gte=day).update(balance=F('balance') + amount)
+
+
+def record_change(previous, current):
+    """Move a transaction's contribution between snapshots (rollup snapshot dicts)"""
+    deltas = {}
+    for state, sign in ((previous, -1), (current, 1)):
+        if state:
+            key = (state['user_id'], state['date'])
+            deltas[key] = deltas.get(key, ZERO) + sign * signed_amount(state['type'], state['amount'])
+    for (user_id, day), amount in deltas.items():
+        if amount:
+            apply_delta(user_id, day, amount)
+
+
+def record_bulk_create(transactions):
+    """Apply rows inserted with bulk_create (which skips signals) to the snapshots.
+
+    Deltas are grouped by month: within a month every row falls before the
+    same month-end snapshots, so this is one UPDATE per user and month.
+    """
+    deltas = {}
+    for txn in transactions:
+        day = Transaction._meta.get_field('date').to_python(txn.date)
+        key = (txn.user_id, month_end(day.year, day.month))
+        deltas[key] = deltas.get(key, ZERO) + signed_amount(txn.type, txn.base_amount)
+    for (user_id, as_of), amount in deltas.items():
+        if amount:
+            apply_delta(user_id, as_of, amount)
+
+
+def rebuild_balance_snapshots(user, through=None):
+    """Replace a user's snapshots with one per month-end, from their first
+    transaction through the last month ended before `through` (default
+    today); returns the snapshot count"""
+    through = through or timezone.localdate()
+    with db_transaction.atomic():
+        rows = MonthlySummary.objects.filter(user=user).values('year', 'month').annotate(
+            income=Sum('total', filter=Q(type='income')),
+            expenses=Sum('total', filter=Q(type='expense')),
+        ).order_by('year', 'month')
+        net = {(row['year'], row['month']): (row['income'] or ZERO) - (row['expenses'] or ZERO) for row in rows}
+
+        snapshots = []
+        if net:
+            year, month = min(net)
+            balance = ZERO
+            while month_end(year, month) < through:
+                balance += net.get((year, month), ZERO)
+                snapshots.append(BalanceSnapshot(user=user, as_of=month_end(year, month), balance=balance))
+                year, month = shift_month(year, month, 1)
+
+        BalanceSnapshot.objects.filter(user=user).delete()
+        BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def through_key(key):
+    """Rows up to and including key, (date, created_at, id), in list order"""
+    day, created_at, pk = key
+    return (
+        Q(date__lt=day)
+        | Q(date=day, created_at__lt=created_at)
+        | Q(date=day, created_at=created_at, id__lte=pk)
+    )
+
+
+def balance_through(user, key=None):
+    """Net balance including every transaction up to key in list order.
+
+    key is (date, created_at, id), as for keyset pagination; None means all
+    transactions. The nearest snapshot before the key's date supplies the
+    bulk of the total, so only rows since that month-end are summed: two
+    indexed queries whatever the length of the history.
+    """
+    snapshots = BalanceSnapshot.objects.filter(user=user)
+    if key is not None:
+        snapshots = snapshots.filter(as_of__lt=key[0])
+    snapshot = snapshots.order_by('-as_of').values_list('as_of', 'balance').first()
+
+    rows = Transaction.objects.filter(user=user)
+    if snapshot:
+        rows = rows.filter(date__gt=snapshot[0])
+    if key is not None:
+        rows = rows.filter(through_key(key))
+    delta = rows.aggregate(total=Sum(net_amount()))['total'] or ZERO
+    return (snapshot[1] if snapshot else ZERO) + delta
+
+
+def balances_through(user, key):
+    """(balance through key, net balance overall) for a list page that shows both.
+
+    Same result as two balance_through() calls, but the snapshot before the
+    key's date and the latest snapshot come back from one query, and the rows
+    since each are summed in one aggregate.
+    """
+    snapshots = BalanceSnapshot.objects.filter(user=user).order_by('-as_of')
+    latest = snapshots.values('as_of')[:1]
+    before_key = snapshots.filter(as_of__lt=key[0]).values('as_of')[:1]
+    found = dict(snapshots.filter(
+        Q(as_of=Subquery(latest)) | Q(as_of=Subquery(before_key))
+    ).values_list('as_of', 'balance'))
+    if not found:
+        totals = Transaction.objects.filter(user=user).aggregate(
+            at_key=Sum(net_amount(), filter=through_key(key)),
+            total=Sum(net_amount()),
+        )
+        return totals['at_key'] or ZERO, totals['total'] or ZERO
+
+    latest_as_of = max(found)
+    since_latest = Q(date__gt=latest_as_of)
+    up_to_key = through_key(key)
+    before_as_of = max((as_of for as_of in found if as_of < key[0]), default=None)
+    if before_as_of is not None:
+        up_to_key &= Q(date__gt=before_as_of)
+    totals = Transaction.objects.filter(user=user).filter(up_to_key | since_latest).aggregate(
+        at_key=Sum(net_amount(), filter=up_to_key),
+        total=Sum(net_amount(), filter=since_latest),
+    )
+    return (
+        found.get(before_as_of, ZERO) + (totals['at_key'] or ZERO),
+        found[latest_as_of] + (totals['total'] or ZERO),
+    )
+
+
+def running_balances(user, rows, balance=None):
+    """Balance after each of rows, given newest first and consecutive in list order.
+
+    balance is the top row's, when the caller already has it (balances_through).
+    """
+    balances = []
+    if rows:
+        if balance is None:
+            top = rows[0]
+            balance = balance_through(user, (top.date, top.created_at, top.pk))
+        for txn in rows:
+            balances.append(balance)
+            balance -= signed_amount(txn.type, txn.base_amount)
+    return balances
+
+
+def page_balances(user, rows, show_balance):
+    """Net worth for a list page; with show_balance, also sets running_balance
+    on rows (newest first and consecutive in list order).
+
+    One snapshot lookup and one aggregate serve both the top row and the net worth.
+    """
+    if show_balance and rows:
+        top = rows[0]
+        top_balance, net_worth = balances_through(user, (top.date, top.created_at, top.pk))
+        for txn, balance in zip(rows, running_balances(user, rows, top_balance)):
+            txn.running_balance = balance
+        return net_worth
+    return balance_through(user)
+
+
+def verify_balance_snapshots(user):
+    """Snapshot dates whose stored balance differs from the transaction table"""
+    stored = dict(BalanceSnapshot.objects.filter(user=user).values_list('as_of', 'balance'))
+    mismatched = []
+    for as_of, balance in sorted(stored.items()):
+        expected = Transaction.objects.filter(user=user, date__lte=as_of).aggregate(
+            total=Sum(net_amount())
+        )['total'] or ZERO
+        if expected != balance:
+            mismatched.append(as_of)
+    return mismatched
@@ -0,0 +1,171 @@
+from datetime import date
+from decimal import Decimal
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from .models import Budget, BudgetAlert, BudgetSpend, MonthlySummary
+from .rollups import snapshot
+
+# Percentages of a budget that raise an alert when a write crosses them
+THRESHOLDS = (80, 100)
+ZERO = Decimal('0')
+
+
+def period_start(period, day):
+    """First day of the budget period containing day"""
+    if period == 'monthly':
+        return date(day.year, day.month, 1)
+    if period == 'quarterly':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, 1, 1)
+
+
+def threshold_reached(spent, limit):
+    """The highest threshold spent has reached, or 0"""
+    percent = spent * 100 / limit
+    return max((threshold for threshold in THRESHOLDS if percent >= threshold), default=0)
+
+
+def apply_delta(budget, start, amount):
+    """Add amount to a budget's spend for one period and raise an alert if
+    that crosses a threshold not yet alerted this period.
+
+    The UPDATE locks the spend row until the surrounding transaction ends, so
+    the value read back is this write's own and concurrent writers each see
+    (and alert on) a distinct crossing.
+    """
+    lookup = {'budget_id': budget.pk, 'period_start': start}
+    with db_transaction.atomic():
+        updated = BudgetSpend.objects.filter(**lookup).update(spent=F('spent') + amount)
+        if not updated:
+            try:
+                with db_transaction.atomic():
+                    BudgetSpend.objects.create(spent=amount, **lookup)
+            except IntegrityError:
+                # Another writer created the row first
+                BudgetSpend.objects.filter(**lookup).update(spent=F('spent') + amount)
+
+        pk, spent, alerted = BudgetSpend.objects.filter(**lookup).values_list(
+            'pk', 'spent', 'alerted_threshold'
+        ).get()
+        reached = threshold_reached(spent, budget.amount)
+        if reached != alerted:
+            # Lowered on refunds and edits, so a later crossing alerts again
+            BudgetSpend.objects.filter(pk=pk).update(alerted_threshold=reached)
+            if reached > alerted:
+                BudgetAlert.objects.create(
+                    user_id=budget.user_id, budget_id=budget.pk, period_start=start,
+                    threshold=reached, spent=spent, limit=budget.amount,
+                )
+
+
+def apply_deltas(deltas):
+    """Apply {(user_id, category_id, date): expense amount} to every matching budget.
+
+    Budgets are looked up with one query, and deltas falling in the same
+    budget period are combined before they are written.
+    """
+    if not deltas:
+        return
+    budgets = Budget.objects.filter(
+        user_id__in={user_id for user_id, _, _ in deltas},
+        category_id__in={category_id for _, category_id, _ in deltas},
+    ).only('pk', 'user_id', 'category_id', 'period', 'amount')
+    by_category = {}
+    for budget in budgets:
+        by_category.setdefault((budget.user_id, budget.category_id), []).append(budget)
+
+    totals = {}
+    for (user_id, category_id, day), amount in deltas.items():
+        for budget in by_category.get((user_id, category_id), ()):
+            key = (budget, period_start(budget.period, day))
+            totals[key] = totals.get(key, ZERO) + amount
+    for (budget, start), amount in totals.items():
+        if amount:
+            apply_delta(budget, start, amount)
+
+
+def record_change(previous, current):
+    """Move an expense's amount between budget periods (rollup snapshot dicts)"""
+    deltas = {}
+    for state, sign in ((previous, -1), (current, 1)):
+        if state and state['type'] == 'expense':
+            key = (state['user_id'], state['category_id'], state['date'])
+            deltas[key] = deltas.get(key, ZERO) + sign * state['amount']
+    apply_deltas(deltas)
+
+
+def record_bulk_create(transactions):
+    """Apply rows inserted with bulk_create (which skips signals) to the budgets"""
+    deltas = {}
+    for current in map(snapshot, transactions):
+        if current['type'] == 'expense':
+            key = (current['user_id'], current['category_id'], current['date'])
+            deltas[key] = deltas.get(key, ZERO) + current['amount']
+    apply_deltas(deltas)
+
+
+def rebuild_budget_spend(budget):
+    """Recompute a budget's spend for every period from the monthly rollup;
+    the thresholds already reached are recorded without raising alerts.
+    Returns the number of periods."""
+    rows = MonthlySummary.objects.filter(
+        user_id=budget.user_id, category_id=budget.category_id, type='expense',
+    ).values_list('year', 'month', 'total')
+    spent = {}
+    for year, month, total in rows:
+        start = period_start(budget.period, date(year, month, 1))
+        spent[start] = spent.get(start, ZERO) + total
+
+    with db_transaction.atomic():
+        BudgetSpend.objects.filter(budget=budget).delete()
+        BudgetSpend.objects.bulk_create([
+            BudgetSpend(
+                budget=budget, period_start=start, spent=total,
+                alerted_threshold=threshold_reached(total, budget.amount),
+            )
+            for start, total in spent.items()
+        ], batch_size=1000)
+    return len(spent)
+
+
+def budget_progress(user, day):
+    """Each budget of the user with its spend in the period containing day.
+
+    One query: the current period's start is computed per budget in SQL and
+    its spend read through the (budget, period_start) unique index.
+    """
+    current_start = Case(
+        *(When(period=period, then=Value(period_start(period, day))) for period, _ in Budget.PERIOD_CHOICES),
+    )
+    spend = BudgetSpend.objects.filter(budget=OuterRef('pk'), period_start=OuterRef('current_start'))
+    budgets = Budget.objects.filter(user=user).annotate(
+        current_start=current_start,
+        spent=Coalesce(
+            Subquery(spend.values('spent')[:1]), Value(ZERO),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    ).values('pk', 'category__name', 'period', 'amount', 'spent').order_by('category__name', 'period')
+
+    progress = []
+    for budget in budgets:
+        percent = budget['spent'] * 100 / budget['amount']
+        progress.append({
+            'id': budget['pk'],
+            'category': budget['category__name'],
+            'period': budget['period'],
+            'amount': budget['amount'],
+            'spent': budget['spent'],
+            'remaining': budget['amount'] - budget['spent'],
+            'percent': round(float(percent), 1),
+            'threshold': threshold_reached(budget['spent'], budget['amount']),
+        })
+    return progress
+
+
+def unread_alerts(user, limit=5):
+    """The newest unread alerts of the user, from the (user, is_read, created_at) index"""
+    return list(BudgetAlert.objects.filter(user=user, is_read=False).values(
+        'pk', 'budget__category__name', 'budget__period', 'period_start',
+        'threshold', 'spent', 'limit', 'created_at',
+    ).order_by('-created_at')[:limit])
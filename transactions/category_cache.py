@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Category
+from .routers import use_primary
+
+CATEGORY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def cache_key(user_id):
+    return f'categories:{user_id}'
+
+
+def get_user_categories(user_id):
+    """A user's categories as {'version', 'updated', 'categories': [dict, ...]}.
+
+    Served from the cache; rebuilt with one query after any Category change.
+    """
+    entry = cache.get(cache_key(user_id))
+    if entry is None:
+        now = timezone.now()
+        # Cached entries are read from the primary, never a lagging replica
+        with use_primary():
+            categories = list(
+                Category.objects.filter(user_id=user_id).order_by('type', 'name').values(
+                    'id', 'name', 'type', 'icon'
+                )
+            )
+        entry = {
+            'version': f'{now.timestamp():.6f}',
+            'updated': now.replace(microsecond=0),
+            'categories': categories,
+        }
+        cache.set(cache_key(user_id), entry, timeout=CATEGORY_CACHE_TIMEOUT)
+    return entry
+
+
+def categories_of_type(user_id, category_type=None):
+    categories = get_user_categories(user_id)['categories']
+    if category_type is None:
+        return categories
+    return [category for category in categories if category['type'] == category_type]
+
+
+def invalidate_user_categories(*user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,50 @@
+from django.db.models import Count
+from .models import Transaction
+
+
+def find_duplicate_of(transaction):
+    """An existing transaction with the same fingerprint, via the (user, fingerprint) index"""
+    fingerprint = transaction.compute_fingerprint()
+    return Transaction.objects.filter(
+        user_id=transaction.user_id,
+        fingerprint=fingerprint,
+    ).exclude(pk=transaction.pk).order_by('pk').first()
+
+
+def existing_fingerprints(user, fingerprints, created_before=None):
+    """Which of the given fingerprints already exist for a user, in one query"""
+    queryset = Transaction.objects.filter(user=user, fingerprint__in=set(fingerprints))
+    if created_before is not None:
+        queryset = queryset.filter(created_at__lt=created_before)
+    return set(queryset.values_list('fingerprint', flat=True))
+
+
+# Shown for each duplicate group, from its first row
+GROUP_FIELDS = ('date', 'type', 'amount', 'currency', 'description')
+
+
+def iter_duplicate_groups(user, chunk_size=500):
+    """Yield (ids, first) for each set of transactions sharing a fingerprint,
+    first being the GROUP_FIELDS of the lowest id.
+
+    Colliding fingerprints are found with a GROUP BY over the (user, fingerprint)
+    index; their rows are then fetched chunk by chunk, so no pairwise
+    comparison happens in Python.
+    """
+    colliding = Transaction.objects.filter(user=user).values('fingerprint').annotate(
+        copies=Count('id')
+    ).filter(copies__gt=1).order_by('fingerprint').values_list('fingerprint', flat=True)
+
+    last = ''
+    while True:
+        chunk = list(colliding.filter(fingerprint__gt=last)[:chunk_size])
+        if not chunk:
+            return
+        groups = {}
+        rows = Transaction.objects.filter(user=user, fingerprint__in=chunk).order_by('fingerprint', 'pk')
+        for pk, fingerprint, *values in rows.values_list('pk', 'fingerprint', *GROUP_FIELDS):
+            ids, _ = groups.setdefault(fingerprint, ([], dict(zip(GROUP_FIELDS, values))))
+            ids.append(pk)
+        for fingerprint in chunk:
+            yield groups[fingerprint]
+        last = chunk[-1]
@@ -0,0 +1,60 @@
+import csv
+import json
+from .filters import filter_transactions
+from .models import Transaction
+
+EXPORT_FIELDS = ['id', 'date', 'type', 'category__name', 'amount', 'currency', 'description']
+EXPORT_HEADER = ['id', 'date', 'type', 'category', 'amount', 'currency', 'description']
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def export_rows(user, params):
+    """Tuples for a user's filtered transactions, read through a server-side cursor"""
+    queryset = filter_transactions(Transaction.objects.filter(user=user), params)
+    # Pin the database now: the rows are read while the response streams,
+    # after the request's routing context has ended
+    return queryset.using(queryset.db).order_by('-date', '-created_at', '-id').values_list(
+        *EXPORT_FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """File-like object whose write() hands the value back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for pk, day, transaction_type, category, amount, currency, description in rows:
+        yield writer.writerow([pk, day.isoformat(), transaction_type, category, amount, currency, description or ''])
+
+
+def iter_ndjson(rows):
+    for pk, day, transaction_type, category, amount, currency, description in rows:
+        yield json.dumps({
+            'id': pk,
+            'date': day.isoformat(),
+            'type': transaction_type,
+            'category': category,
+            'amount': str(amount),
+            'currency': currency,
+            'description': description or '',
+        }, ensure_ascii=False) + '\n'
+
+
+SERIALIZERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+}
+
+
+def iter_export(user, params, export_format='csv'):
+    """Serialized lines for an export; nothing is materialized up front"""
+    return SERIALIZERS[export_format](export_rows(user, params))
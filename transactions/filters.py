@@ -0,0 +1,50 @@
+import hashlib
+from .periods import filter_period, period_from_params
+from .search import search_transactions
+
+# Filters that leave gaps between rows, so a running balance no longer applies
+BALANCE_BREAKING_FILTERS = ('type', 'category', 'q')
+
+
+def filter_transactions(queryset, params):
+    """Apply the transaction list filters (type, period, category, search) from request params"""
+    # Filter by type if provided
+    transaction_type = params.get('type')
+    if transaction_type:
+        queryset = queryset.filter(type=transaction_type)
+
+    # Filter by period (month/year, quarter, ytd, last N days or custom range)
+    queryset = filter_period(queryset, period_from_params(params))
+
+    # Filter by category id or name if provided
+    category = params.get('category')
+    if category:
+        if category.isdigit():
+            queryset = queryset.filter(category_id=int(category))
+        else:
+            queryset = queryset.filter(category__name__iexact=category)
+
+    # Free-text search over description and category name
+    queryset = search_transactions(queryset, params.get('q'))
+
+    return queryset
+
+
+def shows_running_balance(params):
+    """Whether the filtered rows are consecutive in the full history"""
+    return not any(params.get(name) for name in BALANCE_BREAKING_FILTERS)
+
+
+def filter_key(params, page=''):
+    """Digest of the filters filter_transactions() applies, plus the page
+    (number or cursor), for caching a rendered list page: unknown parameters
+    and other spellings of the same period share an entry, and an arbitrary
+    query string cannot mint arbitrarily long cache keys"""
+    key = '|'.join(str(part) for part in (
+        params.get('type') or '',
+        period_from_params(params) or '',
+        params.get('category') or '',
+        params.get('q') or '',
+        page,
+    ))
+    return hashlib.sha256(key.encode()).hexdigest()
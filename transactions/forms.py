@@ -1,10 +1,40 @@
 from django import forms
-from .models import Transaction, Category
+from .models import BASE_CURRENCY, Transaction, Category
+from .importers import DUPLICATE_CHOICES, FORMAT_CHOICES
+from .dedup import find_duplicate_of
+from .category_cache import categories_of_type
+
+
+class CachedCategoryChoiceField(forms.ModelChoiceField):
+    """Category choice field that renders and validates from the per-user category cache"""
+    
+    def set_cached_categories(self, user_id, categories):
+        self.cached_user_id = user_id
+        self.cached_categories = {str(category['id']): category for category in categories}
+        self.choices = [('', self.empty_label)] + [
+            (category['id'], category['name']) for category in categories
+        ]
+    
+    def to_python(self, value):
+        if not hasattr(self, 'cached_categories') or value in self.empty_values:
+            return super().to_python(value)
+        category = self.cached_categories.get(str(value))
+        if category is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return Category(user_id=self.cached_user_id, **category)
+
 
 class TransactionForm(forms.ModelForm):
+    allow_duplicate = forms.BooleanField(
+        required=False,
+        label='Save anyway',
+        widget=forms.CheckboxInput(attrs={'class': 'rounded border-gray-300 text-indigo-600 focus:ring-indigo-500'}),
+    )
+    
     class Meta:
         model = Transaction
-        fields = ['type', 'category', 'amount', 'description', 'date']
+        fields = ['type', 'category', 'amount', 'currency', 'description', 'date']
+        field_classes = {'category': CachedCategoryChoiceField}
         widgets = {
             'type': forms.Select(attrs={
                 'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none',
@@ -21,6 +51,9 @@ class TransactionForm(forms.ModelForm):
                 'min': '0.01',
                 'placeholder': '0.00'
             }),
+            'currency': forms.Select(attrs={
+                'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none',
+            }),
             'description': forms.Textarea(attrs={
                 'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none resize-none',
                 'rows': 3,
@@ -35,22 +68,65 @@ class TransactionForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
+        self.user = user
+        self.fields['currency'].required = False
         
         if user:
             # Initially show all categories, will be filtered by JavaScript
-            self.fields['category'].queryset = Category.objects.filter(user=user)
+            category_type = None
             
             # If type is already set, filter categories
             if 'type' in self.data:
-                transaction_type = self.data.get('type')
-                self.fields['category'].queryset = Category.objects.filter(
-                    user=user,
-                    type=transaction_type
-                )
+                category_type = self.data.get('type')
             elif self.instance and self.instance.pk:
                 # For update view
-                self.fields['category'].queryset = Category.objects.filter(
-                    user=user,
-                    type=self.instance.type
+                category_type = self.instance.type
+            
+            # Choices come from the cached category list, not a queryset
+            self.fields['category'].queryset = Category.objects.filter(user=user)
+            self.fields['category'].set_cached_categories(
+                user.pk, categories_of_type(user.pk, category_type)
+            )
+    
+    def clean_currency(self):
+        # Clients that predate currencies post without one
+        return self.cleaned_data.get('currency') or BASE_CURRENCY
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        # The exchange rate is checked by Transaction.clean()
+        if self.user and not self.errors and not cleaned_data.get('allow_duplicate'):
+            candidate = Transaction(
+                pk=self.instance.pk,
+                user=self.user,
+                date=cleaned_data.get('date'),
+                amount=cleaned_data.get('amount'),
+                currency=cleaned_data.get('currency'),
+                type=cleaned_data.get('type'),
+                description=cleaned_data.get('description'),
+            )
+            if find_duplicate_of(candidate):
+                raise forms.ValidationError(
+                    'A transaction with the same date, amount, type and description already exists. '
+                    'Tick "Save anyway" to keep both.',
+                    code='duplicate',
                 )
+        return cleaned_data
+
 
+class TransactionImportForm(forms.Form):
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={
+        'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none',
+        'accept': '.csv,.ofx,.qfx,.qif',
+    }))
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, widget=forms.Select(attrs={
+        'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none',
+    }))
+    create_missing = forms.BooleanField(
+        required=False,
+        label='Create missing categories',
+        widget=forms.CheckboxInput(attrs={'class': 'rounded border-gray-300 text-indigo-600 focus:ring-indigo-500'}),
+    )
+    on_duplicate = forms.ChoiceField(choices=DUPLICATE_CHOICES, initial='skip', widget=forms.Select(attrs={
+        'class': 'w-full rounded-xl border border-gray-300 bg-white px-4 py-2.5 text-gray-900 shadow-sm focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500/20 transition outline-none',
+    }))
@@ -0,0 +1,131 @@
+import csv
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from django.core.exceptions import ValidationError
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, When
+from django.db.models.functions import Round
+from .models import BASE_CURRENCY, CURRENCY_CHOICES, FXRate
+
+CENT = Decimal('0.01')
+# Distinct (currency, date) lookups kept by one rate_lookup()
+RATE_CACHE_SIZE = 4096
+LOAD_CHUNK_SIZE = 1000
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+class RateNotFound(LookupError):
+    pass
+
+
+def get_rate(currency, day):
+    """Value of one unit of currency in BASE_CURRENCY on day (the latest rate
+    on or before it); raises RateNotFound.
+
+    Only needed on write: each transaction stores its converted amount in
+    base_amount, which every delta and total reads.
+    """
+    if currency == BASE_CURRENCY:
+        return Decimal('1')
+    rate = FXRate.objects.filter(currency=currency, date__lte=day).order_by('-date').values_list(
+        'rate', flat=True
+    ).first()
+    if rate is None:
+        raise RateNotFound(f'No {currency} exchange rate on or before {day}')
+    return rate
+
+
+def rate_lookup():
+    """get_rate memoized for one batch (an import, a materialize run), so it
+    costs a query per distinct (currency, date). RateNotFound is not cached;
+    rates loaded meanwhile are not seen, so never keep one across requests."""
+    return lru_cache(maxsize=RATE_CACHE_SIZE)(get_rate)
+
+
+def to_base(amount, currency, day, rate=get_rate):
+    """amount in BASE_CURRENCY, rounded per row like converted_amount()"""
+    if currency == BASE_CURRENCY:
+        return amount
+    return (amount * rate(currency, day)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def rate_for_row():
+    """SQL: the rate for the outer row's currency and date, from the (currency, date) index"""
+    return Subquery(
+        FXRate.objects.filter(
+            currency=OuterRef('currency'), date__lte=OuterRef('date'),
+        ).order_by('-date').values('rate')[:1],
+        output_field=RATE_FIELD,
+    )
+
+
+def converted_amount():
+    """SQL: a Transaction row's amount in BASE_CURRENCY, for (re)computing
+    base_amount in bulk, e.g. after loading rates (see reconvert()).
+
+    Base currency rows are taken as is; others are joined to their rate and
+    rounded to cents per row, as in to_base().
+    """
+    return Case(
+        When(currency=BASE_CURRENCY, then=F('amount')),
+        default=Round(F('amount') * rate_for_row(), 2),
+        output_field=AMOUNT_FIELD,
+    )
+
+
+def parse_rate_row(row):
+    currency = (row.get('currency') or '').strip().upper()
+    if currency not in dict(CURRENCY_CHOICES) or currency == BASE_CURRENCY:
+        raise ValidationError(f'Invalid currency "{currency}"')
+    try:
+        day = date.fromisoformat((row.get('date') or '').strip())
+    except ValueError:
+        raise ValidationError(f'Invalid date "{row.get("date")}"')
+    try:
+        rate = Decimal((row.get('rate') or '').strip())
+    except InvalidOperation:
+        raise ValidationError(f'Invalid rate "{row.get("rate")}"')
+    if rate <= 0:
+        raise ValidationError(f'Invalid rate "{rate}"')
+    return FXRate(currency=currency, date=day, rate=rate)
+
+
+def load_rates(stream, chunk_size=LOAD_CHUNK_SIZE):
+    """Upsert rates from a CSV with date, currency, rate columns (rate is the
+    value of one unit in BASE_CURRENCY); returns {currency: earliest date loaded}.
+
+    Raises ValidationError naming the first bad line; earlier chunks stay loaded.
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    earliest = {}
+    chunk = []
+
+    def flush():
+        FXRate.objects.bulk_create(
+            chunk, update_conflicts=True, unique_fields=['currency', 'date'], update_fields=['rate'],
+        )
+        chunk.clear()
+
+    for row in reader:
+        try:
+            rate = parse_rate_row(row)
+        except ValidationError as e:
+            raise ValidationError(f'Line {reader.line_num}: {e.messages[0]}')
+        chunk.append(rate)
+        if rate.currency not in earliest or rate.date < earliest[rate.currency]:
+            earliest[rate.currency] = rate.date
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return earliest
+
+
+def reconvert(transactions):
+    """Recompute the stored base_amount of transactions (a queryset) at the
+    current rates, in one UPDATE; returns the row count. Rollups, balance
+    snapshots and budgets are left to the caller to rebuild."""
+    return transactions.exclude(currency=BASE_CURRENCY).update(base_amount=converted_amount())
@@ -0,0 +1,303 @@
+import csv
+import io
+import re
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from .fx import RateNotFound, rate_lookup
+from .models import BASE_CURRENCY, Category, Transaction
+from .signals import transactions_bulk_changed
+from .dedup import existing_fingerprints
+from .category_cache import categories_of_type
+from .search import update_search_vectors
+from . import balances, budgets, rollups
+
+DEFAULT_CHUNK_SIZE = 1000
+# Only the first errors are kept in memory; the rest are just counted
+MAX_REPORTED_ERRORS = 1000
+FALLBACK_CATEGORIES = {'income': 'Other Income', 'expense': 'Other Expense'}
+FORMAT_CHOICES = [
+    ('csv', 'CSV'),
+    ('ofx', 'OFX'),
+    ('qif', 'QIF'),
+]
+DUPLICATE_CHOICES = [
+    ('skip', 'Skip rows that already exist'),
+    ('allow', 'Import them anyway'),
+]
+
+
+class ImportReport:
+    """Running totals and per-row errors for one import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.started_at = timezone.now()
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class CategoryMap:
+    """In-memory (name, type) -> category id lookup for one user"""
+
+    def __init__(self, user, create_missing=False, dry_run=False):
+        self.user = user
+        self.create_missing = create_missing
+        self.dry_run = dry_run
+        self.ids = {
+            (category['name'].lower(), category['type']): category['id']
+            for category in categories_of_type(user.pk)
+        }
+
+    def resolve(self, name, category_type):
+        if name and not name.strip():
+            raise ValidationError('Blank category name')
+        name = (name or FALLBACK_CATEGORIES[category_type]).strip()
+        key = (name.lower(), category_type)
+        if key not in self.ids:
+            if not self.create_missing:
+                raise ValidationError(f'Unknown {category_type} category "{name}"')
+            if len(name) > Category._meta.get_field('name').max_length:
+                raise ValidationError(f'Category name "{name[:20]}..." is too long')
+            if self.dry_run:
+                self.ids[key] = None
+            else:
+                category, _ = Category.objects.get_or_create(user=self.user, name=name, type=category_type)
+                self.ids[key] = category.pk
+        return self.ids[key]
+
+
+def parse_amount(value):
+    try:
+        return Decimal(str(value).replace(',', '').replace('₹', '').strip())
+    except InvalidOperation:
+        raise ValidationError(f'Invalid amount "{value}"')
+
+
+def parse_date(value, formats):
+    value = (value or '').strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValidationError(f'Invalid date "{value}"')
+
+
+def read_csv(stream):
+    """Yield (line, row) from a CSV with date, type, category, amount, description
+    and optional currency columns"""
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, {
+            'date': row.get('date') or '',
+            'type': (row.get('type') or '').strip().lower(),
+            'category': row.get('category') or '',
+            'amount': row.get('amount') or '',
+            'description': (row.get('description') or '').strip(),
+            'currency': row.get('currency') or '',
+        }
+
+
+OFX_TAG = re.compile(r'<(/?)(\w+)>([^<\r\n]*)')
+
+
+def read_ofx(stream):
+    """Yield (line, row) for each <STMTTRN> block of an OFX/SGML statement"""
+    current = None
+    # The statement's <CURDEF>, which precedes its transactions
+    currency = ''
+    start_line = 0
+    for line_no, line in enumerate(stream, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield start_line, {
+                        'date': current.get('DTPOSTED', '')[:8],
+                        'type': '',
+                        'category': '',
+                        'amount': current.get('TRNAMT', ''),
+                        'description': current.get('NAME') or current.get('MEMO') or '',
+                        'currency': currency,
+                    }
+                    current = None
+                elif not closing:
+                    current, start_line = {}, line_no
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+            elif tag == 'CURDEF' and not closing:
+                currency = value.strip()
+
+
+def read_qif(stream):
+    """Yield (line, row) for each ^-terminated record of a QIF file"""
+    current = {}
+    start_line = None
+    for line_no, line in enumerate(stream, start=1):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+        if start_line is None:
+            start_line = line_no
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if current:
+                yield start_line, qif_row(current)
+            current, start_line = {}, None
+        elif code in 'DTUPML' and code not in current:
+            current[code] = value
+    if current:
+        yield start_line, qif_row(current)
+
+
+def qif_row(fields):
+    return {
+        'date': fields.get('D', '').replace("'", '/'),
+        'type': '',
+        'category': fields.get('L', '').split(':')[0].strip('[]'),
+        'amount': fields.get('T') or fields.get('U') or '',
+        'description': fields.get('P') or fields.get('M') or '',
+        'currency': '',
+    }
+
+
+READERS = {
+    'csv': read_csv,
+    'ofx': read_ofx,
+    'qif': read_qif,
+}
+
+DATE_FORMATS = {
+    'csv': ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'),
+    'ofx': ('%Y%m%d',),
+    'qif': ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d'),
+}
+
+
+def format_error(error):
+    if hasattr(error, 'error_dict'):
+        return '; '.join(
+            f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items()
+        )
+    return '; '.join(error.messages)
+
+
+def build_transaction(user, row, categories, date_formats=DATE_FORMATS['csv'], rate=None):
+    """Validate a raw row with the model's field rules and return an unsaved
+    Transaction; rate is the import's fx.rate_lookup()"""
+    amount = parse_amount(row['amount'])
+    transaction_type = row['type'] or ('expense' if amount < 0 else 'income')
+    if transaction_type not in FALLBACK_CATEGORIES:
+        raise ValidationError(f'Invalid type "{transaction_type}"')
+
+    txn = Transaction(
+        user=user,
+        category_id=categories.resolve(row['category'], transaction_type),
+        type=transaction_type,
+        amount=abs(amount),
+        description=row['description'] or None,
+        date=parse_date(row['date'], date_formats),
+        currency=row['currency'].strip().upper() or BASE_CURRENCY,
+    )
+    # Same field validators as TransactionForm (MinValueValidator, max_digits, choices);
+    # user and category are resolved above without a query per row, and the
+    # rate check of Transaction.clean() is done below with the import's lookup
+    txn.clean_fields(exclude=['user', 'category'])
+    try:
+        # Memoized per (currency, date), so a statement costs a query per distinct day
+        txn.base_amount = txn.compute_base_amount(rate)
+    except RateNotFound as e:
+        raise ValidationError(str(e))
+    # bulk_create skips save(), so set the fingerprint here
+    txn.fingerprint = txn.compute_fingerprint()
+    return txn
+
+
+def write_chunk(user, chunk, lines, report, on_duplicate, dry_run):
+    """Drop or count duplicates with one fingerprint lookup, then bulk insert the chunk"""
+    # Only rows that existed before this import started count as duplicates,
+    # so repeated rows within one statement are kept
+    existing = existing_fingerprints(user, (txn.fingerprint for txn in chunk), report.started_at)
+    if existing:
+        report.duplicates += sum(txn.fingerprint in existing for txn in chunk)
+        if on_duplicate == 'skip':
+            for line, txn in zip(lines, chunk):
+                if txn.fingerprint in existing:
+                    report.add_error(line, 'Duplicate of an existing transaction')
+            chunk = [txn for txn in chunk if txn.fingerprint not in existing]
+
+    if chunk and not dry_run:
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(chunk)
+            rollups.record_bulk_create(chunk)
+            balances.record_bulk_create(chunk)
+            budgets.record_bulk_create(chunk)
+            update_search_vectors(Transaction.objects.filter(pk__in=[txn.pk for txn in chunk]))
+    report.created += len(chunk)
+
+
+def import_transactions(user, stream, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE,
+                        create_missing=False, dry_run=False, on_duplicate='skip'):
+    """Stream rows from a text file into bulk_create chunks; returns an ImportReport.
+
+    Only one chunk of rows is held in memory at a time, and invalid rows are
+    reported without aborting the rest of the file. Rows matching an existing
+    transaction's fingerprint are skipped (on_duplicate='skip') or imported
+    and counted (on_duplicate='allow').
+    """
+    report = ImportReport()
+    categories = CategoryMap(user, create_missing=create_missing, dry_run=dry_run)
+    rate = rate_lookup()
+    chunk = []
+    lines = []
+
+    try:
+        for line, row in READERS[file_format](stream):
+            report.rows += 1
+            try:
+                chunk.append(build_transaction(user, row, categories, DATE_FORMATS[file_format], rate))
+                lines.append(line)
+            except ValidationError as e:
+                report.add_error(line, format_error(e))
+                continue
+
+            if len(chunk) >= chunk_size:
+                write_chunk(user, chunk, lines, report, on_duplicate, dry_run)
+                chunk = []
+                lines = []
+
+        if chunk:
+            write_chunk(user, chunk, lines, report, on_duplicate, dry_run)
+    finally:
+        if report.created and not dry_run:
+            transactions_bulk_changed.send(sender=Transaction, user_id=user.pk)
+        report.finish()
+
+    return report
+
+
+def open_text(binary_file):
+    """Wrap an uploaded or opened binary file for streaming text reads"""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', errors='replace', newline='')
@@ -1,64 +1,50 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from transactions.models import Category
+from transactions.provisioning import DEFAULT_BATCH_SIZE, provision_default_categories, provision_users_in_batches
 
 class Command(BaseCommand):
-    help = 'Create default categories for a user'
+    help = 'Create default categories for one or more users, or for all users'
 
     def add_arguments(self, parser):
-        parser.add_argument('username', type=str, help='Username to create categories for')
+        parser.add_argument('usernames', nargs='*', type=str, help='Usernames to create categories for')
+        parser.add_argument('--all', action='store_true', help='Provision every user, in batches')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Users per batch with --all or a username list')
 
     def handle(self, *args, **options):
-        username = options['username']
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'User "{username}" does not exist.'))
+        usernames = options['usernames']
+        if not usernames and not options['all']:
+            self.stdout.write(self.style.ERROR('Pass one or more usernames, or --all.'))
             return
 
-        # Default income categories
-        income_categories = [
-            {'name': 'Salary', 'icon': 'briefcase'},
-            {'name': 'Freelance', 'icon': 'laptop'},
-            {'name': 'Investment', 'icon': 'trending-up'},
-            {'name': 'Other Income', 'icon': 'cash'},
-        ]
+        if len(usernames) == 1 and not options['all']:
+            self.provision_single(usernames[0])
+            return
 
-        # Default expense categories
-        expense_categories = [
-            {'name': 'Food', 'icon': 'restaurant'},
-            {'name': 'Transport', 'icon': 'car'},
-            {'name': 'Rent', 'icon': 'home'},
-            {'name': 'Utilities', 'icon': 'bolt'},
-            {'name': 'Shopping', 'icon': 'bag'},
-            {'name': 'Entertainment', 'icon': 'film'},
-            {'name': 'Healthcare', 'icon': 'heart'},
-            {'name': 'Education', 'icon': 'book'},
-            {'name': 'Other Expense', 'icon': 'more-horizontal'},
-        ]
+        users = User.objects.all()
+        if usernames:
+            users = users.filter(username__in=usernames)
+            missing = set(usernames) - set(users.values_list('username', flat=True))
+            for username in sorted(missing):
+                self.stdout.write(self.style.ERROR(f'User "{username}" does not exist.'))
 
+        total_users = 0
         created_count = 0
-        for cat_data in income_categories:
-            category, created = Category.objects.get_or_create(
-                user=user,
-                name=cat_data['name'],
-                type='income',
-                defaults={'icon': cat_data['icon']}
-            )
-            if created:
-                created_count += 1
-                self.stdout.write(self.style.SUCCESS(f'Created income category: {cat_data["name"]}'))
-
-        for cat_data in expense_categories:
-            category, created = Category.objects.get_or_create(
-                user=user,
-                name=cat_data['name'],
-                type='expense',
-                defaults={'icon': cat_data['icon']}
-            )
-            if created:
-                created_count += 1
-                self.stdout.write(self.style.SUCCESS(f'Created expense category: {cat_data["name"]}'))
+        for batch_users, batch_created in provision_users_in_batches(users, options['batch_size']):
+            total_users += batch_users
+            created_count += batch_created
+            self.stdout.write(f'Provisioned {total_users} users ({created_count} categories created)')
 
         self.stdout.write(self.style.SUCCESS(f'\nTotal categories created: {created_count}'))
 
+    def provision_single(self, username):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'User "{username}" does not exist.'))
+            return
+
+        created = provision_default_categories([user.pk])
+        for _, name, category_type in created:
+            self.stdout.write(self.style.SUCCESS(f'Created {category_type} category: {name}'))
+
+        self.stdout.write(self.style.SUCCESS(f'\nTotal categories created: {len(created)}'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from transactions.exporters import EXPORT_FORMATS, iter_export
+
+class Command(BaseCommand):
+    help = 'Export a user\'s transactions as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='Username to export transactions for')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', type=str, help='File to write to (default: stdout)')
+        parser.add_argument('--type', choices=['income', 'expense'], help='Only export this transaction type')
+        parser.add_argument('--category', type=str, help='Only export this category (id or name)')
+        parser.add_argument('--start', type=str, help='First date to include (YYYY-MM-DD)')
+        parser.add_argument('--end', type=str, help='Last date to include (YYYY-MM-DD)')
+        parser.add_argument('--period', choices=['ytd', 'last_days', 'quarter', 'year'], help='Named period, as in the list filters')
+        parser.add_argument('--year', type=str)
+        parser.add_argument('--month', type=str)
+        parser.add_argument('--quarter', type=str)
+        parser.add_argument('--days', type=str)
+
+    def handle(self, *args, **options):
+        username = options['username']
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'User "{username}" does not exist.'))
+            return
+
+        params = {
+            key: options[key]
+            for key in ('type', 'category', 'start', 'end', 'period', 'year', 'month', 'quarter', 'days')
+            if options[key]
+        }
+        lines = iter_export(user, params, options['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+                handle.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f'Exported to {options["output"]}'))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
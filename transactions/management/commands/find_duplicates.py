@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from transactions.dedup import iter_duplicate_groups
+from transactions.models import currency_symbol
+
+class Command(BaseCommand):
+    help = 'List transactions that share a fingerprint (same date, amount, type and description)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', type=str, help='Usernames to scan (default: all users)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Fingerprint groups fetched per pass')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total_groups = 0
+        for user in users.iterator():
+            for ids, first in iter_duplicate_groups(user, chunk_size=options['chunk_size']):
+                total_groups += 1
+                self.stdout.write(
+                    f'{user.username}: {first["date"]} {first["type"]} {currency_symbol(first["currency"])}{first["amount"]} '
+                    f'"{first["description"] or ""}" x{len(ids)} (ids {", ".join(map(str, ids))})'
+                )
+
+        if total_groups:
+            self.stdout.write(self.style.WARNING(f'\nDuplicate groups found: {total_groups}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nNo duplicates found'))
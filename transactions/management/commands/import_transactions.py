@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from transactions.importers import DEFAULT_CHUNK_SIZE, FORMAT_CHOICES, import_transactions, open_text
+
+class Command(BaseCommand):
+    help = 'Import transactions for a user from a CSV, OFX or QIF file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='Username to import transactions for')
+        parser.add_argument('path', type=str, help='Path to the statement file')
+        parser.add_argument('--format', choices=[choice for choice, _ in FORMAT_CHOICES], help='File format (default: from the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per bulk insert')
+        parser.add_argument('--create-categories', action='store_true', help='Create categories that do not exist yet')
+        parser.add_argument('--allow-duplicates', action='store_true', help='Import rows that match existing transactions instead of skipping them')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        username = options['username']
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'User "{username}" does not exist.'))
+            return
+
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower().replace('qfx', 'ofx')
+        if file_format not in dict(FORMAT_CHOICES):
+            raise CommandError(f'Cannot tell the format of "{path}"; pass --format.')
+
+        try:
+            with open(path, 'rb') as handle:
+                report = import_transactions(
+                    user,
+                    open_text(handle),
+                    file_format=file_format,
+                    chunk_size=options['chunk_size'],
+                    create_missing=options['create_categories'],
+                    dry_run=options['dry_run'],
+                    on_duplicate='allow' if options['allow_duplicates'] else 'skip',
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for line, error in report.errors:
+            self.stdout.write(self.style.ERROR(f'Row {line}: {error}'))
+        if report.error_count > len(report.errors):
+            self.stdout.write(self.style.ERROR(f'...and {report.error_count - len(report.errors)} more errors'))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{verb} {report.created} of {report.rows} rows '
+            f'({report.error_count} errors, {report.duplicates} duplicates) in {report.elapsed:.2f}s, '
+            f'{report.rows_per_second:,.0f} rows/sec'
+        ))
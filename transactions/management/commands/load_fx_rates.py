@@ -0,0 +1,47 @@
+from functools import reduce
+from operator import or_
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db.models import Q
+from transactions.balances import rebuild_balance_snapshots
+from transactions.budgets import rebuild_budget_spend
+from transactions.fx import load_rates, reconvert
+from transactions.models import Budget, Transaction
+from transactions.rollups import rebuild_rollups
+from transactions.signals import transactions_bulk_changed
+
+class Command(BaseCommand):
+    help = 'Load exchange rates from a CSV with date, currency and rate columns (value of one unit in the base currency)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Path to the rates CSV')
+        parser.add_argument('--rebuild', action='store_true', help='Reconvert the transactions the new rates apply to, and recompute their users\' rollups, balance snapshots and budgets')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+                earliest = load_rates(handle)
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded rates for {", ".join(sorted(earliest)) or "no currencies"}'
+        ))
+        if not options['rebuild'] or not earliest:
+            return
+
+        # A rate applies to its own date and later ones, until the next rate
+        applies = reduce(or_, (Q(currency=currency, date__gte=day) for currency, day in earliest.items()))
+        user_ids = Transaction.objects.filter(applies).values('user_id').distinct()
+        for user in User.objects.filter(pk__in=user_ids).order_by('pk').iterator():
+            # Without --rebuild, stored amounts keep the rates they were written with
+            reconvert(Transaction.objects.filter(applies, user=user))
+            rebuild_rollups(user)
+            rebuild_balance_snapshots(user)
+            for budget in Budget.objects.filter(user=user):
+                rebuild_budget_spend(budget)
+            transactions_bulk_changed.send(sender=Transaction, user_id=user.pk)
+            self.stdout.write(self.style.SUCCESS(f'{user.username}: rebuilt converted totals'))
@@ -0,0 +1,35 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from transactions.recurring import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, materialize_due
+
+class Command(BaseCommand):
+    help = 'Create the transactions of every recurring schedule that has come due; safe to re-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', type=str, help='Materialize occurrences up to this date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Schedules per database transaction')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        through = None
+        if options['through']:
+            try:
+                through = date.fromisoformat(options['through'])
+            except ValueError:
+                raise CommandError(f'Invalid date "{options["through"]}"; use YYYY-MM-DD.')
+
+        report = materialize_due(
+            through=through,
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+        )
+        for pk, error in report.errors:
+            self.stdout.write(self.style.ERROR(f'Schedule {pk}: {error}'))
+        if report.unconvertible > len(report.errors):
+            self.stdout.write(self.style.ERROR(f'...and {report.unconvertible - len(report.errors)} more errors'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Materialized {report.created} transactions from {report.schedules} schedules '
+            f'({report.skipped} already present, {report.unconvertible} held back without a rate) '
+            f'in {report.elapsed:.2f}s'
+        ))
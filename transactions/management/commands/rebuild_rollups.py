@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from transactions.models import Transaction
+from transactions.rollups import rebuild_rollups, verify_rollups
+from transactions.signals import transactions_bulk_changed
+
+class Command(BaseCommand):
+    help = 'Backfill or verify the monthly transaction rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', type=str, help='Usernames to process (default: all users)')
+        parser.add_argument('--verify', action='store_true', help='Only report rollups that differ from the transactions')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        mismatched_users = 0
+        for user in users.iterator():
+            if options['verify']:
+                mismatches = verify_rollups(user)
+                if mismatches:
+                    mismatched_users += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'{user.username}: {len(mismatches)} rollup rows out of date'
+                    ))
+            else:
+                count = rebuild_rollups(user)
+                # Cached dashboards hold totals read from the old rows
+                transactions_bulk_changed.send(sender=Transaction, user_id=user.pk)
+                self.stdout.write(self.style.SUCCESS(f'{user.username}: rebuilt {count} rollup rows'))
+
+        if options['verify']:
+            if mismatched_users:
+                self.stdout.write(self.style.ERROR(f'\nUsers with stale rollups: {mismatched_users}'))
+            else:
+                self.stdout.write(self.style.SUCCESS('\nAll rollups match the transactions'))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from transactions import synthetic
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, categories and transactions with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scale', type=str, help=f'Row count or one of: {", ".join(synthetic.SCALES)}')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible datasets')
+        parser.add_argument('--clear', action='store_true', help='Delete existing synthetic data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = synthetic.clear()
+            self.stdout.write(f'Deleted {deleted} existing synthetic rows')
+
+        started = time.monotonic()
+        users = synthetic.seed(options['scale'], options['seed'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSeeded {options["scale"]} transactions for {len(users)} users in {time.monotonic() - started:.1f}s'
+        ))
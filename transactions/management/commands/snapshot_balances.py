@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from transactions.balances import rebuild_balance_snapshots, verify_balance_snapshots
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) month-end balance snapshots; run after each month closes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', type=str, help='Usernames to process (default: all users)')
+        parser.add_argument('--verify', action='store_true', help='Only report snapshots that differ from the transactions')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        mismatched_users = 0
+        for user in users.iterator():
+            if options['verify']:
+                mismatches = verify_balance_snapshots(user)
+                if mismatches:
+                    mismatched_users += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'{user.username}: {len(mismatches)} snapshots out of date'
+                    ))
+            else:
+                count = rebuild_balance_snapshots(user)
+                self.stdout.write(self.style.SUCCESS(f'{user.username}: {count} balance snapshots'))
+
+        if options['verify']:
+            if mismatched_users:
+                self.stdout.write(self.style.ERROR(f'\nUsers with stale snapshots: {mismatched_users}'))
+            else:
+                self.stdout.write(self.style.SUCCESS('\nAll balance snapshots match the transactions'))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.27 on 2026-10-18 01:49
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_monthly_summaries(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+    rows = Transaction.objects.annotate(
+        year=models.functions.ExtractYear('date'),
+        month=models.functions.ExtractMonth('date'),
+    ).values('user_id', 'year', 'month', 'type', 'category_id').annotate(
+        total=models.Sum('amount'),
+        count=models.Count('id'),
+    ).order_by()
+    MonthlySummary.objects.bulk_create(
+        (MonthlySummary(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Monthly summaries',
+                'unique_together': {('user', 'year', 'month', 'type', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_monthly_summaries, migrations.RunPython.noop),
+    ]
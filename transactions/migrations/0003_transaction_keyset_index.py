@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_monthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='transaction_user_id_301267_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-18 01:54
+
+from decimal import Decimal
+import hashlib
+from django.db import migrations, models
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Frozen copy of transactions.models.make_fingerprint
+    Transaction = apps.get_model('transactions', 'Transaction')
+    batch = []
+    for txn in Transaction.objects.only('user_id', 'date', 'amount', 'type', 'description').iterator(chunk_size=2000):
+        amount = Decimal(str(txn.amount)).quantize(Decimal('0.01'))
+        description = ' '.join((txn.description or '').lower().split())
+        key = f'{txn.user_id}|{txn.date.isoformat()}|{amount}|{txn.type}|{description}'
+        txn.fingerprint = hashlib.sha256(key.encode()).hexdigest()
+        batch.append(txn)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'fingerprint'], name='transaction_user_id_3ec235_idx'),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
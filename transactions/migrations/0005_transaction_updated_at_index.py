@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at'], name='transaction_user_id_0bee21_idx'),
+        ),
+    ]
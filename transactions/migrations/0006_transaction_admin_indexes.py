@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+# Serves the admin's description__istartswith search, which PostgreSQL
+# compiles to UPPER("description"::text) LIKE UPPER('term%')
+DESCRIPTION_PREFIX_INDEX = 'transaction_description_prefix_idx'
+
+
+def create_description_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {DESCRIPTION_PREFIX_INDEX} '
+            'ON transactions_transaction (UPPER(description::text) text_pattern_ops)'
+        )
+
+
+def drop_description_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {DESCRIPTION_PREFIX_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_transaction_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='transaction_admin_order_idx'),
+        ),
+        migrations.RunPython(create_description_prefix_index, drop_description_prefix_index),
+    ]
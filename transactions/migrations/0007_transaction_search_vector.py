@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:06
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# GIN indexes are PostgreSQL-only, so they are created here rather than in
+# Transaction.Meta.indexes; other databases keep the column empty and search
+# with substring matches (see search.py)
+FORWARD_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS transaction_search_vector_idx '
+    'ON transactions_transaction USING GIN (search_vector)',
+    'CREATE INDEX IF NOT EXISTS transaction_description_trgm_idx '
+    'ON transactions_transaction USING GIN (description gin_trgm_ops)',
+    # Backfill; must match search.search_vector()
+    "UPDATE transactions_transaction AS t SET search_vector = "
+    "to_tsvector('simple', COALESCE(t.description, '')) || to_tsvector('simple', COALESCE(c.name, '')) "
+    "FROM transactions_category AS c WHERE c.id = t.category_id",
+]
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS transaction_description_trgm_idx',
+    'DROP INDEX IF EXISTS transaction_search_vector_idx',
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in FORWARD_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in REVERSE_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:35
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_budgets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='currency',
+            field=models.CharField(choices=[('INR', 'INR - Indian Rupee'), ('USD', 'USD - US Dollar'), ('EUR', 'EUR - Euro'), ('GBP', 'GBP - British Pound'), ('AED', 'AED - UAE Dirham'), ('SGD', 'SGD - Singapore Dollar'), ('AUD', 'AUD - Australian Dollar'), ('CAD', 'CAD - Canadian Dollar'), ('JPY', 'JPY - Japanese Yen'), ('CHF', 'CHF - Swiss Franc')], default='INR', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(choices=[('INR', 'INR - Indian Rupee'), ('USD', 'USD - US Dollar'), ('EUR', 'EUR - Euro'), ('GBP', 'GBP - British Pound'), ('AED', 'AED - UAE Dirham'), ('SGD', 'SGD - Singapore Dollar'), ('AUD', 'AUD - Australian Dollar'), ('CAD', 'CAD - Canadian Dollar'), ('JPY', 'JPY - Japanese Yen'), ('CHF', 'CHF - Swiss Franc')], default='INR', max_length=3),
+        ),
+        migrations.CreateModel(
+            name='FXRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('INR', 'INR - Indian Rupee'), ('USD', 'USD - US Dollar'), ('EUR', 'EUR - Euro'), ('GBP', 'GBP - British Pound'), ('AED', 'AED - UAE Dirham'), ('SGD', 'SGD - Singapore Dollar'), ('AUD', 'AUD - Australian Dollar'), ('CAD', 'CAD - Canadian Dollar'), ('JPY', 'JPY - Japanese Yen'), ('CHF', 'CHF - Swiss Franc')], max_length=3)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, validators=[django.core.validators.MinValueValidator(Decimal('1E-8'))])),
+            ],
+            options={
+                'verbose_name': 'FX rate',
+                'unique_together': {('currency', 'date')},
+            },
+        ),
+    ]
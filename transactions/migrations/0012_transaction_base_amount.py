@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:12
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def backfill_base_amounts(apps, schema_editor):
+    # Frozen copy of transactions.fx.converted_amount, one UPDATE per case
+    Transaction = apps.get_model('transactions', 'Transaction')
+    FXRate = apps.get_model('transactions', 'FXRate')
+    rates = FXRate.objects.filter(currency=OuterRef('currency'), date__lte=OuterRef('date'))
+    rate = Subquery(
+        rates.order_by('-date').values('rate')[:1],
+        output_field=DecimalField(max_digits=18, decimal_places=8),
+    )
+    Transaction.objects.filter(currency='INR').update(base_amount=F('amount'))
+    # Rows without a rate could not be converted before either; they keep 0
+    Transaction.objects.exclude(currency='INR').filter(Exists(rates)).update(
+        base_amount=Round(F('amount') * rate, 2),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0011_currency_fxrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='base_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_base_amounts, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
-from django.core.validators import MinValueValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from decimal import Decimal
+import hashlib
+from .schedules import iter_occurrences
 
 class Category(models.Model):
     TYPE_CHOICES = [
@@ -26,6 +30,46 @@ class Category(models.Model):
         return f"{self.name} ({self.type})"
 
 
+# Rollups, balance snapshots, budgets and dashboard totals are kept in the
+# base currency; other amounts are converted at the rate for their date (fx.py)
+BASE_CURRENCY = 'INR'
+CURRENCY_CHOICES = [
+    ('INR', 'INR - Indian Rupee'),
+    ('USD', 'USD - US Dollar'),
+    ('EUR', 'EUR - Euro'),
+    ('GBP', 'GBP - British Pound'),
+    ('AED', 'AED - UAE Dirham'),
+    ('SGD', 'SGD - Singapore Dollar'),
+    ('AUD', 'AUD - Australian Dollar'),
+    ('CAD', 'CAD - Canadian Dollar'),
+    ('JPY', 'JPY - Japanese Yen'),
+    ('CHF', 'CHF - Swiss Franc'),
+]
+CURRENCY_SYMBOLS = {
+    'INR': '₹',
+    'USD': '$',
+    'EUR': '€',
+    'GBP': '£',
+    'JPY': '¥',
+}
+
+
+def currency_symbol(currency):
+    return CURRENCY_SYMBOLS.get(currency, f'{currency} ')
+
+
+def make_fingerprint(user_id, date, amount, transaction_type, description, currency=BASE_CURRENCY):
+    """Stable hash identifying a transaction's content, ignoring case and spacing"""
+    date = Transaction._meta.get_field('date').to_python(date)
+    amount = Decimal(str(amount)).quantize(Decimal('0.01'))
+    description = ' '.join((description or '').lower().split())
+    key = f'{user_id}|{date.isoformat()}|{amount}|{transaction_type}|{description}'
+    # Base currency rows keep the fingerprints they had before currencies existed
+    if currency != BASE_CURRENCY:
+        key = f'{key}|{currency}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
 class Transaction(models.Model):
     TYPE_CHOICES = [
         ('income', 'Income'),
@@ -40,10 +84,26 @@ class Transaction(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.01'))]
     )
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default=BASE_CURRENCY)
+    # amount in BASE_CURRENCY at the rate for date, fixed on write so rollup
+    # deltas and SQL totals add up the same value; see fx.py
+    base_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), editable=False)
     description = models.TextField(blank=True, null=True)
     date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Hash of the normalized (user, date, amount, type, description), see dedup.py
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
+    # Description and category name, kept current on write; see search.py.
+    # Only populated (and GIN indexed) on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set on rows generated from a schedule; (recurring, occurrence_date) is
+    # unique so materialize_recurring never inserts an occurrence twice
+    recurring = models.ForeignKey(
+        'RecurringTransaction', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='occurrences',
+    )
+    occurrence_date = models.DateField(null=True, blank=True, editable=False)
     
     class Meta:
         ordering = ['-date', '-created_at']
@@ -51,7 +111,262 @@ class Transaction(models.Model):
             models.Index(fields=['user', 'date']),
             models.Index(fields=['user', 'type', 'date']),
             models.Index(fields=['user', 'category']),
+            # Keyset pagination key, see pagination.py
+            models.Index(fields=['user', '-date', '-created_at', '-id']),
+            models.Index(fields=['user', 'fingerprint']),
+            # Latest change per user, for dashboard ETags
+            models.Index(fields=['user', 'updated_at']),
+            # Admin changelist ordering across all users
+            models.Index(fields=['-date', '-created_at', '-id'], name='transaction_admin_order_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['recurring', 'occurrence_date'], name='transaction_recurring_occurrence_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.type.title()}: {self.currency_symbol}{self.amount} - {self.category.name} ({self.date})"
+    
+    @property
+    def currency_symbol(self):
+        return currency_symbol(self.currency)
+    
+    def compute_fingerprint(self):
+        return make_fingerprint(self.user_id, self.date, self.amount, self.type, self.description, self.currency)
+    
+    def compute_base_amount(self, rate=None):
+        """amount in BASE_CURRENCY; raises fx.RateNotFound. rate is a
+        get_rate-like callable, e.g. a batch's fx.rate_lookup()"""
+        # fx imports this module
+        from .fx import get_rate, to_base
+        amount = self._meta.get_field('amount').to_python(self.amount)
+        day = self._meta.get_field('date').to_python(self.date)
+        return to_base(amount, self.currency, day, rate or get_rate)
+    
+    def clean(self):
+        # save() converts the amount, so a missing rate is a field error here
+        # rather than a crash there
+        if self.currency and self.date:
+            from .fx import RateNotFound, get_rate
+            try:
+                get_rate(self.currency, self.date)
+            except RateNotFound as e:
+                raise ValidationError({'currency': str(e)})
+    
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint()
+        self.base_amount = self.compute_base_amount()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'fingerprint', 'base_amount'}
+        # Keep the row and its rollup update (see signals.py) in one transaction
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class MonthlySummary(models.Model):
+    """Per-month rollup of transaction totals, maintained on every write"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_summaries')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='monthly_summaries')
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Monthly summaries'
+        unique_together = ['user', 'year', 'month', 'type', 'category']
+    
+    def __str__(self):
+        return f"{self.user} {self.year}-{self.month:02d} {self.type} {self.category_id}: ₹{self.total}"
+
+
+class BalanceSnapshot(models.Model):
+    """A user's net balance (income minus expenses) at the close of a month.
+
+    Built by the snapshot_balances command and kept current by every later
+    write dated on or before as_of; see balances.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_snapshots')
+    as_of = models.DateField()
+    balance = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0'))
+    
+    class Meta:
+        unique_together = ['user', 'as_of']
+    
+    def __str__(self):
+        return f"{self.user} {self.as_of}: ₹{self.balance}"
+
+
+class RecurringTransaction(models.Model):
+    """A schedule (rent, salary, subscriptions) that materialize_recurring
+    turns into ordinary transactions; see recurring.py.
+
+    Modelled on an RRULE with FREQ, INTERVAL, BYMONTHDAY and UNTIL: an
+    occurrence every `interval` days, weeks, months or years from
+    start_date. Monthly and yearly rules fall on day_of_month (default:
+    start_date's day), moved back to the last day of shorter months.
+    """
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+        ('yearly', 'Yearly'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_transactions')
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='recurring_transactions')
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default=BASE_CURRENCY)
+    description = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='monthly')
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    day_of_month = models.PositiveSmallIntegerField(
+        blank=True, null=True, validators=[MinValueValidator(1), MaxValueValidator(31)]
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, null=True)
+    # First occurrence not yet materialized; None once the schedule has ended
+    next_occurrence = models.DateField(blank=True, null=True, editable=False)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['next_occurrence']
+        indexes = [
+            # Due schedules, see materialize_due()
+            models.Index(fields=['active', 'next_occurrence']),
+            models.Index(fields=['user', 'active']),
         ]
     
     def __str__(self):
-        return f"{self.type.title()}: ₹{self.amount} - {self.category.name} ({self.date})"
+        return f"{self.get_frequency_display()} {self.type}: {currency_symbol(self.currency)}{self.amount} - {self.category.name}"
+    
+    def iter_occurrences(self, since):
+        return iter_occurrences(
+            self.frequency, self.interval, self.start_date, since,
+            day_of_month=self.day_of_month, end_date=self.end_date,
+        )
+    
+    def first_occurrence(self, since):
+        return next(self.iter_occurrences(since), None)
+    
+    def clean(self):
+        # The admin's category autocomplete lists every user's categories
+        if self.category_id and self.user_id and self.category.user_id != self.user_id:
+            raise ValidationError({'category': "Choose one of the user's own categories."})
+        if self.category_id and self.type and self.category.type != self.type:
+            raise ValidationError({'category': f'Choose a {self.type} category.'})
+        day = self.next_occurrence or self.start_date
+        if self.currency and day:
+            # fx imports this module
+            from .fx import RateNotFound, get_rate
+            try:
+                get_rate(self.currency, day)
+            except RateNotFound as e:
+                raise ValidationError({'currency': str(e)})
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.next_occurrence is None:
+            self.next_occurrence = self.first_occurrence(self.start_date)
+        super().save(*args, **kwargs)
+
+
+class Budget(models.Model):
+    """A spending limit for one expense category per month, quarter or year.
+
+    Spend is tracked per period in BudgetSpend, kept current on every
+    transaction write; see budgets.py.
+    """
+    PERIOD_CHOICES = [
+        ('monthly', 'Monthly'),
+        ('quarterly', 'Quarterly'),
+        ('yearly', 'Yearly'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='budgets',
+        limit_choices_to={'type': 'expense'},
+    )
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default='monthly')
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'category', 'period']
+    
+    def __str__(self):
+        return f"{self.category.name} {self.period}: ₹{self.amount}"
+    
+    def clean(self):
+        # The admin's category autocomplete lists every user's categories,
+        # and spend is only tracked for the budget owner's own
+        if self.category_id and self.user_id and self.category.user_id != self.user_id:
+            raise ValidationError({'category': "Choose one of the user's own categories."})
+        if self.category_id and self.category.type != 'expense':
+            raise ValidationError({'category': 'Budgets apply to expense categories only.'})
+
+
+class BudgetSpend(models.Model):
+    """Expenses in a budget's category during one of its periods"""
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='spend')
+    period_start = models.DateField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    # Highest threshold (percent of the budget) reached so far this period
+    alerted_threshold = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['budget', 'period_start']
+    
+    def __str__(self):
+        return f"{self.budget} from {self.period_start}: ₹{self.spent}"
+
+
+class BudgetAlert(models.Model):
+    """Raised when a write takes a budget's spend past a threshold"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budget_alerts')
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='alerts')
+    period_start = models.DateField()
+    threshold = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    limit = models.DecimalField(max_digits=10, decimal_places=2)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.budget} reached {self.threshold}% (₹{self.spent} of ₹{self.limit})"
+
+
+class FXRate(models.Model):
+    """Value of one unit of currency in BASE_CURRENCY on a date.
+
+    Loaded from CSV by load_fx_rates; a transaction converts at the latest
+    rate on or before its date, found through the (currency, date) index.
+    """
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8, validators=[MinValueValidator(Decimal('0.00000001'))])
+    
+    class Meta:
+        verbose_name = 'FX rate'
+        unique_together = ['currency', 'date']
+    
+    def __str__(self):
+        return f"{self.currency} {self.date}: {self.rate} {BASE_CURRENCY}"
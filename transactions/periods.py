@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from django.db.models import Q
+from django.utils import timezone
+
+# Periods are half-open [start, end) date ranges so that filters compile to
+# "date >= start AND date < end" and can use the (user, ..., date) indexes,
+# unlike date__year/date__month which become EXTRACT() expressions.
+
+
+def shift_month(year, month, offset):
+    """Return (year, month) moved by offset calendar months"""
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def month_range(year, month):
+    return date(year, month, 1), date(*shift_month(year, month, 1), 1)
+
+
+def quarter_range(year, quarter):
+    first_month = (quarter - 1) * 3 + 1
+    return date(year, first_month, 1), date(*shift_month(year, first_month, 3), 1)
+
+
+def year_range(year):
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def year_to_date(today=None):
+    today = today or timezone.localdate()
+    return date(today.year, 1, 1), today + timedelta(days=1)
+
+
+def last_n_days(days, today=None):
+    """The last N days, today included"""
+    today = today or timezone.localdate()
+    return today - timedelta(days=days - 1), today + timedelta(days=1)
+
+
+def date_range_q(start, end, field='date'):
+    """Q for field >= start AND field < end; either bound may be None"""
+    q = Q()
+    if start is not None:
+        q &= Q(**{f'{field}__gte': start})
+    if end is not None:
+        q &= Q(**{f'{field}__lt': end})
+    return q
+
+
+def filter_period(queryset, period, field='date'):
+    if period is None:
+        return queryset
+    return queryset.filter(date_range_q(*period, field=field))
+
+
+def period_from_params(params, today=None):
+    """Parse list filter parameters into a (start, end) range, or None.
+
+    Supported forms:
+        ?month=3&year=2024
+        ?period=month&year=2024&month=3
+        ?period=quarter&year=2024&quarter=2
+        ?period=year&year=2024
+        ?period=ytd
+        ?period=last_days&days=30
+        ?start=2024-01-01&end=2024-03-31   (end inclusive)
+    Invalid or incomplete values are ignored.
+    """
+    today = today or timezone.localdate()
+    period = params.get('period')
+    try:
+        if period == 'ytd':
+            return year_to_date(today)
+        if period == 'last_days':
+            days = int(params.get('days', 30))
+            return last_n_days(days, today) if days > 0 else None
+        if period == 'quarter':
+            quarter = int(params['quarter'])
+            if not 1 <= quarter <= 4:
+                return None
+            return quarter_range(int(params['year']), quarter)
+        if period == 'year':
+            return year_range(int(params['year']))
+        if params.get('start') or params.get('end'):
+            start = date.fromisoformat(params['start']) if params.get('start') else None
+            end = date.fromisoformat(params['end']) + timedelta(days=1) if params.get('end') else None
+            return start, end
+        if params.get('month') and params.get('year'):
+            return month_range(int(params['year']), int(params['month']))
+    except (KeyError, ValueError, OverflowError):
+        return None
+    return None
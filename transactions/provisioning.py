@@ -0,0 +1,68 @@
+from .models import Category
+from .category_cache import invalidate_user_categories
+
+# The canonical default categories for every new user: (name, type, icon)
+DEFAULT_CATEGORIES = [
+    # Default income categories
+    ('Salary', 'income', 'briefcase'),
+    ('Freelance', 'income', 'laptop'),
+    ('Investment', 'income', 'trending-up'),
+    ('Other Income', 'income', 'cash'),
+    # Default expense categories
+    ('Food', 'expense', 'restaurant'),
+    ('Transport', 'expense', 'car'),
+    ('Rent', 'expense', 'home'),
+    ('Utilities', 'expense', 'bolt'),
+    ('Shopping', 'expense', 'bag'),
+    ('Entertainment', 'expense', 'film'),
+    ('Healthcare', 'expense', 'heart'),
+    ('Education', 'expense', 'book'),
+    ('Other Expense', 'expense', 'more-horizontal'),
+]
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def provision_default_categories(user_ids):
+    """Create any missing default categories for the given users.
+
+    Uses one query to find what already exists and one bulk insert
+    (ignore_conflicts against the unique (user, name, type) constraint covers
+    concurrent provisioning). Returns the created (user_id, name, type) keys.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    existing = set(Category.objects.filter(
+        user_id__in=user_ids,
+        name__in={name for name, _, _ in DEFAULT_CATEGORIES},
+    ).values_list('user_id', 'name', 'type'))
+
+    missing = [
+        Category(user_id=user_id, name=name, type=category_type, icon=icon)
+        for user_id in user_ids
+        for name, category_type, icon in DEFAULT_CATEGORIES
+        if (user_id, name, category_type) not in existing
+    ]
+    Category.objects.bulk_create(missing, ignore_conflicts=True)
+    if missing:
+        invalidate_user_categories(*{category.user_id for category in missing})
+    return [(category.user_id, category.name, category.type) for category in missing]
+
+
+def provision_users_in_batches(users, batch_size=DEFAULT_BATCH_SIZE):
+    """Provision defaults for a user queryset, batch_size users at a time.
+
+    Yields (batch_user_count, created_count) after each batch.
+    """
+    last_pk = 0
+    while True:
+        user_ids = list(
+            users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return
+        created = provision_default_categories(user_ids)
+        yield len(user_ids), len(created)
+        last_pk = user_ids[-1]
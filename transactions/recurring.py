@@ -0,0 +1,159 @@
+import time
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from .fx import RateNotFound, rate_lookup
+from .models import RecurringTransaction, Transaction
+from .search import update_search_vectors
+from .signals import transactions_bulk_changed
+from . import balances, budgets, rollups
+
+# Schedules loaded and advanced together, in one database transaction
+DEFAULT_BATCH_SIZE = 1000
+# Transaction rows per bulk insert
+DEFAULT_CHUNK_SIZE = 5000
+# Only the first errors are kept in memory; the rest are just counted
+MAX_REPORTED_ERRORS = 1000
+
+
+class MaterializeReport:
+    """Running totals for one materialize_due() run"""
+
+    def __init__(self):
+        self.schedules = 0
+        self.created = 0
+        self.skipped = 0
+        # Schedules held back for lack of an exchange rate
+        self.unconvertible = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def add_error(self, rule, message):
+        self.unconvertible += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((rule.pk, message))
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+
+
+def due_schedules(through):
+    """Active schedules with an occurrence on or before through"""
+    return RecurringTransaction.objects.filter(active=True, next_occurrence__lte=through)
+
+
+def plan_occurrences(rule, through):
+    """(dates to materialize, next occurrence after through) for one schedule"""
+    dates = []
+    for day in rule.iter_occurrences(rule.next_occurrence):
+        if day > through:
+            return dates, day
+        dates.append(day)
+    return dates, None
+
+
+def build_occurrence(rule, day, rate=None):
+    txn = Transaction(
+        user_id=rule.user_id,
+        category_id=rule.category_id,
+        type=rule.type,
+        amount=rule.amount,
+        currency=rule.currency,
+        description=rule.description,
+        date=day,
+        recurring_id=rule.pk,
+        occurrence_date=day,
+    )
+    # bulk_create skips save(), so set the fingerprint and base_amount here
+    txn.fingerprint = txn.compute_fingerprint()
+    txn.base_amount = txn.compute_base_amount(rate)
+    return txn
+
+
+def write_chunk(chunk):
+    Transaction.objects.bulk_create(chunk)
+    rollups.record_bulk_create(chunk)
+    balances.record_bulk_create(chunk)
+    budgets.record_bulk_create(chunk)
+    update_search_vectors(Transaction.objects.filter(pk__in=[txn.pk for txn in chunk]))
+
+
+def advance_schedules(rules):
+    """Store the rules' next_occurrence with one UPDATE per distinct date;
+    a batch's schedules share few dates, and bulk_update's CASE per row is
+    far slower to build"""
+    by_date = {}
+    for rule in rules:
+        by_date.setdefault(rule.next_occurrence, []).append(rule.pk)
+    for next_occurrence, pks in by_date.items():
+        RecurringTransaction.objects.filter(pk__in=pks).update(next_occurrence=next_occurrence)
+
+
+def materialize_batch(rules, through, report, chunk_size=DEFAULT_CHUNK_SIZE, rate=None):
+    """Insert the due occurrences of rules and advance their next_occurrence.
+
+    Occurrences already present under the (recurring, occurrence_date) key,
+    e.g. from a run that died before committing the schedule update, are
+    skipped with one indexed lookup for the whole batch. A schedule in a
+    currency without a rate for its next occurrence is reported and left
+    due, to be picked up once rates are loaded. Returns the ids of the users
+    that got new transactions.
+    """
+    rate = rate or rate_lookup()
+    planned = []
+    for rule in rules:
+        try:
+            # The rate in effect on the first date covers every later one
+            rate(rule.currency, rule.next_occurrence)
+        except RateNotFound as e:
+            report.add_error(rule, str(e))
+            continue
+        dates, rule.next_occurrence = plan_occurrences(rule, through)
+        planned.extend((rule, day) for day in dates)
+
+    existing = set()
+    if planned:
+        existing = set(Transaction.objects.filter(
+            recurring_id__in=[rule.pk for rule in rules],
+            occurrence_date__gte=min(day for _, day in planned),
+        ).values_list('recurring_id', 'occurrence_date'))
+
+    rows = [build_occurrence(rule, day, rate) for rule, day in planned if (rule.pk, day) not in existing]
+    with db_transaction.atomic():
+        for start in range(0, len(rows), chunk_size):
+            write_chunk(rows[start:start + chunk_size])
+        advance_schedules(rules)
+
+    report.schedules += len(rules)
+    report.created += len(rows)
+    report.skipped += len(planned) - len(rows)
+    return {txn.user_id for txn in rows}
+
+
+def materialize_due(through=None, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Materialize every occurrence due on or before through (default today)
+    for all users; returns a MaterializeReport.
+
+    Due dates are computed in memory from each schedule's rule, and
+    schedules are processed batch_size at a time, each batch committing its
+    rows together with the schedules' new next_occurrence. Running it again
+    finds nothing due, and a run that stops part way resumes with the
+    batches it did not commit.
+    """
+    through = through or timezone.localdate()
+    report = MaterializeReport()
+    rate = rate_lookup()
+    changed_users = set()
+    last_pk = 0
+    try:
+        while True:
+            rules = list(due_schedules(through).filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not rules:
+                break
+            changed_users |= materialize_batch(rules, through, report, chunk_size, rate)
+            last_pk = rules[-1].pk
+    finally:
+        for user_id in changed_users:
+            transactions_bulk_changed.send(sender=Transaction, user_id=user_id)
+        report.finish()
+    return report
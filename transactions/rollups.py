@@ -0,0 +1,183 @@
+import threading
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from .models import MonthlySummary, Transaction
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspend_rollups():
+    """Skip per-row rollup, balance snapshot and budget maintenance in this thread,
+    e.g. around a bulk delete that is followed by rebuild_rollups() or
+    removes the derived rows anyway"""
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def rollups_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def snapshot(instance):
+    """The fields of a transaction that determine its rollup row, with the
+    amount in the base currency as stored in base_amount"""
+    return {
+        'user_id': instance.user_id,
+        'category_id': instance.category_id,
+        'type': instance.type,
+        'date': Transaction._meta.get_field('date').to_python(instance.date),
+        'amount': Transaction._meta.get_field('base_amount').to_python(instance.base_amount),
+    }
+
+
+def load_snapshot(pk):
+    """Snapshot of a transaction as currently stored in the database"""
+    stored = Transaction.objects.filter(pk=pk).values(
+        'user_id', 'category_id', 'type', 'date', 'base_amount'
+    ).first()
+    if stored:
+        stored['amount'] = stored.pop('base_amount')
+    return stored
+
+
+def apply_delta(user_id, category_id, transaction_type, day, amount, count):
+    """Add amount/count to the rollup row for one user, month, type and category"""
+    lookup = {
+        'user_id': user_id,
+        'category_id': category_id,
+        'type': transaction_type,
+        'year': day.year,
+        'month': day.month,
+    }
+    with db_transaction.atomic():
+        updated = MonthlySummary.objects.filter(**lookup).update(
+            total=F('total') + amount,
+            count=F('count') + count,
+        )
+        if not updated and (count > 0 or (count == 0 and amount)):
+            # An amount-only delta (an edited amount) can find its row missing
+            # too, e.g. after a suspended bulk write
+            try:
+                with db_transaction.atomic():
+                    MonthlySummary.objects.create(total=amount, count=count, **lookup)
+            except IntegrityError:
+                # Another writer created the row first
+                MonthlySummary.objects.filter(**lookup).update(
+                    total=F('total') + amount,
+                    count=F('count') + count,
+                )
+        elif count < 0:
+            MonthlySummary.objects.filter(count__lte=0, **lookup).delete()
+
+
+def record_change(previous, current):
+    """Move a transaction's contribution from its previous to its current rollup row"""
+    if previous and current and all(
+        previous[key] == current[key] for key in ('user_id', 'category_id', 'type')
+    ) and (previous['date'].year, previous['date'].month) == (current['date'].year, current['date'].month):
+        if previous['amount'] != current['amount']:
+            apply_delta(
+                current['user_id'], current['category_id'], current['type'],
+                current['date'], current['amount'] - previous['amount'], 0
+            )
+        return
+
+    if previous:
+        apply_delta(
+            previous['user_id'], previous['category_id'], previous['type'],
+            previous['date'], -previous['amount'], -1
+        )
+    if current:
+        apply_delta(
+            current['user_id'], current['category_id'], current['type'],
+            current['date'], current['amount'], 1
+        )
+
+
+def record_bulk_create(transactions):
+    """Apply rows inserted with bulk_create (which skips signals) to the rollup"""
+    deltas = {}
+    for txn in transactions:
+        current = snapshot(txn)
+        key = (
+            current['user_id'], current['category_id'], current['type'],
+            current['date'].year, current['date'].month,
+        )
+        total, count = deltas.get(key, (Decimal('0'), 0))
+        deltas[key] = (total + current['amount'], count + 1)
+
+    for (user_id, category_id, transaction_type, year, month), (total, count) in deltas.items():
+        apply_delta(user_id, category_id, transaction_type, date(year, month, 1), total, count)
+
+
+def compute_rollups(user):
+    """Rollup rows for a user recomputed from the transaction table"""
+    rows = Transaction.objects.filter(user=user).annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).values('year', 'month', 'type', 'category_id').annotate(
+        total=Sum('base_amount'),
+        count=Count('id'),
+    ).order_by()
+
+    return {
+        (row['year'], row['month'], row['type'], row['category_id']): (row['total'], row['count'])
+        for row in rows
+    }
+
+
+def stored_rollups(user):
+    """Rollup rows for a user as currently stored"""
+    rows = MonthlySummary.objects.filter(user=user).values_list(
+        'year', 'month', 'type', 'category_id', 'total', 'count'
+    )
+    return {row[:4]: (row[4], row[5]) for row in rows}
+
+
+def rebuild_rollups(user):
+    """Replace a user's rollup rows with freshly computed ones; returns the row count.
+
+    The user row and their rollup rows are locked before the totals are
+    computed, so concurrent rebuilds take turns and a concurrent write's
+    delta waits for the replacement rows instead of being overwritten.
+    Callers invalidate cached dashboards (transactions_bulk_changed).
+    """
+    with db_transaction.atomic():
+        User.objects.select_for_update().filter(pk=user.pk).exists()
+        list(MonthlySummary.objects.select_for_update().filter(user=user).values_list('pk', flat=True))
+        expected = compute_rollups(user)
+        MonthlySummary.objects.filter(user=user).delete()
+        MonthlySummary.objects.bulk_create([
+            MonthlySummary(
+                user=user,
+                year=year,
+                month=month,
+                type=transaction_type,
+                category_id=category_id,
+                total=total or Decimal('0'),
+                count=count,
+            )
+            for (year, month, transaction_type, category_id), (total, count) in expected.items()
+        ], batch_size=1000)
+    return len(expected)
+
+
+def verify_rollups(user):
+    """Keys whose stored rollup differs from the transaction table"""
+    expected = compute_rollups(user)
+    stored = stored_rollups(user)
+    return sorted(
+        key for key in set(expected) | set(stored)
+        if expected.get(key) != stored.get(key)
+    )
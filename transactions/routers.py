@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Models read from the primary even inside replica views: the session and
+# user must reflect a login that may have just happened
+PRIMARY_ONLY_APPS = {'admin', 'auth', 'contenttypes', 'sessions'}
+PIN_COOKIE = 'db_pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica"""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+    return alias if alias and alias in settings.DATABASES else None
+
+
+@contextmanager
+def reading_from(alias):
+    """Send reads in this context to alias (None: the router's default)"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_replica():
+    return reading_from(replica_alias())
+
+
+def use_primary():
+    """For reads whose results get cached and must not be stale"""
+    return reading_from(DEFAULT_DB_ALIAS)
+
+
+def replica_reads(view):
+    """Mark a view function or class as safe to serve from the read replica"""
+    view.replica_reads = True
+    return view
+
+
+def wants_replica(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'replica_reads', False) or getattr(view_class, 'replica_reads', False)
+
+
+class ReplicaRoutingMiddleware:
+    """Route reads of views marked with replica_reads to the replica.
+
+    Only safe requests are routed, and only when the client has not written
+    in the last DATABASE_REPLICA_PIN_SECONDS: every unsafe request sets a
+    short-lived cookie that pins the client to the primary, so users see
+    their own writes despite replication lag. The context covers template
+    rendering, which is where lazy querysets are evaluated.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # process_view() sets the alias in this context; the token restores
+        # the previous one once the response is rendered
+        token = _read_alias.set(_read_alias.get())
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin_writer(request, response)
+
+    async def __acall__(self, request):
+        # Under ASGI process_view() runs through sync_to_async, which copies
+        # its context changes back into this one
+        token = _read_alias.set(_read_alias.get())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin_writer(request, response)
+
+    def pin_writer(self, request, response):
+        if request.method not in SAFE_METHODS and replica_alias():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and replica_alias()
+            and wants_replica(view_func)
+        ):
+            _read_alias.set(replica_alias())
+
+
+class ReadReplicaRouter:
+    """Reads go where ReplicaRoutingMiddleware (or use_replica) says; writes
+    and migrations always go to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
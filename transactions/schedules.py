@@ -0,0 +1,47 @@
+from calendar import monthrange
+from datetime import date, timedelta
+from .periods import shift_month
+
+# Occurrence dates of recurring schedules, computed in memory. A schedule is
+# described by the RRULE parts FREQ (frequency), INTERVAL, BYMONTHDAY
+# (day_of_month) and UNTIL (end_date), counted from start_date.
+
+DAY_STEPS = {'daily': 1, 'weekly': 7}
+MONTH_STEPS = {'monthly': 1, 'yearly': 12}
+
+
+def clamp_day(year, month, day):
+    """day of the given month, or its last day if the month is shorter"""
+    return date(year, month, min(day, monthrange(year, month)[1]))
+
+
+def iter_occurrences(frequency, interval, start_date, since, day_of_month=None, end_date=None):
+    """Occurrence dates on or after since, in order, up to end_date.
+
+    Jumps straight to the occurrence nearest since instead of stepping from
+    start_date, so a daily schedule started years ago costs the same as a
+    new one.
+    """
+    since = max(since, start_date)
+    if frequency in DAY_STEPS:
+        step = DAY_STEPS[frequency] * interval
+        current = start_date + timedelta(days=-(-(since - start_date).days // step) * step)
+        while end_date is None or current <= end_date:
+            yield current
+            current += timedelta(days=step)
+        return
+
+    if frequency not in MONTH_STEPS:
+        raise ValueError(f'Unknown frequency "{frequency}"')
+    step = MONTH_STEPS[frequency] * interval
+    day = day_of_month or start_date.day
+    months = (since.year - start_date.year) * 12 + since.month - start_date.month
+    offset = months // step * step
+    while True:
+        current = clamp_day(*shift_month(start_date.year, start_date.month, offset), day)
+        if end_date is not None and current > end_date:
+            return
+        if current >= since:
+            yield current
+        offset += step
+
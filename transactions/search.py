@@ -0,0 +1,46 @@
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import F, OuterRef, Q, Subquery
+from .models import Category
+
+# No stemming: descriptions are mostly merchant names, not prose
+SEARCH_CONFIG = 'simple'
+
+
+def supports_full_text(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def search_vector():
+    """tsvector expression over a transaction's description and category name"""
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    return SearchVector('description', config=SEARCH_CONFIG) + SearchVector(category_name, config=SEARCH_CONFIG)
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector for the given transactions (PostgreSQL only)"""
+    if not supports_full_text(queryset.db):
+        return 0
+    return queryset.update(search_vector=search_vector())
+
+
+def search_transactions(queryset, terms):
+    """Filter transactions matching free-text terms.
+
+    On PostgreSQL this matches the GIN-indexed search_vector (websearch
+    syntax: quoted phrases, OR, -exclusions) or a fuzzy trigram match of the
+    description, for misspelt merchant names. Elsewhere it falls back to a
+    substring match on the description and category name.
+    """
+    terms = (terms or '').strip()
+    if not terms:
+        return queryset
+
+    if supports_full_text(queryset.db):
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(
+            Q(search_vector=query) | Q(TrigramWordSimilar(F('description'), terms))
+        )
+
+    return queryset.filter(Q(description__icontains=terms) | Q(category__name__icontains=terms))
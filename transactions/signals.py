@@ -1,46 +1,82 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver, Signal
 from django.contrib.auth.models import User
-from .models import Category
+from .models import Budget, Category, Transaction
+from . import balances, budgets, rollups
+from .provisioning import provision_default_categories
+from .category_cache import invalidate_user_categories
+from .search import update_search_vectors
+
+# Sent after rows are written in bulk (bypassing post_save), with user_id
+transactions_bulk_changed = Signal()
 
 @receiver(post_save, sender=User)
 def create_default_categories(sender, instance, created, **kwargs):
     """Create default categories when a new user is created"""
     if created:
-        # Default income categories
-        income_categories = [
-            {'name': 'Salary', 'icon': 'briefcase'},
-            {'name': 'Freelance', 'icon': 'laptop'},
-            {'name': 'Investment', 'icon': 'trending-up'},
-            {'name': 'Other Income', 'icon': 'cash'},
-        ]
-
-        # Default expense categories
-        expense_categories = [
-            {'name': 'Food', 'icon': 'restaurant'},
-            {'name': 'Transport', 'icon': 'car'},
-            {'name': 'Rent', 'icon': 'home'},
-            {'name': 'Utilities', 'icon': 'bolt'},
-            {'name': 'Shopping', 'icon': 'bag'},
-            {'name': 'Entertainment', 'icon': 'film'},
-            {'name': 'Healthcare', 'icon': 'heart'},
-            {'name': 'Education', 'icon': 'book'},
-            {'name': 'Other Expense', 'icon': 'more-horizontal'},
-        ]
-
-        for cat_data in income_categories:
-            Category.objects.get_or_create(
-                user=instance,
-                name=cat_data['name'],
-                type='income',
-                defaults={'icon': cat_data['icon']}
-            )
-
-        for cat_data in expense_categories:
-            Category.objects.get_or_create(
-                user=instance,
-                name=cat_data['name'],
-                type='expense',
-                defaults={'icon': cat_data['icon']}
-            )
+        provision_default_categories([instance.pk])
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    """Capture the stored row before an update so its rollup can be reversed"""
+    instance._rollup_previous = None
+    if instance.pk and not raw and not rollups.rollups_suspended():
+        instance._rollup_previous = rollups.load_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    """Apply a created or edited transaction to the monthly rollup, balance
+    snapshots and budgets"""
+    if raw or rollups.rollups_suspended():
+        return
+    previous, current = getattr(instance, '_rollup_previous', None), rollups.snapshot(instance)
+    rollups.record_change(previous, current)
+    balances.record_change(previous, current)
+    budgets.record_change(previous, current)
+    instance._rollup_previous = None
+
+
+@receiver(post_save, sender=Transaction)
+def update_search_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refresh the stored search vector when the searchable fields may have changed"""
+    if raw or (update_fields is not None and not {'description', 'category'} & set(update_fields)):
+        return
+    update_search_vectors(Transaction.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    """Remove a deleted transaction from the monthly rollup, balance snapshots and budgets"""
+    if not rollups.rollups_suspended():
+        previous = rollups.snapshot(instance)
+        rollups.record_change(previous, None)
+        balances.record_change(previous, None)
+        budgets.record_change(previous, None)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, raw=False, **kwargs):
+    """Drop the owner's cached category list when a category changes"""
+    if not raw:
+        # Wait for commit so a concurrent reader cannot re-cache the old list
+        user_id = instance.user_id
+        db_transaction.on_commit(lambda: invalidate_user_categories(user_id))
+
+
+@receiver(post_save, sender=Category)
+def update_category_search_vectors(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """A renamed category changes the search vector of all its transactions"""
+    if created or raw or (update_fields is not None and 'name' not in update_fields):
+        return
+    update_search_vectors(instance.transactions.all())
+
 
+@receiver(post_save, sender=Budget)
+def rebuild_spend_on_budget_save(sender, instance, raw=False, **kwargs):
+    """A new or changed budget (category, period, limit) gets its spend recomputed"""
+    if not raw:
+        budgets.rebuild_budget_spend(instance)
@@ -0,0 +1,128 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from .models import Category, Transaction
+from .provisioning import DEFAULT_CATEGORIES, provision_default_categories
+from .balances import rebuild_balance_snapshots
+from .rollups import rebuild_rollups, suspend_rollups
+from .search import update_search_vectors
+from .signals import transactions_bulk_changed
+
+# Named dataset sizes, in transaction rows
+SCALES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '10m': 10_000_000,
+}
+USERNAME_PREFIX = 'synthetic_'
+ROWS_PER_USER = 50_000
+CHUNK_SIZE = 5_000
+HISTORY_DAYS = 365 * 5
+
+MERCHANTS = [
+    'Big Bazaar', 'Swiggy', 'Zomato', 'Uber', 'Ola', 'Amazon', 'Flipkart', 'Netflix',
+    'Airtel', 'Jio', 'BESCOM', 'Apollo Pharmacy', 'PVR Cinemas', 'Reliance Fresh',
+    'Indian Oil', 'Udemy', 'Starbucks', 'DMart', 'Myntra', 'BookMyShow',
+]
+INCOME_WEIGHT = 0.1
+INCOME_RANGE = (5_000, 200_000)
+EXPENSE_RANGE = (50, 5_000)
+
+
+def synthetic_users(count):
+    """Create (or reuse) count synthetic users with their default categories"""
+    usernames = [f'{USERNAME_PREFIX}{i}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    User.objects.bulk_create([
+        User(username=username, password='!')
+        for username in usernames if username not in existing
+    ], batch_size=1000)
+    users = list(User.objects.filter(username__in=usernames).order_by('pk'))
+    # bulk_create skips the post_save signal that normally provisions these
+    provision_default_categories(user.pk for user in users)
+    return users
+
+
+def iter_synthetic_transactions(user, categories, rows, rng, today):
+    """Yield unsaved transactions with a realistic mix of types, amounts and dates"""
+    income = [pk for pk, category_type in categories if category_type == 'income']
+    expense = [pk for pk, category_type in categories if category_type == 'expense']
+    for _ in range(rows):
+        is_income = rng.random() < INCOME_WEIGHT
+        low, high = INCOME_RANGE if is_income else EXPENSE_RANGE
+        amount = Decimal(rng.randint(low * 100, high * 100)) / 100
+        txn = Transaction(
+            user=user,
+            category_id=rng.choice(income if is_income else expense),
+            type='income' if is_income else 'expense',
+            amount=amount.quantize(Decimal('0.01')),
+            description=f'{rng.choice(MERCHANTS)} #{rng.randint(1000, 9999)}',
+            date=today - timedelta(days=rng.randint(0, HISTORY_DAYS)),
+        )
+        # Base currency, so no rate lookup
+        txn.base_amount = txn.compute_base_amount()
+        txn.fingerprint = txn.compute_fingerprint()
+        yield txn
+
+
+def write_chunk(chunk):
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create(chunk)
+        update_search_vectors(Transaction.objects.filter(pk__in=[txn.pk for txn in chunk]))
+
+
+def seed(scale, seed_value=42, stdout=None):
+    """Bulk-insert a synthetic dataset of the given scale; returns the users created.
+
+    Rows are generated and inserted CHUNK_SIZE at a time, and the rollups and
+    balance snapshots are rebuilt once per user afterwards instead of per row.
+    """
+    total_rows = SCALES[scale] if scale in SCALES else int(scale)
+    rng = random.Random(seed_value)
+    today = date.today()
+    users = synthetic_users(max(1, -(-total_rows // ROWS_PER_USER)))
+
+    remaining = total_rows
+    for user in users:
+        user_rows = min(ROWS_PER_USER, remaining)
+        remaining -= user_rows
+        categories = list(Category.objects.filter(
+            user=user, name__in=[name for name, _, _ in DEFAULT_CATEGORIES]
+        ).values_list('pk', 'type'))
+
+        chunk = []
+        for txn in iter_synthetic_transactions(user, categories, user_rows, rng, today):
+            chunk.append(txn)
+            if len(chunk) >= CHUNK_SIZE:
+                write_chunk(chunk)
+                chunk = []
+        if chunk:
+            write_chunk(chunk)
+
+        rebuild_rollups(user)
+        rebuild_balance_snapshots(user)
+        transactions_bulk_changed.send(sender=Transaction, user_id=user.pk)
+        if stdout:
+            stdout.write(f'{user.username}: {user_rows} transactions')
+        if remaining <= 0:
+            break
+
+    return users
+
+
+def clear():
+    """Delete all synthetic users and their data, CHUNK_SIZE transactions at a time;
+    returns the number of rows deleted"""
+    users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+    transactions = Transaction.objects.filter(user__in=users)
+    # The rollups go with the users, so skip the per-row rollup updates
+    deleted = 0
+    with suspend_rollups():
+        while True:
+            pks = list(transactions.values_list('pk', flat=True)[:CHUNK_SIZE])
+            if not pks:
+                break
+            deleted += Transaction.objects.filter(pk__in=pks).delete()[0]
+        return deleted + users.delete()[0]
@@ -0,0 +1,84 @@
+from contextlib import ExitStack, contextmanager
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class CapturedQueries:
+    """Queries captured on several database aliases at once"""
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+
+    @property
+    def captured_queries(self):
+        return [
+            {**query, 'alias': alias}
+            for alias, context in self.contexts.items()
+            for query in context.captured_queries
+        ]
+
+    def __len__(self):
+        return sum(len(context) for context in self.contexts.values())
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for pinning how many queries a view may issue.
+
+    assertMaxQueries caps a block at a fixed number of queries;
+    assertConstantQueries checks that growing the data (more rows, more
+    months) does not add queries, which is how an N+1 shows up. Queries are
+    counted on every database the test may use, so reads routed to a
+    replica still count.
+    """
+
+    def query_aliases(self):
+        if self.databases == '__all__':
+            return list(connections)
+        return sorted(self.databases)
+
+    @contextmanager
+    def capture_queries(self):
+        with ExitStack() as stack:
+            yield CapturedQueries({
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in self.query_aliases()
+            })
+
+    def count_queries(self, func):
+        """Run func and return (result, captured queries)"""
+        with self.capture_queries() as queries:
+            result = func()
+        return result, queries.captured_queries
+
+    def format_queries(self, captured):
+        return '\n'.join(f'{i}. [{query["alias"]}] {query["sql"]}' for i, query in enumerate(captured, start=1))
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with self.capture_queries() as queries:
+            yield queries
+        count = len(queries)
+        if count > limit:
+            self.fail(
+                f'{count} queries executed, budget is {limit}\n'
+                f'{self.format_queries(queries.captured_queries)}'
+            )
+
+    def assertConstantQueries(self, func, grow):
+        """Run func, call grow() to add data, run func again: query counts must match.
+
+        func is run once beforehand to warm caches, so both measured runs
+        start from the same state. Returns the query count.
+        """
+        func()
+        _, small = self.count_queries(func)
+        grow()
+        func()
+        _, large = self.count_queries(func)
+        if len(large) != len(small):
+            self.fail(
+                f'Query count grew from {len(small)} to {len(large)} with more data\n'
+                f'Before:\n{self.format_queries(small)}\n'
+                f'After:\n{self.format_queries(large)}'
+            )
+        return len(small)
@@ -1,3 +1,1088 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from dashboard.cache import get_version
+from .balances import (
+    balance_through, balances_through, rebuild_balance_snapshots, verify_balance_snapshots,
+)
+from .budgets import budget_progress
+from .forms import TransactionForm
+from .importers import import_transactions, read_csv, read_ofx, read_qif
+from .fx import get_rate, load_rates, rate_lookup, reconvert
+from .models import Budget, Category, FXRate, MonthlySummary, RecurringTransaction, Transaction
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_keyset
+from .periods import period_from_params
+from .provisioning import DEFAULT_CATEGORIES, provision_users_in_batches
+from .recurring import materialize_due
+from .rollups import apply_delta, rebuild_rollups, suspend_rollups, verify_rollups
+from .routers import PIN_COOKIE, ReplicaRoutingMiddleware
+from .schedules import iter_occurrences
+from .testing import QueryBudgetMixin
 
-# Create your tests here.
+
+class PeriodFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client.login(username='alice', password='secret')
+        food = Category.objects.get(user=self.user, name='Food', type='expense')
+        for day in (date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 31), date(2024, 4, 1)):
+            Transaction.objects.create(
+                user=self.user, category=food, type='expense',
+                amount=Decimal('10.00'), date=day
+            )
+
+    def test_month_filter_uses_range_predicates(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transaction_list'), {'month': 3, 'year': 2024})
+
+        self.assertEqual(
+            [t.date for t in response.context['transactions']],
+            [date(2024, 3, 31), date(2024, 3, 1)],
+        )
+        list_sql = [
+            q['sql'] for q in queries.captured_queries
+            if 'ORDER BY "transactions_transaction"."date" DESC' in q['sql']
+        ]
+        self.assertTrue(list_sql)
+        for sql in list_sql:
+            self.assertIn('"transactions_transaction"."date" >=', sql)
+            self.assertIn('"transactions_transaction"."date" <', sql)
+            self.assertNotIn('EXTRACT', sql.upper())
+            self.assertNotIn('django_date_extract', sql)
+
+    def test_custom_periods(self):
+        today = date(2024, 5, 15)
+        self.assertEqual(
+            period_from_params({'period': 'quarter', 'year': '2024', 'quarter': '1'}, today),
+            (date(2024, 1, 1), date(2024, 4, 1)),
+        )
+        self.assertEqual(
+            period_from_params({'period': 'ytd'}, today),
+            (date(2024, 1, 1), date(2024, 5, 16)),
+        )
+        self.assertEqual(
+            period_from_params({'period': 'last_days', 'days': '7'}, today),
+            (date(2024, 5, 9), date(2024, 5, 16)),
+        )
+        self.assertEqual(
+            period_from_params({'start': '2024-03-01', 'end': '2024-03-31'}, today),
+            (date(2024, 3, 1), date(2024, 4, 1)),
+        )
+        self.assertIsNone(period_from_params({'month': '13', 'year': '2024'}, today))
+
+    def test_custom_range_filter(self):
+        response = self.client.get(reverse('transaction_list'), {'start': '2024-02-29', 'end': '2024-03-01'})
+        self.assertEqual(
+            [t.date for t in response.context['transactions']],
+            [date(2024, 3, 1), date(2024, 2, 29)],
+        )
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('roller', password='secret')
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+        self.rent = Category.objects.get(user=self.user, name='Rent', type='expense')
+        self.txn = Transaction.objects.create(
+            user=self.user, category=self.food, type='expense',
+            amount=Decimal('40.00'), date=date(2024, 3, 10),
+        )
+
+    def rollup(self):
+        return dict(
+            ((row.year, row.month, row.category_id), (row.total, row.count))
+            for row in MonthlySummary.objects.filter(user=self.user)
+        )
+
+    def test_rebuild_computes_under_the_lock(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(rebuild_rollups(self.user), 1)
+        sql = [query['sql'] for query in captured]
+        lock = next(i for i, query in enumerate(sql) if 'FROM "auth_user"' in query)
+        compute = next(i for i, query in enumerate(sql) if 'FROM "transactions_transaction"' in query)
+        self.assertLess(lock, compute)
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_rebuild_command_expires_cached_dashboards(self):
+        version = get_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_rollups', self.user.username, stdout=io.StringIO())
+        self.assertNotEqual(get_version(self.user.pk), version)
+
+    def test_create(self):
+        Transaction.objects.create(
+            user=self.user, category=self.food, type='expense',
+            amount=Decimal('2.50'), date=date(2024, 3, 31),
+        )
+        self.assertEqual(self.rollup(), {(2024, 3, self.food.pk): (Decimal('42.50'), 2)})
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_edit_amount(self):
+        self.txn.amount = Decimal('55.00')
+        self.txn.save()
+        self.assertEqual(self.rollup(), {(2024, 3, self.food.pk): (Decimal('55.00'), 1)})
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_move_month(self):
+        self.txn.date = date(2024, 4, 1)
+        self.txn.save()
+        self.assertEqual(self.rollup(), {(2024, 4, self.food.pk): (Decimal('40.00'), 1)})
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_move_category(self):
+        self.txn.category = self.rent
+        self.txn.amount = Decimal('45.00')
+        self.txn.save()
+        self.assertEqual(self.rollup(), {(2024, 3, self.rent.pk): (Decimal('45.00'), 1)})
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_delete(self):
+        self.txn.delete()
+        self.assertEqual(self.rollup(), {})
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_amount_delta_creates_missing_row(self):
+        with suspend_rollups():
+            MonthlySummary.objects.filter(user=self.user).delete()
+        apply_delta(self.user.pk, self.food.pk, 'expense', date(2024, 3, 1), Decimal('5.00'), 0)
+        self.assertEqual(self.rollup(), {(2024, 3, self.food.pk): (Decimal('5.00'), 0)})
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pager', password='secret')
+        self.client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food', type='expense')
+        # Mostly on the same day, so created_at and id decide the order
+        self.rows = [
+            Transaction.objects.create(
+                user=self.user, category=food, type='expense',
+                amount=Decimal(i + 1), date=date(2024, 3, 1) if i < 5 else date(2024, 2, 1),
+            )
+            for i in range(7)
+        ]
+        self.queryset = Transaction.objects.filter(user=self.user)
+        self.expected = list(self.queryset.order_by('-date', '-created_at', '-id').values_list('pk', flat=True))
+
+    def test_next_then_prev_across_equal_dates(self):
+        pages, cursor = [], None
+        while True:
+            page = paginate_keyset(self.queryset, cursor, 2)
+            pages.append([row.pk for row in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual([pk for ids in pages for pk in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 2, 1])
+
+        back = []
+        while page.has_previous():
+            page = paginate_keyset(self.queryset, page.previous_cursor, 2)
+            back.append([row.pk for row in page])
+        self.assertEqual(back, pages[-2::-1])
+        self.assertFalse(page.has_previous())
+
+    def test_cursor_round_trip(self):
+        row = self.rows[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(row, 'prev')),
+            (row.date, row.created_at, row.pk, 'prev'),
+        )
+
+    def test_invalid_cursors(self):
+        valid = encode_cursor(self.rows[0], 'next')
+        tampered = [
+            'not-a-cursor!',
+            valid[:-3],
+            'W10',  # []
+            'eyJyIjoic2lkZXdheXMifQ',  # {"r":"sideways"}
+            base64_json({'d': '2024-03-01', 'c': 'yesterday', 'i': 1, 'r': 'next'}),
+            base64_json({'d': '2024-03-01', 'c': '2024-03-01T00:00:00', 'i': 1, 'r': 'next'}),
+            base64_json({'d': '2024-03-01', 'c': '2024-03-01T00:00:00+00:00', 'i': 10 ** 30, 'r': 'next'}),
+            base64_json({'d': '2024-03-01', 'c': '2024-03-01T00:00:00+00:00', 'i': 1e400, 'r': 'next'}),
+        ]
+        for token in tampered:
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(token)
+                response = self.client.get(reverse('transaction_list'), {'cursor': token})
+                self.assertEqual(response.status_code, 404)
+
+
+def base64_json(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+CSV_STATEMENT = """Date,Type,Category,Amount,Description
+2024-03-01,expense,Food,120.50,Groceries
+05/03/2024,income,Salary,"50,000",March salary
+2024-13-01,expense,Food,10.00,Bad date
+2024-03-02,expense,Food,ten,Bad amount
+2024-03-03,expense,Yachts,99.00,Unknown category
+2024-03-04,expense,,15.00,Fallback category
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<CURDEF>INR
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240301120000
+<TRNAMT>-42.00
+<NAME>Coffee beans
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>2024XX01
+<TRNAMT>-1.00
+<NAME>Bad date
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240305
+<TRNAMT>500.00
+<MEMO>Refund
+</STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF_STATEMENT = """!Type:Bank
+D03/01/2024
+T-75.00
+PPetrol
+LTransport
+^
+D03/02'2024
+T-abc
+PBad amount
+^
+D2024-03-09
+T1,000.00
+MInterest
+LOther Income
+^
+"""
+
+
+class ImporterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('importer', password='secret')
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+
+    def run_import(self, text, file_format='csv', **kwargs):
+        return import_transactions(self.user, io.StringIO(text), file_format, chunk_size=2, **kwargs)
+
+    def stored(self):
+        return list(
+            Transaction.objects.filter(user=self.user).order_by('date', 'pk')
+            .values_list('date', 'type', 'category__name', 'amount', 'description')
+        )
+
+    def test_readers(self):
+        self.assertEqual(
+            [line for line, _ in read_csv(io.StringIO(CSV_STATEMENT))], [2, 3, 4, 5, 6, 7]
+        )
+        self.assertEqual(
+            [(row['date'], row['amount'], row['description'], row['currency']) for _, row in read_ofx(io.StringIO(OFX_STATEMENT))],
+            [('20240301', '-42.00', 'Coffee beans', 'INR'), ('2024XX01', '-1.00', 'Bad date', 'INR'), ('20240305', '500.00', 'Refund', 'INR')],
+        )
+        self.assertEqual(
+            [(line, row['date'], row['category']) for line, row in read_qif(io.StringIO(QIF_STATEMENT))],
+            [(2, '03/01/2024', 'Transport'), (7, '03/02/2024', ''), (11, '2024-03-09', 'Other Income')],
+        )
+
+    def test_csv(self):
+        report = self.run_import(CSV_STATEMENT)
+        self.assertEqual((report.rows, report.created, report.error_count), (6, 3, 3))
+        self.assertEqual(report.errors, [
+            (4, 'Invalid date "2024-13-01"'),
+            (5, 'Invalid amount "ten"'),
+            (6, 'Unknown expense category "Yachts"'),
+        ])
+        self.assertEqual(self.stored(), [
+            (date(2024, 3, 1), 'expense', 'Food', Decimal('120.50'), 'Groceries'),
+            (date(2024, 3, 4), 'expense', 'Other Expense', Decimal('15.00'), 'Fallback category'),
+            (date(2024, 3, 5), 'income', 'Salary', Decimal('50000.00'), 'March salary'),
+        ])
+
+    def test_create_missing_categories(self):
+        report = self.run_import(CSV_STATEMENT, create_missing=True)
+        self.assertEqual(report.created, 4)
+        self.assertTrue(Category.objects.filter(user=self.user, name='Yachts', type='expense').exists())
+
+    def test_blank_category_is_a_row_error(self):
+        text = 'date,type,category,amount,description\n2024-03-01,expense,   ,10,Blank\n2024-03-02,expense, Yachts ,20,Padded\n'
+        report = self.run_import(text, create_missing=True)
+        self.assertEqual((report.created, report.errors), (1, [(2, 'Blank category name')]))
+        self.assertFalse(Category.objects.filter(user=self.user, name='').exists())
+        self.assertTrue(Category.objects.filter(user=self.user, name='Yachts').exists())
+
+    def test_ofx_and_qif_sign_gives_the_type(self):
+        report = self.run_import(OFX_STATEMENT, 'ofx')
+        self.assertEqual((report.created, report.errors), (2, [(11, 'Invalid date "2024XX01"')]))
+        report = self.run_import(QIF_STATEMENT, 'qif')
+        self.assertEqual((report.created, report.errors), (2, [(7, 'Invalid amount "-abc"')]))
+        self.assertEqual(self.stored(), [
+            (date(2024, 3, 1), 'expense', 'Other Expense', Decimal('42.00'), 'Coffee beans'),
+            (date(2024, 3, 1), 'expense', 'Transport', Decimal('75.00'), 'Petrol'),
+            (date(2024, 3, 5), 'income', 'Other Income', Decimal('500.00'), 'Refund'),
+            (date(2024, 3, 9), 'income', 'Other Income', Decimal('1000.00'), 'Interest'),
+        ])
+
+    def test_duplicate_policies(self):
+        Transaction.objects.create(
+            user=self.user, category=self.food, type='expense',
+            amount=Decimal('120.50'), date=date(2024, 3, 1), description='Groceries',
+        )
+        report = self.run_import(CSV_STATEMENT)
+        self.assertEqual((report.created, report.duplicates), (2, 1))
+        self.assertIn((2, 'Duplicate of an existing transaction'), report.errors)
+
+        report = self.run_import(CSV_STATEMENT, on_duplicate='allow')
+        # The rows the first import created now count as existing too
+        self.assertEqual((report.created, report.duplicates), (3, 3))
+        self.assertEqual(Transaction.objects.filter(user=self.user, description='Groceries').count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(CSV_STATEMENT, create_missing=True, dry_run=True)
+        self.assertEqual((report.created, report.error_count), (4, 2))
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertFalse(MonthlySummary.objects.filter(user=self.user).exists())
+        self.assertFalse(Category.objects.filter(user=self.user, name='Yachts').exists())
+
+    def test_bulk_writes_keep_derived_data_current(self):
+        budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('1000.00'))
+        rebuild_balance_snapshots(self.user, through=date(2024, 4, 1))
+        self.run_import(CSV_STATEMENT)
+        self.assertEqual(verify_rollups(self.user), [])
+        self.assertEqual(verify_balance_snapshots(self.user), [])
+        self.assertEqual(balance_through(self.user), Decimal('49864.50'))
+        self.assertEqual(budget.spend.get(period_start=date(2024, 3, 1)).spent, Decimal('120.50'))
+        self.assertEqual(Transaction.objects.filter(user=self.user, fingerprint='').count(), 0)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('exporter', password='secret')
+        self.client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food', type='expense')
+        salary = Category.objects.get(user=self.user, name='Salary', type='income')
+        self.lunch = Transaction.objects.create(
+            user=self.user, category=food, type='expense', amount=Decimal('12.50'),
+            date=date(2024, 3, 2), description='Lunch, "the usual"\nat Café',
+        )
+        self.pay = Transaction.objects.create(
+            user=self.user, category=salary, type='income', amount=Decimal('900.00'),
+            date=date(2024, 3, 1),
+        )
+        other = User.objects.create_user('someone', password='secret')
+        Transaction.objects.create(
+            user=other, category=Category.objects.get(user=other, name='Food', type='expense'),
+            type='expense', amount=Decimal('1.00'), date=date(2024, 3, 3), description='Not mine',
+        )
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_transactions'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="transactions-\d{8}\.csv"')
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [
+            ['id', 'date', 'type', 'category', 'amount', 'currency', 'description'],
+            [str(self.lunch.pk), '2024-03-02', 'expense', 'Food', '12.50', 'INR', 'Lunch, "the usual"\nat Café'],
+            [str(self.pay.pk), '2024-03-01', 'income', 'Salary', '900.00', 'INR', ''],
+        ])
+
+    def test_ndjson_with_filters(self):
+        response, content = self.export(format='ndjson', type='expense', start='2024-03-01', end='2024-03-31')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in content.splitlines()], [{
+            'id': self.lunch.pk, 'date': '2024-03-02', 'type': 'expense', 'category': 'Food',
+            'amount': '12.50', 'currency': 'INR', 'description': 'Lunch, "the usual"\nat Café',
+        }])
+        _, content = self.export(format='ndjson', end='2024-03-01')
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.pay.pk])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(reverse('export_transactions'), {'format': 'xml'}).status_code, 404)
+
+
+class FindDuplicatesTests(QueryBudgetMixin, TestCase):
+    def test_groups_are_listed_without_a_query_each(self):
+        user = User.objects.create_user('doubler', password='secret')
+        food = Category.objects.get(user=user, name='Food', type='expense')
+        for day in range(1, 6):
+            for _ in range(2):
+                Transaction.objects.create(
+                    user=user, category=food, type='expense', amount=Decimal('9.99'),
+                    date=date(2024, 3, day), description=f'Coffee {day}',
+                )
+        out = io.StringIO()
+        # users, then per chunk of groups the colliding fingerprints and their rows
+        with self.assertMaxQueries(1 + 2 * 3 + 1):
+            call_command('find_duplicates', 'doubler', '--chunk-size', '2', stdout=out)
+        self.assertIn('doubler: 2024-03-01 expense ₹9.99 "Coffee 1" x2', out.getvalue())
+        self.assertIn('Duplicate groups found: 5', out.getvalue())
+
+
+class ProvisioningTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(f'member{i}', password='secret') for i in range(5)]
+        # Three users lose some defaults, one keeps a customised icon
+        Category.objects.filter(user__in=self.users[:3], name__in=['Food', 'Rent']).delete()
+        Category.objects.filter(user=self.users[3], name='Food').update(icon='pizza')
+        self.queryset = User.objects.filter(pk__in=[user.pk for user in self.users])
+
+    def test_batches_are_idempotent(self):
+        # Per batch: the user ids, the existing categories and one bulk insert
+        with self.assertMaxQueries(3 * 3 + 1):
+            batches = list(provision_users_in_batches(self.queryset, batch_size=2))
+        self.assertEqual(batches, [(2, 4), (2, 2), (1, 0)])
+        for user in self.users:
+            self.assertEqual(
+                set(Category.objects.filter(user=user).values_list('name', 'type')),
+                {(name, category_type) for name, category_type, _ in DEFAULT_CATEGORIES},
+            )
+        self.assertEqual(Category.objects.get(user=self.users[3], name='Food').icon, 'pizza')
+
+        self.assertEqual(list(provision_users_in_batches(self.queryset, batch_size=2)), [(2, 0), (2, 0), (1, 0)])
+        self.assertEqual(Category.objects.filter(user__in=self.users).count(), 5 * len(DEFAULT_CATEGORIES))
+
+    def test_provisioning_refreshes_the_category_cache(self):
+        self.client.force_login(self.users[0])
+        url = reverse('get_categories') + '?type=expense'
+        self.assertNotIn('Food', [c['name'] for c in self.client.get(url).json()])
+        list(provision_users_in_batches(self.queryset))
+        self.assertIn('Food', [c['name'] for c in self.client.get(url).json()])
+
+
+class CategoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('categorist', password='secret')
+        self.client.force_login(self.user)
+        self.url = reverse('get_categories') + '?type=expense'
+
+    def test_category_writes_change_the_etag_on_commit(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(user=self.user, name='Pets', type='expense')
+            # Until the commit, readers keep getting the cached list
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Pets', [category['name'] for category in response.json()])
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(user=self.user, name='Pets').delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Pets', [category['name'] for category in response.json()])
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('budget', password='secret')
+        self.client.force_login(self.user)
+        self.categories = list(Category.objects.filter(user=self.user, type='expense'))
+
+    def add_transactions(self, count, user=None):
+        user = user or self.user
+        categories = self.categories if user == self.user else list(
+            Category.objects.filter(user=user, type='expense')
+        )
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=user, category=categories[i % len(categories)], type='expense',
+                amount=Decimal('1.00') + i, date=date(2024, 1, 1) + timedelta(days=i % 700),
+            )
+            for i in range(count)
+        ])
+
+    def test_transaction_list(self):
+        self.add_transactions(20)
+        url = reverse('transaction_list')
+        # session, user, data version, count, page rows (category joined),
+        # balance snapshot and the delta since it
+        with self.assertMaxQueries(7):
+            self.client.get(url)
+        self.assertConstantQueries(lambda: self.client.get(url), lambda: self.add_transactions(1980))
+        # Deeper pages share the one snapshot lookup between row and net balances
+        with self.assertMaxQueries(7):
+            self.client.get(url, {'page': 50})
+
+    def test_transaction_list_cursor_page(self):
+        self.add_transactions(20)
+        url = reverse('transaction_list') + '?cursor='
+        with self.assertMaxQueries(6):
+            self.client.get(url)
+        self.assertConstantQueries(lambda: self.client.get(url), lambda: self.add_transactions(1980))
+
+    def test_transaction_form_render(self):
+        with self.assertMaxQueries(1):
+            TransactionForm(user=self.user).as_p()
+        # Categories come from the per-user cache once it is warm
+        with self.assertMaxQueries(0):
+            TransactionForm(user=self.user).as_p()
+
+        with self.assertMaxQueries(2):
+            self.client.get(reverse('add_transaction'))
+
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(admin)
+        other = User.objects.create_user('other', password='secret')
+        self.add_transactions(5)
+        url = reverse('admin:transactions_transaction_changelist')
+
+        def grow():
+            self.add_transactions(100)
+            self.add_transactions(100, user=other)
+
+        queries = self.assertConstantQueries(lambda: self.client.get(url), grow)
+        self.assertLessEqual(queries, 8)
+
+
+class TransactionAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(self.admin)
+        food = Category.objects.get(user=self.admin, name='Food', type='expense')
+        for description in ('Swiggy order', 'Zomato order', 'Weekly swiggy'):
+            Transaction.objects.create(
+                user=self.admin, category=food, type='expense',
+                amount=Decimal('10.00'), date=date(2024, 3, 1), description=description,
+            )
+
+    def test_search_uses_prefix_and_exact_lookups(self):
+        url = reverse('admin:transactions_transaction_changelist')
+        response = self.client.get(url, {'q': 'swiggy'})
+        self.assertEqual(
+            [t.description for t in response.context['cl'].result_list],
+            ['Swiggy order'],
+        )
+        response = self.client.get(url, {'q': 'admin'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_add_without_a_rate_is_a_field_error(self):
+        food = Category.objects.get(user=self.admin, name='Food', type='expense')
+        response = self.client.post(reverse('admin:transactions_transaction_add'), {
+            'user': self.admin.pk, 'category': food.pk, 'type': 'expense', 'amount': '5.00',
+            'currency': 'USD', 'date': '2024-03-02',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('currency', response.context['adminform'].form.errors)
+        self.assertEqual(Transaction.objects.count(), 3)
+
+
+class TransactionSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('searcher', password='secret')
+        self.client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food', type='expense')
+        transport = Category.objects.get(user=self.user, name='Transport', type='expense')
+        for category, description in ((food, 'Swiggy order'), (food, 'Groceries'), (transport, 'Uber ride')):
+            Transaction.objects.create(
+                user=self.user, category=category, type='expense',
+                amount=Decimal('10.00'), date=date(2024, 3, 1), description=description,
+            )
+
+    def search(self, terms):
+        response = self.client.get(reverse('transaction_list'), {'q': terms})
+        return sorted(t.description for t in response.context['transactions'])
+
+    def test_matches_description_and_category_name(self):
+        self.assertEqual(self.search('swiggy'), ['Swiggy order'])
+        self.assertEqual(self.search('transport'), ['Uber ride'])
+        self.assertEqual(self.search(''), ['Groceries', 'Swiggy order', 'Uber ride'])
+
+    def test_export_applies_search(self):
+        response = self.client.get(reverse('export_transactions'), {'q': 'uber'})
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Uber ride', content)
+        self.assertNotIn('Swiggy', content)
+
+
+class BalanceSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('saver', password='secret')
+        self.client.force_login(self.user)
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+        self.salary = Category.objects.get(user=self.user, name='Salary', type='income')
+
+    def add(self, category, amount, day):
+        return Transaction.objects.create(
+            user=self.user, category=category, type=category.type,
+            amount=Decimal(amount), date=day,
+        )
+
+    def test_snapshots_follow_writes(self):
+        self.add(self.salary, '100.00', date(2024, 1, 5))
+        self.add(self.food, '30.00', date(2024, 2, 10))
+        self.assertEqual(rebuild_balance_snapshots(self.user, through=date(2024, 4, 1)), 3)
+        self.assertEqual(
+            list(self.user.balance_snapshots.order_by('as_of').values_list('balance', flat=True)),
+            [Decimal('100.00'), Decimal('70.00'), Decimal('70.00')],
+        )
+
+        late = self.add(self.food, '5.00', date(2024, 1, 20))
+        late.date = date(2024, 3, 2)
+        late.amount = Decimal('8.00')
+        late.save()
+        self.add(self.salary, '50.00', date(2024, 2, 1)).delete()
+        self.assertEqual(verify_balance_snapshots(self.user), [])
+        self.assertEqual(balance_through(self.user), Decimal('62.00'))
+
+    def test_list_shows_running_balance(self):
+        self.add(self.salary, '100.00', date(2024, 1, 5))
+        self.add(self.food, '30.00', date(2024, 2, 10))
+        self.add(self.food, '20.00', date(2024, 3, 1))
+        rebuild_balance_snapshots(self.user, through=date(2024, 4, 1))
+
+        response = self.client.get(reverse('transaction_list'))
+        self.assertEqual(
+            [t.running_balance for t in response.context['transactions']],
+            [Decimal('50.00'), Decimal('70.00'), Decimal('100.00')],
+        )
+        self.assertEqual(response.context['net_worth'], Decimal('50.00'))
+
+        response = self.client.get(reverse('transaction_list'), {'type': 'expense'})
+        self.assertFalse(response.context['show_balance'])
+        self.assertEqual(response.context['net_worth'], Decimal('50.00'))
+
+    def test_balances_through_matches_balance_through(self):
+        self.add(self.salary, '100.00', date(2024, 1, 5))
+        self.add(self.food, '30.00', date(2024, 2, 10))
+        self.add(self.food, '20.00', date(2024, 3, 1))
+        self.add(self.salary, '15.00', date(2024, 4, 20))
+        keys = [(t.date, t.created_at, t.pk) for t in Transaction.objects.filter(user=self.user)]
+
+        for through in (None, date(2024, 3, 1), date(2024, 5, 1)):
+            if through:
+                rebuild_balance_snapshots(self.user, through=through)
+            for key in keys:
+                with self.assertNumQueries(2):
+                    pair = balances_through(self.user, key)
+                self.assertEqual(pair, (balance_through(self.user, key), balance_through(self.user)))
+
+    def test_deep_page_balances(self):
+        for day in range(1, 29):
+            self.add(self.food, '1.00', date(2024, 1, day))
+            self.add(self.food, '2.00', date(2024, 2, day))
+        rebuild_balance_snapshots(self.user, through=date(2024, 3, 1))
+
+        response = self.client.get(reverse('transaction_list'), {'page': 2})
+        rows = list(response.context['transactions'])
+        top = rows[0]
+        self.assertEqual(top.running_balance, balance_through(self.user, (top.date, top.created_at, top.pk)))
+        self.assertEqual(response.context['net_worth'], Decimal('-84.00'))
+
+
+class RecurringTransactionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('subscriber', password='secret')
+        self.rent = Category.objects.get(user=self.user, name='Rent', type='expense')
+
+    def schedule(self, **kwargs):
+        return RecurringTransaction.objects.create(
+            user=self.user, category=self.rent, type='expense', amount=Decimal('500.00'), **kwargs
+        )
+
+    def test_occurrence_dates(self):
+        self.assertEqual(
+            list(iter_occurrences('monthly', 1, date(2024, 1, 31), date(2024, 1, 1), end_date=date(2024, 4, 30))),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        self.assertEqual(
+            list(iter_occurrences('weekly', 2, date(2024, 1, 1), date(2024, 1, 20), end_date=date(2024, 2, 15))),
+            [date(2024, 1, 29), date(2024, 2, 12)],
+        )
+        self.assertEqual(
+            list(iter_occurrences('yearly', 1, date(2020, 2, 29), date(2021, 1, 1), end_date=date(2024, 12, 31))),
+            [date(2021, 2, 28), date(2022, 2, 28), date(2023, 2, 28), date(2024, 2, 29)],
+        )
+        rule = self.schedule(start_date=date(2024, 1, 15), day_of_month=1)
+        self.assertEqual(rule.next_occurrence, date(2024, 2, 1))
+
+    def test_materialize_is_idempotent(self):
+        rule = self.schedule(start_date=date(2024, 1, 5), description='Flat rent')
+        self.schedule(start_date=date(2024, 1, 1), end_date=date(2024, 2, 1), frequency='weekly')
+        # Left behind by a run that died before advancing the schedule
+        Transaction.objects.create(
+            user=self.user, category=self.rent, type='expense', amount=Decimal('500.00'),
+            date=date(2024, 1, 5), recurring=rule, occurrence_date=date(2024, 1, 5),
+        )
+
+        report = materialize_due(through=date(2024, 3, 31), batch_size=1)
+        self.assertEqual((report.schedules, report.created, report.skipped), (2, 7, 1))
+        self.assertEqual(
+            list(rule.occurrences.order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 5), date(2024, 2, 5), date(2024, 3, 5)],
+        )
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_occurrence, date(2024, 4, 5))
+        self.assertEqual(verify_rollups(self.user), [])
+
+        report = materialize_due(through=date(2024, 3, 31))
+        self.assertEqual((report.schedules, report.created), (0, 0))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 8)
+
+    def test_category_must_match_user_and_type(self):
+        other = User.objects.create_user('other', password='secret')
+        salary = Category.objects.get(user=self.user, name='Salary', type='income')
+        for category in (Category.objects.get(user=other, name='Rent', type='expense'), salary):
+            rule = RecurringTransaction(
+                user=self.user, category=category, type='expense', amount=Decimal('500.00'),
+                start_date=date(2024, 1, 1),
+            )
+            with self.assertRaises(ValidationError) as raised:
+                rule.full_clean()
+            self.assertIn('category', raised.exception.message_dict)
+
+        admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:transactions_recurringtransaction_add'), {
+            'user': self.user.pk, 'category': salary.pk, 'type': 'expense', 'amount': '500.00',
+            'currency': 'INR', 'frequency': 'monthly', 'interval': 1, 'start_date': '2024-01-01',
+            'active': 'on',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('category', response.context['adminform'].form.errors)
+        self.assertFalse(RecurringTransaction.objects.exists())
+
+
+class BudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('planner', password='secret')
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+
+    def spend(self, amount, day=date(2024, 3, 10)):
+        return Transaction.objects.create(
+            user=self.user, category=self.food, type='expense', amount=Decimal(amount), date=day,
+        )
+
+    def alerts(self):
+        return list(self.user.budget_alerts.order_by('pk').values_list('threshold', 'spent'))
+
+    def test_spend_and_alerts_follow_writes(self):
+        budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'))
+        self.spend('50.00')
+        self.assertEqual(self.alerts(), [])
+        txn = self.spend('35.00')
+        self.assertEqual(self.alerts(), [(80, Decimal('85.00'))])
+
+        # Dropping back below 80% re-arms the alert; one write past 100% raises only that
+        txn.amount = Decimal('10.00')
+        txn.save()
+        self.spend('45.00')
+        self.assertEqual(self.alerts(), [(80, Decimal('85.00')), (100, Decimal('105.00'))])
+
+        txn.date = date(2024, 4, 1)
+        txn.save()
+        self.spend('20.00', day=date(2024, 2, 1)).delete()
+        self.assertEqual(
+            dict(budget.spend.values_list('period_start', 'spent')),
+            {date(2024, 2, 1): Decimal('0.00'), date(2024, 3, 1): Decimal('95.00'), date(2024, 4, 1): Decimal('10.00')},
+        )
+
+    def test_new_budget_counts_existing_spend(self):
+        self.spend('30.00', day=date(2024, 1, 5))
+        self.spend('60.00', day=date(2024, 3, 10))
+        budget = Budget.objects.create(
+            user=self.user, category=self.food, period='quarterly', amount=Decimal('100.00'),
+        )
+        self.assertEqual(budget.spend.get().spent, Decimal('90.00'))
+        self.assertEqual(self.alerts(), [])
+
+        with self.assertMaxQueries(1):
+            progress = budget_progress(self.user, date(2024, 2, 14))
+        self.assertEqual(
+            [(item['category'], item['spent'], item['percent'], item['threshold']) for item in progress],
+            [('Food', Decimal('90.00'), 90.0, 80)],
+        )
+        self.assertEqual(budget_progress(self.user, date(2024, 4, 1))[0]['spent'], Decimal('0'))
+
+    def test_category_must_belong_to_the_user(self):
+        other = User.objects.create_user('other', password='secret')
+        theirs = Category.objects.get(user=other, name='Food', type='expense')
+        with self.assertRaises(ValidationError) as raised:
+            Budget(user=self.user, category=theirs, amount=Decimal('100.00')).full_clean()
+        self.assertIn('category', raised.exception.message_dict)
+
+        admin = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:transactions_budget_add'), {
+            'user': self.user.pk, 'category': theirs.pk, 'period': 'monthly', 'amount': '100.00',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('category', response.context['adminform'].form.errors)
+        self.assertFalse(Budget.objects.exists())
+
+
+class CurrencyTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+        self.salary = Category.objects.get(user=self.user, name='Salary', type='income')
+        load_rates(io.StringIO('date,currency,rate\n2024-03-01,USD,83.10\n2024-03-15,USD,83.50\n'))
+
+    def test_totals_convert_at_the_rate_for_each_date(self):
+        Transaction.objects.create(
+            user=self.user, category=self.salary, type='income', amount=Decimal('1000.00'), date=date(2024, 3, 1),
+        )
+        Transaction.objects.create(
+            user=self.user, category=self.food, type='expense', amount=Decimal('10.00'),
+            currency='USD', date=date(2024, 3, 10),
+        )
+        txn = Transaction.objects.create(
+            user=self.user, category=self.food, type='expense', amount=Decimal('2.01'),
+            currency='USD', date=date(2024, 3, 20),
+        )
+        # 10 x 83.10 + 2.01 x 83.50 (167.835, rounded per row)
+        expected = Decimal('831.00') + Decimal('167.84')
+        self.assertEqual(MonthlySummary.objects.get(user=self.user, type='expense').total, expected)
+        self.assertEqual(verify_rollups(self.user), [])
+        self.assertEqual(balance_through(self.user), Decimal('1000.00') - expected)
+
+        txn.currency = 'INR'
+        txn.save()
+        self.assertEqual(MonthlySummary.objects.get(user=self.user, type='expense').total, Decimal('833.01'))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_form_requires_a_rate(self):
+        data = {'type': 'expense', 'category': self.food.pk, 'amount': '5.00', 'date': '2024-03-02'}
+        form = TransactionForm(data={**data, 'currency': 'EUR'}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('currency', form.errors)
+        self.assertTrue(TransactionForm(data={**data, 'currency': 'USD'}, user=self.user).is_valid())
+        self.assertFalse(TransactionForm(data={**data, 'currency': 'USD', 'date': '2024-02-29'}, user=self.user).is_valid())
+
+    def test_rate_lookups_are_memoized_per_batch(self):
+        rate = rate_lookup()
+        self.assertEqual(rate('USD', date(2024, 3, 16)), Decimal('83.50'))
+        with self.assertMaxQueries(0):
+            rate('USD', date(2024, 3, 16))
+            rate('INR', date(2024, 3, 16))
+        load_rates(io.StringIO('date,currency,rate\n2024-03-16,USD,84\n'))
+        self.assertEqual(rate_lookup()('USD', date(2024, 3, 16)), Decimal('84'))
+        self.assertEqual(get_rate('USD', date(2024, 3, 16)), Decimal('84'))
+
+    def test_new_rates_leave_stored_amounts_consistent(self):
+        FXRate.objects.filter(date=date(2024, 3, 15)).delete()
+        txn = Transaction.objects.create(
+            user=self.user, category=self.food, type='expense', amount=Decimal('10.00'),
+            currency='USD', date=date(2024, 3, 20),
+        )
+        self.assertEqual(txn.base_amount, Decimal('831.00'))
+        load_rates(io.StringIO('date,currency,rate\n2024-03-15,USD,83.50\n'))
+        # Rebuilt from the stored amounts, so the later delete reverses what was added
+        rebuild_rollups(self.user)
+        Transaction.objects.get(pk=txn.pk).delete()
+        self.assertEqual(verify_rollups(self.user), [])
+        self.assertFalse(MonthlySummary.objects.filter(user=self.user).exists())
+
+    def test_reconvert_applies_new_rates(self):
+        txn = Transaction.objects.create(
+            user=self.user, category=self.food, type='expense', amount=Decimal('2.01'),
+            currency='USD', date=date(2024, 3, 20),
+        )
+        load_rates(io.StringIO('date,currency,rate\n2024-03-18,USD,84\n'))
+        self.assertEqual(reconvert(Transaction.objects.filter(user=self.user)), 1)
+        txn.refresh_from_db()
+        self.assertEqual(txn.base_amount, Decimal('168.84'))
+        rebuild_rollups(self.user)
+        self.assertEqual(MonthlySummary.objects.get(user=self.user).total, Decimal('168.84'))
+        txn.delete()
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_recurring_schedules_need_a_rate(self):
+        rent = Category.objects.get(user=self.user, name='Rent', type='expense')
+        fields = {'user': self.user, 'category': rent, 'type': 'expense', 'amount': Decimal('100.00')}
+        with self.assertRaises(ValidationError) as raised:
+            RecurringTransaction(currency='EUR', start_date=date(2024, 3, 1), **fields).full_clean()
+        self.assertIn('currency', raised.exception.message_dict)
+
+        # Saved without validation: held back, while later schedules still run
+        held = RecurringTransaction.objects.create(currency='EUR', start_date=date(2024, 3, 1), **fields)
+        RecurringTransaction.objects.create(currency='USD', start_date=date(2024, 3, 5), **fields)
+        report = materialize_due(through=date(2024, 4, 30))
+        self.assertEqual((report.created, report.unconvertible), (2, 1))
+        self.assertEqual(report.errors, [(held.pk, 'No EUR exchange rate on or before 2024-03-01')])
+        held.refresh_from_db()
+        self.assertEqual(held.next_occurrence, date(2024, 3, 1))
+
+        load_rates(io.StringIO('date,currency,rate\n2024-01-01,EUR,90\n'))
+        report = materialize_due(through=date(2024, 4, 30))
+        self.assertEqual((report.created, report.unconvertible), (2, 0))
+        self.assertEqual(
+            list(held.occurrences.order_by('date').values_list('base_amount', flat=True)),
+            [Decimal('9000.00'), Decimal('9000.00')],
+        )
+        self.assertEqual(verify_rollups(self.user), [])
+
+
+class AsyncTransactionListTests(TransactionTestCase):
+    # gather_queries runs on other threads and connections, which only see
+    # committed rows, hence TransactionTestCase
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lister', password='secret')
+        self.client.force_login(self.user)
+        food = Category.objects.get(user=self.user, name='Food', type='expense')
+        salary = Category.objects.get(user=self.user, name='Salary', type='income')
+        for i in range(25):
+            category = salary if i % 5 == 0 else food
+            Transaction.objects.create(
+                user=self.user, category=category, type=category.type, amount=Decimal(i + 1),
+                date=date(2024, 3, 1) + timedelta(days=i % 7), description=f'Row {i}',
+            )
+
+    def test_matches_the_sync_list(self):
+        for params in ({}, {'page': '2'}, {'type': 'expense'}, {'q': 'Row 1'}, {'start': '2024-03-03', 'end': '2024-03-05'}):
+            with self.subTest(**params):
+                sync = self.client.get(reverse('transaction_list'), params).context
+                async_ = self.client.get(reverse('transaction_list_async'), params).context
+                self.assertEqual([txn.pk for txn in async_['transactions']], [txn.pk for txn in sync['transactions']])
+                self.assertEqual(async_['paginator'].count, sync['paginator'].count)
+                self.assertEqual(async_['page_obj'].number, sync['page_obj'].number)
+                self.assertEqual(async_['filter_query'], sync['filter_query'])
+                self.assertEqual(async_['show_balance'], sync['show_balance'])
+                self.assertEqual(async_['net_worth'], sync['net_worth'])
+                self.assertEqual(
+                    [getattr(txn, 'running_balance', None) for txn in async_['transactions']],
+                    [getattr(txn, 'running_balance', None) for txn in sync['transactions']],
+                )
+
+    def test_invalid_page(self):
+        self.assertEqual(self.client.get(reverse('transaction_list_async'), {'page': '9'}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('transaction_list_async'), {'page': 'x'}).status_code, 404)
+
+    def test_anonymous_users_are_redirected(self):
+        self.client.logout()
+        url = reverse('transaction_list_async')
+        self.assertRedirects(self.client.get(url), f'{reverse("login")}?next={url}', fetch_redirect_response=False)
+
+
+class MiddlewareChainTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_asgi_chain_stays_async(self):
+        # BaseHandler logs (with DEBUG on) each layer it has to adapt to the
+        # other mode; one sync-only middleware makes the whole chain sync
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler = ASGIHandler()
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+        routing = [
+            method.__self__ for method in handler._view_middleware
+            if isinstance(method.__self__, ReplicaRoutingMiddleware)
+        ]
+        self.assertEqual(len(routing), 1)
+        self.assertTrue(iscoroutinefunction(routing[0]))
+
+
+@skipUnless('replica' in settings.DATABASES, 'needs a replica alias (settings_test)')
+@override_settings(DATABASE_REPLICA_ALIAS='replica')
+class ReadReplicaRoutingTests(QueryBudgetMixin, TransactionTestCase):
+    # The replica is a second connection to the test database, which only
+    # sees committed rows, hence TransactionTestCase
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', password='secret')
+        self.client.force_login(self.user)
+        self.food = Category.objects.get(user=self.user, name='Food', type='expense')
+        Transaction.objects.create(
+            user=self.user, category=self.food, type='expense',
+            amount=Decimal('10.00'), date=date(2024, 3, 1), description='Lunch',
+        )
+
+    def tables_by_alias(self, captured):
+        tables = {'default': set(), 'replica': set()}
+        for query in captured:
+            for table in ('django_session', 'auth_user', 'transactions_transaction', 'transactions_monthlysummary'):
+                if f'FROM "{table}"' in query['sql']:
+                    tables[query['alias']].add(table)
+        return tables
+
+    def test_list_reads_from_replica(self):
+        response, captured = self.count_queries(lambda: self.client.get(reverse('transaction_list')))
+        self.assertContains(response, 'Lunch')
+        tables = self.tables_by_alias(captured)
+        self.assertEqual(tables['replica'], {'transactions_transaction'})
+        # Session and user always come from the primary, and so does the
+        # fragment cache's version probe
+        self.assertEqual(tables['default'], {'django_session', 'auth_user', 'transactions_transaction'})
+        primary_rows = [
+            query['sql'] for query in captured
+            if query['alias'] == 'default' and 'FROM "transactions_transaction"' in query['sql']
+        ]
+        self.assertEqual(len(primary_rows), 1)
+        self.assertIn('MAX("transactions_transaction"."updated_at")', primary_rows[0])
+
+    def test_export_streams_from_replica(self):
+        def export():
+            response = self.client.get(reverse('export_transactions'))
+            return b''.join(response.streaming_content)
+        content, captured = self.count_queries(export)
+        self.assertIn(b'Lunch', content)
+        self.assertIn('transactions_transaction', self.tables_by_alias(captured)['replica'])
+
+    def test_cached_dashboard_data_is_computed_on_primary(self):
+        _, captured = self.count_queries(lambda: self.client.get(reverse('dashboard')))
+        tables = self.tables_by_alias(captured)
+        self.assertIn('transactions_monthlysummary', tables['default'])
+        self.assertNotIn('transactions_monthlysummary', tables['replica'])
+        # Recent transactions are not cached, so they come from the replica
+        self.assertIn('transactions_transaction', tables['replica'])
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post(reverse('add_transaction'), {
+            'type': 'expense', 'category': self.food.pk, 'amount': '5.00',
+            'description': 'Coffee', 'date': '2024-03-02',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(Transaction.objects.using('default').filter(description='Coffee').count(), 1)
+
+        _, captured = self.count_queries(lambda: self.client.get(reverse('transaction_list')))
+        self.assertEqual(self.tables_by_alias(captured)['replica'], set())
+
+    def test_async_requests_read_from_replica(self):
+        self.async_client.force_login(self.user)
+        response, captured = self.count_queries(
+            lambda: async_to_sync(self.async_client.get)(reverse('transaction_list'))
+        )
+        self.assertContains(response, 'Lunch')
+        self.assertEqual(self.tables_by_alias(captured)['replica'], {'transactions_transaction'})
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_without_replica_everything_uses_primary(self):
+        _, captured = self.count_queries(lambda: self.client.get(reverse('transaction_list')))
+        self.assertEqual({query['alias'] for query in captured}, {'default'})
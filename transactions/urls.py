@@ -1,11 +1,14 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.TransactionListView.as_view(), name='transaction_list'),
+    path('async/', async_views.transaction_list_async, name='transaction_list_async'),
     path('add/', views.TransactionCreateView.as_view(), name='add_transaction'),
     path('<int:pk>/edit/', views.TransactionUpdateView.as_view(), name='edit_transaction'),
     path('<int:pk>/delete/', views.TransactionDeleteView.as_view(), name='delete_transaction'),
+    path('import/', views.TransactionImportView.as_view(), name='import_transactions'),
+    path('export/', views.export_transactions, name='export_transactions'),
     path('api/categories/', views.get_categories, name='get_categories'),
 ]
 
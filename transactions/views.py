@@ -1,12 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView
+from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+from django.conf import settings
+from dashboard.cache import data_version, page_etag
 from .models import Transaction, Category
-from .forms import TransactionForm
+from .forms import TransactionForm, TransactionImportForm
+from .importers import import_transactions, open_text
+from .exporters import EXPORT_FORMATS, iter_export
+from .pagination import InvalidCursor, paginate_keyset
+from .filters import filter_key, filter_transactions, shows_running_balance
+from .category_cache import categories_of_type, get_user_categories
+from .routers import replica_reads
+from .balances import page_balances
 
+@replica_reads
+@method_decorator(condition(etag_func=page_etag), name='dispatch')
 class TransactionListView(ListView):
     model = Transaction
     template_name = 'transactions/list.html'
@@ -16,18 +30,47 @@ class TransactionListView(ListView):
     def get_queryset(self):
         queryset = Transaction.objects.filter(user=self.request.user)
         
-        # Filter by type if provided
-        transaction_type = self.request.GET.get('type')
-        if transaction_type:
-            queryset = queryset.filter(type=transaction_type)
+        # Filter by type, period and category if provided
+        queryset = filter_transactions(queryset, self.request.GET)
         
-        # Filter by month/year if provided
-        month = self.request.GET.get('month')
-        year = self.request.GET.get('year')
-        if month and year:
-            queryset = queryset.filter(date__year=year, date__month=month)
-        
-        return queryset.select_related('category').order_by('-date', '-created_at')
+        return queryset.select_related('category').order_by('-date', '-created_at', '-id')
+    
+    def use_cursor_pagination(self):
+        """Cursor mode is opt-in via settings or ?cursor= on the request"""
+        if 'cursor' in self.request.GET:
+            return True
+        return getattr(settings, 'TRANSACTION_LIST_PAGINATION', 'offset') == 'cursor'
+    
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = paginate_keyset(queryset, self.request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return (None, page, page.object_list, page.has_other_pages())
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Current filters, for building pagination links
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params.pop('cursor', None)
+        context['filter_query'] = params.urlencode()
+        context['cursor_pagination'] = self.use_cursor_pagination()
+        page = self.request.GET.get('cursor', '') if context['cursor_pagination'] else context['page_obj'].number
+        context['fragment_key'] = filter_key(self.request.GET, page)
+        context.update(self.get_balances(context['object_list']))
+        context['data_version'] = data_version(self.request.user.pk)
+        context['fragment_cache_timeout'] = settings.FRAGMENT_CACHE_TIMEOUT
+        return context
+    
+    def get_balances(self, rows):
+        """Net worth, plus a running balance per row when the rows are consecutive
+        in the full history (no type, category or search filter)"""
+        rows = list(rows)
+        show_balance = shows_running_balance(self.request.GET)
+        return {'show_balance': show_balance, 'net_worth': page_balances(self.request.user, rows, show_balance)}
 
 
 class TransactionCreateView(CreateView):
@@ -79,14 +122,73 @@ class TransactionDeleteView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+@method_decorator(login_required, name='dispatch')
+class TransactionImportView(FormView):
+    form_class = TransactionImportForm
+    template_name = 'transactions/import.html'
+    success_url = reverse_lazy('transaction_list')
+    max_listed_errors = 10
+    
+    def form_valid(self, form):
+        report = import_transactions(
+            self.request.user,
+            open_text(form.cleaned_data['file'].file),
+            file_format=form.cleaned_data['format'],
+            create_missing=form.cleaned_data['create_missing'],
+            on_duplicate=form.cleaned_data['on_duplicate'],
+        )
+        messages.success(
+            self.request,
+            f'Imported {report.created} of {report.rows} rows in {report.elapsed:.1f}s ✅'
+        )
+        if report.duplicates:
+            messages.warning(self.request, f'{report.duplicates} rows matched existing transactions')
+        for line, error in report.errors[:self.max_listed_errors]:
+            messages.error(self.request, f'Row {line}: {error}')
+        if report.error_count > self.max_listed_errors:
+            messages.error(self.request, f'...and {report.error_count - self.max_listed_errors} more rows skipped')
+        return super().form_valid(form)
+
+
+@login_required
+@replica_reads
+def export_transactions(request):
+    """Stream the user's filtered transactions as CSV or NDJSON"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        iter_export(request.user, request.GET, export_format),
+        content_type=content_type,
+    )
+    filename = f'transactions-{timezone.localdate():%Y%m%d}.{extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def categories_etag(request):
+    entry = get_user_categories(request.user.pk)
+    return f'"{request.user.pk}-{entry["version"]}-{request.GET.get("type", "")}"'
+
+
+def categories_last_modified(request):
+    return get_user_categories(request.user.pk)['updated']
+
+
 @login_required
+@replica_reads
+@condition(etag_func=categories_etag, last_modified_func=categories_last_modified)
 def get_categories(request):
     """API endpoint to get categories based on type"""
     transaction_type = request.GET.get('type')
+    categories = []
     if transaction_type:
-        categories = Category.objects.filter(
-            user=request.user,
-            type=transaction_type
-        ).values('id', 'name')
-        return JsonResponse(list(categories), safe=False)
-    return JsonResponse([], safe=False)
+        categories = [
+            {'id': category['id'], 'name': category['name']}
+            for category in categories_of_type(request.user.pk, transaction_type)
+        ]
+    response = JsonResponse(categories, safe=False)
+    # Let browsers keep the list but revalidate it (cheaply, via 304) each time
+    response['Cache-Control'] = 'private, no-cache'
+    return response